@@ -9,7 +9,7 @@ from pathlib import Path
 # Read the Excel file
 excel_path = Path(__file__).parent / "assets" / "Cyber Resilience Maturity Assessment.xlsx"
 
-# Load all sheets
+# Open the workbook once and parse each sheet from the same handle
 xl_file = pd.ExcelFile(excel_path)
 
 analysis = {
@@ -19,7 +19,7 @@ analysis = {
 
 # Analyze each sheet
 for sheet_name in xl_file.sheet_names:
-    df = pd.read_excel(excel_path, sheet_name=sheet_name)
+    df = xl_file.parse(sheet_name)
     
     sheet_info = {
         "name": sheet_name,
@@ -0,0 +1,356 @@
+"""
+End-to-end load test for the assessment funnel
+
+Starts a local SMTP sink and the API (uvicorn, embedded storage in a temp
+DATA_DIR, email pointed at the sink), then drives the real funnel from
+several client processes:
+
+    /api/company/create -> /api/questionnaire/schema -> /api/assessment/submit
+    -> /api/assessment/send-email
+
+Answers are drawn at random from each question's options (seeded per
+client). Emails are sent in a background task, so besides the send-email
+request itself the sink measures delivery: time from the request to the
+message arriving.
+
+Reports throughput and p50/p95/p99 per step and writes them as JSON;
+--compare prints the change against an earlier run.
+
+Usage:
+    python benchmarks/funnel_load_test.py
+    python benchmarks/funnel_load_test.py --clients 8 --duration 30 --output funnel.json
+    python benchmarks/funnel_load_test.py --output funnel_new.json --compare funnel.json
+    python benchmarks/funnel_load_test.py --base-url http://127.0.0.1:8001 --smtp-port 2525
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+sys.path.append(str(Path(__file__).parent))
+from storage_load_test import BACKEND_DIR, _free_port, _percentile, _stop, _wait_for
+
+STEPS = ["create_company", "get_schema", "submit", "send_email"]
+
+
+# ==============================
+# SMTP SINK
+# ==============================
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH (anything accepted), MAIL, RCPT, DATA"""
+
+    def _reply(self, line: str):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self._reply("220 funnel-load-test sink ESMTP")
+        recipients: List[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                self._reply("250-funnel-load-test")
+                self._reply("250-AUTH PLAIN LOGIN")
+                self._reply("250 8BITMIME")
+            elif verb == "AUTH":
+                if command.upper().startswith("AUTH LOGIN"):
+                    self._reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self._reply("235 Authentication successful")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip().strip("<>").lower())
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line == b".\r\n":
+                        break
+                    size += len(data_line)
+                self.server.record(recipients, size)
+                recipients = []
+                self._reply("250 OK: queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            elif verb == "RSET":
+                recipients = []
+                self._reply("250 OK")
+            else:
+                # HELO, MAIL, NOOP, ...
+                self._reply("250 OK")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Accepts and discards mail, keeping the arrival time per recipient"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int):
+        super().__init__(("127.0.0.1", port), _SinkHandler)
+        self.lock = threading.Lock()
+        self.received: Dict[str, float] = {}
+        self.bytes_received = 0
+        self.thread = threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True)
+
+    def record(self, recipients: List[str], size: int):
+        now = time.time()
+        with self.lock:
+            for recipient in recipients:
+                self.received.setdefault(recipient, now)
+            self.bytes_received += size
+
+
+def start_api(port: int, smtp_port: int, data_dir: str, workers: int, log) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATA_DIR=data_dir,
+        SCHEMA_RELOAD_INTERVAL="0",
+        SMTP_SERVER="127.0.0.1",
+        SMTP_PORT=str(smtp_port),
+        SMTP_STARTTLS="false",
+        EMAIL_USER="loadtest@example.com",
+        EMAIL_PASS="loadtest",
+        EMAIL_ATTACH_PDF="false"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=str(BACKEND_DIR), env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    _wait_for(f"http://127.0.0.1:{port}/api/health", 120, process)
+    return process
+
+
+# ==============================
+# LOAD CLIENT
+# ==============================
+
+def random_responses(schema: Dict, rng: random.Random) -> Dict[str, List[Dict]]:
+    """A complete set of answers drawn from each question's options"""
+    responses = {}
+    for section, questions in schema["schema"].items():
+        answers = []
+        for q in questions:
+            options = q.get("options") or []
+            if q["question_type"] == "text" or not options:
+                answer = rng.choice(["Tape backups", "Cloud backup with weekly tests", "None yet"])
+            elif q["question_type"] == "multi_select":
+                answer = rng.sample(options, rng.randint(1, len(options)))
+            else:
+                answer = rng.choice(options)
+            answers.append({"question_id": q["question_id"], "answer": answer})
+        responses[section] = answers
+    return responses
+
+
+def _timed(session: requests.Session, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    response = session.request(method, url, timeout=60, **kwargs)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return response, elapsed
+
+
+def _client_loop(args) -> Dict:
+    """One load-generating process: run funnels back to back until the deadline"""
+    base_url, client_id, duration, seed = args
+    rng = random.Random(seed + client_id)
+    session = requests.Session()
+    latencies: Dict[str, List[float]] = {step: [] for step in STEPS}
+    errors: Dict[str, int] = {step: 0 for step in STEPS}
+    funnel_latencies: List[float] = []
+    emails: Dict[str, float] = {}
+
+    deadline = time.time() + duration
+    n = 0
+    while time.time() < deadline:
+        email = f"load{client_id}.{n}@example.com"
+        company = {"company_name": f"Load {client_id}-{n}", "contact_email": email}
+        n += 1
+        step = STEPS[0]
+        funnel_start = time.perf_counter()
+        try:
+            created, elapsed = _timed(session, "POST", f"{base_url}/api/company/create", json=company)
+            latencies[step].append(elapsed)
+
+            step = "get_schema"
+            schema, elapsed = _timed(session, "GET", f"{base_url}/api/questionnaire/schema")
+            latencies[step].append(elapsed)
+            schema = schema.json()
+
+            step = "submit"
+            submitted, elapsed = _timed(session, "POST", f"{base_url}/api/assessment/submit", json={
+                "assessment_id": created.json()["assessment_id"],
+                "company_info": company,
+                "responses": random_responses(schema, rng),
+                "schema_version": schema.get("version")
+            })
+            latencies[step].append(elapsed)
+
+            step = "send_email"
+            sent_at = time.time()
+            _, elapsed = _timed(session, "POST", f"{base_url}/api/assessment/send-email", json={
+                "email": email,
+                "company_name": company["company_name"],
+                "results": submitted.json()["results"]
+            })
+            latencies[step].append(elapsed)
+            emails[email] = sent_at
+            funnel_latencies.append(time.perf_counter() - funnel_start)
+        except (requests.RequestException, ValueError, KeyError):
+            errors[step] += 1
+    return {"latencies": latencies, "errors": errors, "funnels": funnel_latencies, "emails": emails}
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict:
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput_per_s": round(len(latencies) / duration, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0
+    }
+
+
+def run_load(base_url: str, clients: int, duration: float, seed: int, sink: SMTPSink,
+             email_grace: float) -> Dict:
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        results = pool.map(_client_loop, [(base_url, i, duration, seed) for i in range(clients)])
+
+    report = {"steps": {}}
+    for step in STEPS:
+        latencies = [lat for result in results for lat in result["latencies"][step]]
+        report["steps"][step] = summarize(latencies, sum(result["errors"][step] for result in results), duration)
+    report["funnel"] = summarize([lat for result in results for lat in result["funnels"]], 0, duration)
+
+    # Background sends may still be in flight when the load stops
+    emails = {email: sent_at for result in results for email, sent_at in result["emails"].items()}
+    deadline = time.monotonic() + email_grace
+    while time.monotonic() < deadline:
+        with sink.lock:
+            if all(email in sink.received for email in emails):
+                break
+        time.sleep(0.2)
+    with sink.lock:
+        delivered = [sink.received[email] - sent_at for email, sent_at in emails.items() if email in sink.received]
+        bytes_received = sink.bytes_received
+    report["email_delivery"] = summarize(delivered, len(emails) - len(delivered), duration)
+    report["email_delivery"]["bytes_received"] = bytes_received
+    return report
+
+
+# ==============================
+# REPORTING
+# ==============================
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    rows = [(step, report["steps"][step]) for step in STEPS]
+    rows += [("email_delivery", report["email_delivery"]), ("funnel", report["funnel"])]
+    base_rows = {}
+    if baseline:
+        base_rows = dict(baseline.get("steps", {}), email_delivery=baseline.get("email_delivery"),
+                         funnel=baseline.get("funnel"))
+
+    print(f"\n{'step':<16}{'count':>7}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in rows:
+        print(f"{name:<16}{row['count']:>7}{row['errors']:>5}{row['throughput_per_s']:>9.2f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+        before = base_rows.get(name)
+        if before:
+            changes = []
+            for key in ("throughput_per_s", "p50_ms", "p95_ms", "p99_ms"):
+                if before.get(key):
+                    changes.append(f"{key} {(row[key] - before[key]) / before[key]:+.0%}")
+            print(f"{'':<16}vs baseline: {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the assessment funnel end to end")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent load-generating processes")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API it starts")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the random answers")
+    parser.add_argument("--base-url", help="Use a running API instead of starting one (point its SMTP at --smtp-port)")
+    parser.add_argument("--smtp-port", type=int, default=0, help="Port for the SMTP sink (default: pick a free one)")
+    parser.add_argument("--email-grace", type=float, default=30, help="Seconds to wait for queued emails after the load")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    if args.base_url and not args.smtp_port:
+        parser.error("--base-url requires --smtp-port (the port its SMTP_SERVER points to)")
+
+    sink = SMTPSink(args.smtp_port or _free_port())
+    sink.thread.start()
+    smtp_port = sink.server_address[1]
+    print(f"[*] SMTP sink listening on 127.0.0.1:{smtp_port}")
+
+    work_dir = tempfile.mkdtemp(prefix="crma_funnel_")
+    log = open(Path(work_dir) / "server.log", "wb")
+    api = None
+    base_url = args.base_url
+    try:
+        if not base_url:
+            port = _free_port()
+            print(f"[*] Starting API on port {port} with {args.workers} worker(s) (data in {work_dir})...")
+            api = start_api(port, smtp_port, str(Path(work_dir) / "app"), args.workers, log)
+            base_url = f"http://127.0.0.1:{port}"
+
+        print(f"[*] {args.clients} client(s) for {args.duration:g}s against {base_url}...")
+        report = run_load(base_url, args.clients, args.duration, args.seed, sink, args.email_grace)
+    finally:
+        if api is not None:
+            _stop(api)
+        sink.shutdown()
+        log.close()
+
+    report.update({
+        "started_at": datetime.now().isoformat(),
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "workers": args.workers if not args.base_url else None,
+        "seed": args.seed,
+        "cpu_count": os.cpu_count()
+    })
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[✓] Results written to {args.output}")
+    if api is not None:
+        print(f"[*] Server log: {log.name}")
+
+
+if __name__ == "__main__":
+    main()
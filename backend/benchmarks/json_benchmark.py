@@ -0,0 +1,167 @@
+"""
+JSON serialization benchmark
+
+Measures serialize/deserialize cost of representative payloads with the
+standard library (the previous behaviour) and with utils.json_codec
+(orjson when installed):
+
+- the questionnaire schema response
+- a submit response with full question_details
+- a page of stored assessment and response documents as ChromaDBManager
+  decodes them on every read
+
+For responses it also compares FastAPI's default path (jsonable_encoder +
+JSONResponse) with FastJSONResponse rendering the same content.
+
+Usage:
+    python benchmarks/json_benchmark.py
+    python benchmarks/json_benchmark.py --documents 5000 --output json_bench.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from questionnaire.schema_registry import SchemaRegistry
+from utils.json_codec import FastJSONResponse, dumps, loads, orjson
+
+
+def _time(fn: Callable[[], Any], min_seconds: float = 0.5) -> float:
+    """Mean microseconds per call, repeating until min_seconds have elapsed"""
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1e6
+
+
+def build_payloads(document_count: int) -> Dict[str, Any]:
+    version = SchemaRegistry().active
+    schema = version.schema
+    answers = {}
+    for q in version.compiled.questions:
+        options = q.get("options") or []
+        if q["question_type"] == "multi_select":
+            answers[q["question_id"]] = options[:2]
+        elif options:
+            answers[q["question_id"]] = options[-1]
+        else:
+            answers[q["question_id"]] = "Legacy NAS and two branch offices"
+
+    schema_body = {
+        "version": version.version,
+        "total_questions": version.artifact["question_count"],
+        "sections": list(schema.keys()),
+        "schema": schema
+    }
+    submit_body = {
+        "success": True,
+        "assessment_id": str(uuid.uuid4()),
+        "schema_version": version.version,
+        "results": version.scorer.calculate_score(answers),
+        "company_info": {"company_name": "Benchmark Ltd", "contact_email": "ciso@example.com"}
+    }
+
+    now = datetime.now().isoformat()
+    assessment_docs = [
+        json.dumps({
+            "assessment_id": str(uuid.uuid4()), "company_id": str(uuid.uuid4()), "created_at": now,
+            "status": "completed", "completed_sections": list(schema.keys()), "completed_at": now,
+            "schema_version": version.version
+        })
+        for _ in range(document_count)
+    ]
+    response_docs = [
+        json.dumps({"q": q_id, "a": i % 4})
+        for i in range(document_count)
+        for q_id in version.compiled.question_ids
+    ]
+    return {
+        "schema_response": schema_body,
+        "submit_response": submit_body,
+        "assessment_documents": assessment_docs,
+        "response_documents": response_docs
+    }
+
+
+def _stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj)
+
+
+def bench_documents(name: str, docs: List[str]) -> Dict[str, Any]:
+    decoded = [json.loads(doc) for doc in docs]
+    return {
+        "payload": name,
+        "items": len(docs),
+        "loads_stdlib_us": _time(lambda: [json.loads(doc) for doc in docs]),
+        "loads_codec_us": _time(lambda: [loads(doc) for doc in docs]),
+        "dumps_stdlib_us": _time(lambda: [_stdlib_dumps(d) for d in decoded]),
+        "dumps_codec_us": _time(lambda: [dumps(d) for d in decoded])
+    }
+
+
+def bench_response(name: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    encoded = JSONResponse(body).body
+    return {
+        "payload": name,
+        "bytes": len(encoded),
+        "loads_stdlib_us": _time(lambda: json.loads(encoded)),
+        "loads_codec_us": _time(lambda: loads(encoded)),
+        # FastAPI's default: jsonable_encoder walk, then stdlib json
+        "dumps_stdlib_us": _time(lambda: JSONResponse(jsonable_encoder(body)).body),
+        # What the API does now: the default response class renders with orjson
+        "dumps_codec_us": _time(lambda: FastJSONResponse(jsonable_encoder(body)).body),
+        # Endpoints returning FastJSONResponse directly (submit) also skip jsonable_encoder
+        "dumps_codec_direct_us": _time(lambda: FastJSONResponse(body).body)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialize/deserialize on API payloads")
+    parser.add_argument("--documents", type=int, default=1000, help="Stored assessments per decoded page")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("[!] orjson is not installed: the codec falls back to the standard library")
+
+    payloads = build_payloads(args.documents)
+    results = [
+        bench_response("schema_response", payloads["schema_response"]),
+        bench_response("submit_response", payloads["submit_response"]),
+        bench_documents("assessment_documents", payloads["assessment_documents"]),
+        bench_documents("response_documents", payloads["response_documents"])
+    ]
+
+    print(f"{'payload':<22}{'op':<8}{'stdlib µs':>12}{'codec µs':>12}{'speedup':>9}")
+    for row in results:
+        for op in ("dumps", "loads"):
+            before, after = row[f"{op}_stdlib_us"], row[f"{op}_codec_us"]
+            row[f"{op}_speedup"] = round(before / after, 2)
+            print(f"{row['payload']:<22}{op:<8}{before:>12.1f}{after:>12.1f}{row[f'{op}_speedup']:>8.1f}x")
+        if "dumps_codec_direct_us" in row:
+            direct = row["dumps_codec_direct_us"]
+            print(f"{'':<22}{'direct':<8}{'':>12}{direct:>12.1f}{row['dumps_stdlib_us'] / direct:>8.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"orjson": orjson is not None, "documents": args.documents, "results": results}, f, indent=2)
+        print(f"[✓] Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Microbenchmarks for the hot paths
+
+- Pure functions: ResilienceScorer.calculate_score, get_questionnaire_schema,
+  generate_email_html, CompiledSchema.compact_codes
+- Every ChromaDBManager read and write method against stores pre-populated
+  with 1k, 100k and 1M records per collection (companies, assessments,
+  responses)
+
+Reports ops/sec, the transient allocation peak per call and the memory
+retained per call (tracemalloc), and compares with a stored baseline so
+regressions show up in review. Numbers only compare across runs on the
+same host; write benchmarks are capped at a few calls and are the noisiest.
+
+Fixtures are built once through the bulk write path and cached under
+--fixture-dir (one DATA_DIR per size); expect the 1M store to take a long
+time to build and several GB of disk. Each size runs in its own process,
+because storage paths come from DATA_DIR at import time.
+
+By default documents are embedded with a cheap hash function instead of
+Chroma's ONNX model, so the numbers measure storage rather than the model
+(and need no model download); --embedding default measures the real thing.
+
+Usage:
+    python benchmarks/micro_benchmark.py
+    python benchmarks/micro_benchmark.py --sizes 1000 100000 --output micro.json
+    python benchmarks/micro_benchmark.py --sizes 1000 --update-baseline
+    python benchmarks/micro_benchmark.py --fail-on-regression --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "micro_benchmark.json"
+DEFAULT_FIXTURE_DIR = Path(__file__).parent / ".fixtures"
+FIXTURE_BATCH_SIZE = 2_000
+# Write benchmarks grow the cached fixture; keep that growth negligible
+MAX_WRITE_CALLS = 50
+SAMPLE_IDS = 1_000
+
+
+# ==============================
+# MEASUREMENT
+# ==============================
+
+def measure(fn: Callable[[], Any], min_seconds: float, max_calls: Optional[int] = None,
+            alloc_calls: int = 10) -> Dict[str, float]:
+    """ops/sec (without tracing), then allocation peak and retained bytes per call (with tracemalloc)"""
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds or (max_calls and calls >= max_calls):
+            break
+
+    if max_calls:
+        alloc_calls = min(alloc_calls, max(1, max_calls // 5))
+    tracemalloc.start()
+    peaks = []
+    baseline_current = tracemalloc.get_traced_memory()[0]
+    for _ in range(alloc_calls):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    retained = tracemalloc.get_traced_memory()[0] - baseline_current
+    tracemalloc.stop()
+
+    return {
+        "ops_per_s": round(calls / elapsed, 1),
+        "us_per_op": round(elapsed / calls * 1e6, 1),
+        "calls": calls,
+        "peak_alloc_kb": round(sum(peaks) / len(peaks) / 1024, 1),
+        "retained_bytes_per_op": round(retained / alloc_calls)
+    }
+
+
+def random_answers(compiled, rng: random.Random) -> Dict[str, Any]:
+    answers = {}
+    for q in compiled.questions:
+        options = q.get("options") or []
+        if q["question_type"] == "multi_select" and options:
+            answers[q["question_id"]] = rng.sample(options, rng.randint(1, len(options)))
+        elif options:
+            answers[q["question_id"]] = rng.choice(options)
+        else:
+            answers[q["question_id"]] = "Nightly backups to a second site"
+    return answers
+
+
+# ==============================
+# PURE FUNCTIONS
+# ==============================
+
+def bench_pure(min_seconds: float) -> Dict[str, Dict]:
+    from questionnaire.questionnaire_schema import get_questionnaire_schema
+    from questionnaire.compiled_schema import get_compiled_schema
+    from utils.scoring import ResilienceScorer
+    from utils.email_sender import generate_email_html
+
+    rng = random.Random(7)
+    compiled = get_compiled_schema()
+    scorer = ResilienceScorer()
+    answers = random_answers(compiled, rng)
+    results = scorer.calculate_score(answers)
+    # Compact wire format: option index, list of indexes (multi-select) or text
+    compact = {
+        q_id: [compiled.option_index[q_id][label] for label in answer] if isinstance(answer, list)
+        else compiled.encode_answer(q_id, answer)
+        for q_id, answer in answers.items()
+    }
+
+    return {
+        "scorer.calculate_score": measure(lambda: scorer.calculate_score(answers), min_seconds),
+        "get_questionnaire_schema": measure(get_questionnaire_schema, min_seconds),
+        "generate_email_html": measure(lambda: generate_email_html("Benchmark Ltd", results), min_seconds),
+        "compiled.compact_codes": measure(lambda: compiled.compact_codes(compact), min_seconds)
+    }
+
+
+# ==============================
+# STORAGE FIXTURES
+# ==============================
+
+def _use_hash_embeddings():
+    """Cheap deterministic vectors instead of the ONNX model (benchmark processes only)"""
+    import hashlib
+    import chromadb.api.models.Collection as collection_module
+
+    def _embed(self, input):
+        return [[b / 255 for b in hashlib.blake2b(doc.encode("utf-8"), digest_size=16).digest()] for doc in input]
+    collection_module.Collection._embed = _embed
+
+
+def populate(db, size: int, seed: int, version: str, compiled) -> Dict[str, List[str]]:
+    """
+    size companies, size assessments (half completed, spread over 90 days)
+    and size responses (full answer sets for the first size / questions
+    completed assessments), written in bulk batches
+    """
+    rng = random.Random(seed)
+    question_ids = compiled.question_ids
+    now = datetime.now()
+    samples: Dict[str, List[str]] = {"company_ids": [], "assessment_ids": [], "answered_ids": []}
+    responses_left = size
+    start = time.perf_counter()
+
+    for offset in range(0, size, FIXTURE_BATCH_SIZE):
+        count = min(FIXTURE_BATCH_SIZE, size - offset)
+        company_ids = db.add_companies([
+            {"company_name": f"Fixture Company {offset + i}", "contact_email": f"it{offset + i}@fixture.example",
+             "industry": rng.choice(["Banking & Financial Services", "Healthcare", "Manufacturing", "Technology"])}
+            for i in range(count)
+        ])
+        rows = []
+        for company_id in company_ids:
+            created = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+            row = {"company_id": company_id, "created_at": created.isoformat(), "schema_version": version}
+            if rng.random() < 0.5:
+                row.update(status="completed", completed_at=(created + timedelta(minutes=rng.randint(5, 120))).isoformat(),
+                           completed_sections=list(compiled.schema.keys()))
+            rows.append(row)
+        assessment_ids = db.create_assessments(rows)
+
+        responses = []
+        for assessment_id, row in zip(assessment_ids, rows):
+            if row.get("status") != "completed" or responses_left < len(question_ids):
+                continue
+            answers = random_answers(compiled, rng)
+            responses.extend(
+                {"assessment_id": assessment_id, "question_id": q_id, "answer": compiled.encode_answer(q_id, answer)}
+                for q_id, answer in answers.items()
+            )
+            responses_left -= len(question_ids)
+            if len(samples["answered_ids"]) < SAMPLE_IDS:
+                samples["answered_ids"].append(assessment_id)
+        for batch_start in range(0, len(responses), FIXTURE_BATCH_SIZE):
+            db.add_responses(responses[batch_start:batch_start + FIXTURE_BATCH_SIZE])
+
+        if len(samples["company_ids"]) < SAMPLE_IDS:
+            samples["company_ids"].extend(company_ids[:SAMPLE_IDS - len(samples["company_ids"])])
+            samples["assessment_ids"].extend(assessment_ids[:SAMPLE_IDS - len(samples["assessment_ids"])])
+        done = offset + count
+        if done % 50_000 == 0 or done == size:
+            rate = done / (time.perf_counter() - start)
+            print(f"    {done:,}/{size:,} records per collection ({rate:,.0f}/s)", file=sys.stderr)
+    return samples
+
+
+def load_fixture(db, size: int, seed: int, data_dir: Path, embedding: str, active) -> Dict:
+    manifest_path = data_dir / "fixture.json"
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("size") == size and manifest.get("embedding") == embedding:
+            return manifest
+        raise RuntimeError(f"{data_dir} holds a different fixture; delete it or use another --fixture-dir")
+
+    print(f"[*] Building {size:,}-record fixture in {data_dir} (cached for later runs)...", file=sys.stderr)
+    build_start = time.perf_counter()
+    samples = populate(db, size, seed, active.version, active.compiled)
+    manifest = {
+        "size": size,
+        "seed": seed,
+        "embedding": embedding,
+        "built_at": datetime.now().isoformat(),
+        "build_seconds": round(time.perf_counter() - build_start, 1),
+        **samples
+    }
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    return manifest
+
+
+# ==============================
+# STORAGE METHODS
+# ==============================
+
+# Not timed: destructive, or full scans whose cost is the store size by design
+EXCLUDED_METHODS = {
+    "reset_database": "destructive",
+    "clear_questions": "destructive",
+    "replace_questions": "rewrites the questions collection",
+    "add_question": "questions are only written by replace_questions",
+    "rebuild_index": "full scan (maintenance)",
+    "backfill_time_metadata": "full scan (maintenance)",
+}
+
+
+def storage_cases(db, manifest: Dict, rng: random.Random, active) -> Dict[str, Any]:
+    """name -> (callable, is_write)"""
+    compiled = active.compiled
+    companies = manifest["company_ids"]
+    assessments = manifest["assessment_ids"]
+    answered = manifest["answered_ids"] or assessments
+    now = datetime.now()
+    week_ago = (now - timedelta(days=7)).timestamp()
+    pick = rng.choice
+
+    def _responses():
+        assessment_id = pick(answered)
+        return [{"assessment_id": assessment_id, "question_id": q_id, "answer": 0} for q_id in compiled.question_ids]
+
+    return {
+        "add_company": (lambda: db.add_company({"company_name": "Bench Ltd", "contact_email": "b@bench.example"}), True),
+        "add_companies": (lambda: db.add_companies([{"company_name": f"Bench {i}"} for i in range(50)]), True),
+        "create_assessment": (lambda: db.create_assessment(pick(companies), active.version), True),
+        "create_assessments": (lambda: db.create_assessments([{"company_id": pick(companies)} for _ in range(50)]), True),
+        "add_response": (lambda: db.add_response(_responses()[0]), True),
+        "add_responses": (lambda: db.add_responses(_responses()), True),
+        "update_assessment_status": (lambda: db.update_assessment_status(pick(assessments), "completed", []), True),
+        "get_company": (lambda: db.get_company(pick(companies)), False),
+        "get_companies": (lambda: db.get_companies(rng.sample(companies, min(100, len(companies)))), False),
+        "search_companies": (lambda: db.search_companies(company_name=f"Fixture Company {rng.randrange(len(companies))}"), False),
+        "get_assessment": (lambda: db.get_assessment(pick(assessments)), False),
+        "get_assessments": (lambda: db.get_assessments(rng.sample(assessments, min(100, len(assessments)))), False),
+        "get_company_assessments": (lambda: db.get_company_assessments(pick(companies)), False),
+        "get_responses_by_assessment": (lambda: db.get_responses_by_assessment(pick(answered)), False),
+        "get_responses_for_assessments": (lambda: db.get_responses_for_assessments(rng.sample(answered, min(50, len(answered)))), False),
+        "get_questions_by_section": (lambda: db.get_questions_by_section(next(iter(compiled.schema))), False),
+        "get_all_questions": (db.get_all_questions, False),
+        "iter_assessments": (lambda: next(db.iter_assessments(status="completed"), None), False),
+        "list_companies": (lambda: db.list_companies(50), False),
+        "list_assessments": (lambda: db.list_assessments(50, status="completed"), False),
+        "list_assessments_between": (lambda: db.list_assessments_between("completed", week_ago, None, 50), False),
+        "list_responses_between": (lambda: db.list_responses_between(week_ago, None, 50), False),
+        "get_activity": (lambda: db.get_activity(now.timestamp() - 30 * 86400, now.timestamp(), "day"), False),
+        "get_statistics": (db.get_statistics, False),
+        "health_check": (db.health_check, False),
+    }
+
+
+def bench_storage(size: int, seed: int, data_dir: Path, embedding: str, min_seconds: float) -> Dict:
+    """Runs in a child process whose DATA_DIR is data_dir"""
+    if embedding == "hash":
+        _use_hash_embeddings()
+    from database.chromadb_manager import ChromaDBManager
+    from questionnaire.schema_registry import SchemaRegistry
+
+    db = ChromaDBManager()
+    active = SchemaRegistry().active
+    if not db.get_all_questions():
+        db.replace_questions([
+            {"section": section, "question_text": q["question_text"], "question_type": q["question_type"], "order": i}
+            for section, questions in active.schema.items() for i, q in enumerate(questions)
+        ], active.version)
+    manifest = load_fixture(db, size, seed, data_dir, embedding, active)
+
+    rng = random.Random(seed)
+    cases = storage_cases(db, manifest, rng, active)
+    public = {name for name in dir(db) if not name.startswith("_") and callable(getattr(db, name))}
+    missing = sorted(public - set(cases) - set(EXCLUDED_METHODS))
+    if missing:
+        print(f"[!] No benchmark for: {', '.join(missing)}", file=sys.stderr)
+
+    results = {}
+    for name, (fn, is_write) in cases.items():
+        results[f"chromadb.{name}"] = measure(fn, min_seconds, MAX_WRITE_CALLS if is_write else None)
+    return {"size": size, "fixture_build_seconds": manifest.get("build_seconds"), "results": results}
+
+
+def run_storage_size(size: int, args) -> Dict:
+    data_dir = Path(args.fixture_dir) / f"{args.embedding}_{size}"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as out:
+        out_path = out.name
+    env = dict(os.environ, DATA_DIR=str(data_dir), CHROMA_MODE="persistent", CHROMA_SHARDS="1",
+               ANONYMIZED_TELEMETRY="False", SCHEMA_DIR=str(data_dir / "schemas"))
+    command = [sys.executable, __file__, "--child-size", str(size), "--child-output", out_path,
+               "--seed", str(args.seed), "--embedding", args.embedding, "--min-seconds", str(args.min_seconds)]
+    subprocess.run(command, env=env, cwd=str(BACKEND_DIR), check=True)
+    try:
+        return json.loads(Path(out_path).read_text(encoding="utf-8"))
+    finally:
+        os.unlink(out_path)
+
+
+# ==============================
+# BASELINE COMPARISON
+# ==============================
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Keys whose ops/sec fell by more than threshold; prints every delta"""
+    regressions = []
+    print(f"\n{'benchmark':<48}{'ops/s':>12}{'baseline':>12}{'change':>9}{'peak KB':>10}")
+    for key, row in current.items():
+        before = baseline.get(key)
+        change = ""
+        if before and before.get("ops_per_s"):
+            delta = (row["ops_per_s"] - before["ops_per_s"]) / before["ops_per_s"]
+            change = f"{delta:+.0%}"
+            if delta < -threshold:
+                regressions.append(key)
+                change += " !"
+        base_ops = f"{before['ops_per_s']:.1f}" if before else "-"
+        print(f"{key:<48}{row['ops_per_s']:>12.1f}{base_ops:>12}{change:>9}{row['peak_alloc_kb']:>10.1f}")
+    return regressions
+
+
+def flatten(report: Dict) -> Dict[str, Dict]:
+    rows = {f"pure/{name}": row for name, row in report.get("pure", {}).items()}
+    for run in report.get("storage", []):
+        rows.update({f"{run['size']}/{name}": row for name, row in run["results"].items()})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for scoring, schema and storage operations")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES, help="Records per collection for storage fixtures (none: pure only)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="Minimum timing window per benchmark")
+    parser.add_argument("--embedding", choices=["hash", "default"], default="hash", help="Document embedding used by the stores")
+    parser.add_argument("--fixture-dir", default=str(DEFAULT_FIXTURE_DIR), help="Where fixture stores are cached")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline results to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="ops/sec drop counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--child-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_size:
+        result = bench_storage(args.child_size, args.seed, Path(os.environ["DATA_DIR"]), args.embedding, args.min_seconds)
+        Path(args.child_output).write_text(json.dumps(result), encoding="utf-8")
+        return
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "embedding": args.embedding,
+        "min_seconds": args.min_seconds
+    }
+    print("[*] Pure functions...")
+    report["pure"] = bench_pure(args.min_seconds)
+    report["storage"] = []
+    for size in args.sizes:
+        print(f"[*] Storage methods at {size:,} records per collection...")
+        report["storage"].append(run_storage_size(size, args))
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists():
+        baseline = flatten(json.loads(baseline_path.read_text(encoding="utf-8")))
+    else:
+        print(f"[!] No baseline at {baseline_path}")
+    regressions = compare(flatten(report), baseline, args.threshold)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\n[✓] Results written to {args.output}")
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"[✓] Baseline updated: {baseline_path}")
+    if regressions:
+        print(f"\n[!] {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
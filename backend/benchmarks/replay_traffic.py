@@ -0,0 +1,332 @@
+"""
+Replay captured traffic against a local instance
+
+Reads traces written by the traffic capture middleware
+(TRAFFIC_CAPTURE_ENABLED=true) and re-issues them in their original order
+and spacing at 1x, 10x (any factor) or as fast as possible. By default it
+starts its own API on an empty temp DATA_DIR with email pointed at a local
+SMTP sink, so a trace can be replayed against two storage configurations
+and the runs compared.
+
+Ids returned by replayed requests (company_id, assessment_id, report_id,
+...) replace the recorded ones in later paths and bodies; a request
+waits for the request that produced the id it uses. Requests that use ids
+created before the capture started will 404 and show up as status
+mismatches.
+
+Reports p50/p95/p99 per route for the capture and for the replay; --compare
+prints the change against an earlier replay.
+
+Usage:
+    python benchmarks/replay_traffic.py data/traffic/
+    python benchmarks/replay_traffic.py trace.jsonl --speed 10 --output replay.json
+    python benchmarks/replay_traffic.py trace.jsonl --speed max --concurrency 32 --compare replay.json
+    python benchmarks/replay_traffic.py trace.jsonl --base-url http://127.0.0.1:8001
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+sys.path.append(str(Path(__file__).parent))
+from storage_load_test import _free_port, _stop
+from funnel_load_test import SMTPSink, start_api, summarize
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+# ==============================
+# TRACE LOADING
+# ==============================
+
+def load_trace(paths: List[str]) -> List[Dict]:
+    """Records from trace files (directories expand to their *.jsonl files), oldest first"""
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob("*.jsonl")) if path.is_dir() else [path])
+    records = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def _strings(data: Any):
+    if isinstance(data, str):
+        yield data
+    elif isinstance(data, dict):
+        for value in data.values():
+            yield from _strings(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _strings(value)
+
+
+def plan_dependencies(records: List[Dict]) -> List[List[int]]:
+    """For each record, the earlier records whose response ids it refers to"""
+    producer: Dict[str, int] = {}
+    dependencies = []
+    for index, record in enumerate(records):
+        text = " ".join([record["path"], record.get("query", "")] + list(_strings(record.get("body"))))
+        dependencies.append(sorted({i for recorded_id, i in producer.items() if recorded_id in text}))
+        for recorded_id in record.get("ids", {}).values():
+            producer.setdefault(recorded_id, index)
+    return dependencies
+
+
+def _substitute(data: Any, mapping: Dict[str, str]) -> Any:
+    if isinstance(data, str):
+        for old, new in mapping.items():
+            if old in data:
+                data = data.replace(old, new)
+        return data
+    if isinstance(data, dict):
+        return {key: _substitute(value, mapping) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_substitute(value, mapping) for value in data]
+    return data
+
+
+# ==============================
+# REPLAY
+# ==============================
+
+class Replayer:
+    def __init__(self, base_url: str, records: List[Dict], speed: Optional[float], concurrency: int,
+                 dependency_timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.records = records
+        self.speed = speed
+        self.dependency_timeout = dependency_timeout
+        self.dependencies = plan_dependencies(records)
+        self.done = [threading.Event() for _ in records]
+        self.id_map: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.results: List[Optional[Dict]] = [None] * len(records)
+        self.local = threading.local()
+        self.concurrency = concurrency
+
+    def _session(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def _send(self, index: int, lag: float):
+        record = self.records[index]
+        result = {"lag": lag, "status": None, "latency": None}
+        try:
+            for dependency in self.dependencies[index]:
+                self.done[dependency].wait(self.dependency_timeout)
+            with self.lock:
+                mapping = dict(self.id_map)
+            path = _substitute(record["path"], mapping)
+            query = _substitute(record.get("query", ""), mapping)
+            url = f"{self.base_url}{path}{'?' + query if query else ''}"
+            headers = {}
+            data = None
+            if record.get("body") is not None:
+                body = _substitute(record["body"], mapping)
+                content_type = record.get("content_type") or "application/json"
+                if content_type.split(";")[0].strip().lower() in MSGPACK_TYPES:
+                    import msgpack
+                    data = msgpack.packb(body, use_bin_type=True)
+                else:
+                    data = json.dumps(body).encode()
+                headers["Content-Type"] = content_type
+            if record.get("accept"):
+                headers["Accept"] = record["accept"]
+
+            start = time.perf_counter()
+            response = self._session().request(record["method"], url, data=data, headers=headers, timeout=120)
+            result["latency"] = time.perf_counter() - start
+            result["status"] = response.status_code
+
+            if record.get("ids") and "json" in response.headers.get("content-type", ""):
+                try:
+                    payload = response.json()
+                except ValueError:
+                    payload = {}
+                with self.lock:
+                    for key, recorded_id in record["ids"].items():
+                        if isinstance(payload, dict) and isinstance(payload.get(key), str):
+                            self.id_map[recorded_id] = payload[key]
+        except requests.RequestException as e:
+            result["error"] = str(e)
+        finally:
+            self.results[index] = result
+            self.done[index].set()
+
+    def run(self) -> float:
+        """Replay everything; returns the wall-clock duration"""
+        origin = self.records[0]["ts"] if self.records else 0
+        start = time.perf_counter()
+        # Bounded so "max" speed cannot queue the whole trace at once
+        slots = threading.BoundedSemaphore(self.concurrency)
+
+        def task(index, lag):
+            try:
+                self._send(index, lag)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="replay") as pool:
+            for index, record in enumerate(self.records):
+                due = 0.0 if self.speed is None else (record["ts"] - origin) / self.speed
+                delay = due - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+                slots.acquire()
+                pool.submit(task, index, max(0.0, time.perf_counter() - start - due))
+        return time.perf_counter() - start
+
+
+# ==============================
+# REPORTING
+# ==============================
+
+def build_report(records: List[Dict], results: List[Dict], duration: float) -> Dict:
+    captured_span = max(1e-9, records[-1]["ts"] - records[0]["ts"]) if records else 1e-9
+    routes: Dict[str, Dict[str, List]] = {}
+    for record, result in zip(records, results):
+        key = f"{record['method']} {record.get('route') or record['path']}"
+        row = routes.setdefault(key, {"captured": [], "replayed": [], "mismatches": 0})
+        row["captured"].append(record["duration_ms"] / 1000)
+        if result["latency"] is not None:
+            row["replayed"].append(result["latency"])
+        if result["status"] != record["status"]:
+            row["mismatches"] += 1
+
+    report = {"routes": {}}
+    for key, row in sorted(routes.items()):
+        report["routes"][key] = {
+            "captured": summarize(row["captured"], 0, captured_span),
+            "replayed": summarize(row["replayed"], row["mismatches"], duration)
+        }
+    report["overall"] = {
+        "captured": summarize([r["duration_ms"] / 1000 for r in records], 0, captured_span),
+        "replayed": summarize([r["latency"] for r in results if r["latency"] is not None],
+                              sum(row["mismatches"] for row in routes.values()), duration)
+    }
+    # How late requests went out; high values mean the replayer, not the API, set the pace
+    report["schedule_lag"] = summarize([r["lag"] for r in results], 0, duration)
+    return report
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    rows = list(report["routes"].items()) + [("overall", report["overall"])]
+    base_rows = dict(baseline.get("routes", {}), overall=baseline.get("overall")) if baseline else {}
+
+    print(f"\n{'route':<48}{'count':>7}{'status≠':>9}{'p50 ms':>17}{'p95 ms':>17}{'p99 ms':>17}")
+    print(f"{'':<64}{'capture → replay':>17}")
+    for name, row in rows:
+        captured, replayed = row["captured"], row["replayed"]
+        cells = "".join(f"{captured[key]:>8.1f} → {replayed[key]:<6.1f}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{name[:47]:<48}{replayed['count']:>7}{replayed['errors']:>9}{cells}")
+        before = (base_rows.get(name) or {}).get("replayed")
+        if before:
+            changes = [f"{key} {(replayed[key] - before[key]) / before[key]:+.0%}"
+                       for key in ("p50_ms", "p95_ms", "p99_ms") if before.get(key)]
+            print(f"{'':<48}vs baseline: {', '.join(changes)}")
+    lag = report["schedule_lag"]
+    print(f"\nSchedule lag p50/p95/p99: {lag['p50_ms']:.1f} / {lag['p95_ms']:.1f} / {lag['p99_ms']:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured traffic and compare latency distributions")
+    parser.add_argument("traces", nargs="+", help="Trace .jsonl files or capture directories")
+    parser.add_argument("--speed", default="1", help="Replay speed factor (1, 10, ...) or 'max' for no pacing")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight at most")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API it starts")
+    parser.add_argument("--base-url", help="Replay against a running API instead of starting one")
+    parser.add_argument("--dependency-timeout", type=float, default=30,
+                        help="Seconds a request waits for the request that creates an id it uses")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    if args.speed == "max":
+        speed = None
+    else:
+        try:
+            speed = float(args.speed)
+        except ValueError:
+            speed = 0
+        if speed <= 0:
+            parser.error("--speed must be a positive number or 'max'")
+
+    records = load_trace(args.traces)
+    if not records:
+        parser.error("No trace records found")
+    span = records[-1]["ts"] - records[0]["ts"]
+    print(f"[*] {len(records)} requests spanning {span:.1f}s captured")
+
+    work_dir = tempfile.mkdtemp(prefix="crma_replay_")
+    log = open(Path(work_dir) / "server.log", "wb")
+    api = None
+    sink = None
+    base_url = args.base_url
+    try:
+        if not base_url:
+            sink = SMTPSink(_free_port())
+            sink.thread.start()
+            port = _free_port()
+            print(f"[*] Starting API on port {port} with {args.workers} worker(s) (data in {work_dir})...")
+            api = start_api(port, sink.server_address[1], str(Path(work_dir) / "app"), args.workers, log)
+            base_url = f"http://127.0.0.1:{port}"
+
+        print(f"[*] Replaying at {'max speed' if speed is None else f'{speed:g}x'} against {base_url}...")
+        replayer = Replayer(base_url, records, speed, args.concurrency, args.dependency_timeout)
+        duration = replayer.run()
+    finally:
+        if api is not None:
+            _stop(api)
+        if sink is not None:
+            sink.shutdown()
+        log.close()
+
+    report = build_report(records, replayer.results, duration)
+    failed = [r["error"] for r in replayer.results if r.get("error")]
+    report.update({
+        "started_at": datetime.now().isoformat(),
+        "traces": args.traces,
+        "speed": args.speed,
+        "concurrency": args.concurrency,
+        "duration_s": round(duration, 2),
+        "connection_errors": len(failed),
+        "emails_received": len(sink.received) if sink is not None else None,
+        "cpu_count": os.cpu_count()
+    })
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"[✓] Replayed {len(records)} requests in {duration:.1f}s ({len(failed)} connection errors)")
+    if failed:
+        print(f"[!] First error: {failed[0]}")
+    if report["emails_received"] is not None:
+        print(f"[✓] Emails received by the sink: {report['emails_received']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[✓] Results written to {args.output}")
+    if api is not None:
+        print(f"[*] Server log: {log.name}")
+
+
+if __name__ == "__main__":
+    main()
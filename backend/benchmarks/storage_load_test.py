@@ -0,0 +1,229 @@
+"""
+Multi-worker load test for the client/server storage mode
+
+Starts a local Chroma server, then for each worker count starts the API
+with `uvicorn --workers N` in CHROMA_MODE=http and drives the assessment
+write path (create company -> submit full assessment) from several client
+processes. Reports throughput, latency and scaling efficiency per worker
+count.
+
+Usage:
+    python benchmarks/storage_load_test.py
+    python benchmarks/storage_load_test.py --workers 1 2 4 8 --clients 16 --duration 20
+    python benchmarks/storage_load_test.py --chroma-port 8000 --no-server --output load.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, timeout: float, process: Optional[subprocess.Popen] = None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process for {url} exited with code {process.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"{url} not ready after {timeout:g}s")
+
+
+def _stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def start_chroma_server(data_dir: str, port: int, log) -> subprocess.Popen:
+    """Equivalent of `chroma run --path data_dir --port port`"""
+    env = dict(os.environ, IS_PERSISTENT="True", PERSIST_DIRECTORY=data_dir, ANONYMIZED_TELEMETRY="False")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "chromadb.app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    _wait_for(f"http://127.0.0.1:{port}/api/v1/heartbeat", 60, process)
+    return process
+
+
+def start_api(workers: int, port: int, chroma_port: int, data_dir: str, log) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        CHROMA_MODE="http",
+        CHROMA_HOST="127.0.0.1",
+        CHROMA_PORT=str(chroma_port),
+        DATA_DIR=data_dir,
+        SCHEMA_RELOAD_INTERVAL="0"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=str(BACKEND_DIR), env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    _wait_for(f"http://127.0.0.1:{port}/api/health", 120, process)
+    return process
+
+
+# ==============================
+# LOAD CLIENT
+# ==============================
+
+def _build_responses(schema: Dict) -> Dict[str, List[Dict]]:
+    """A complete, valid set of answers (first non-default option everywhere)"""
+    responses = {}
+    for section, questions in schema["schema"].items():
+        answers = []
+        for q in questions:
+            options = q.get("options") or []
+            if q["question_type"] == "text" or not options:
+                answer = "Load test"
+            elif q["question_type"] == "multi_select":
+                answer = options[:2]
+            else:
+                answer = options[min(1, len(options) - 1)]
+            answers.append({"question_id": q["question_id"], "answer": answer})
+        responses[section] = answers
+    return responses
+
+
+def _client_loop(args) -> Dict:
+    """One load-generating process: run funnels back to back until the deadline"""
+    base_url, client_id, duration = args
+    session = requests.Session()
+    schema = session.get(f"{base_url}/api/questionnaire/schema", timeout=30).json()
+    responses = _build_responses(schema)
+
+    # The window starts after setup so slow process start-up does not eat into it
+    deadline = time.time() + duration
+    latencies: List[float] = []
+    errors = 0
+    n = 0
+    while time.time() < deadline:
+        company = {"company_name": f"Load {client_id}-{n}", "contact_email": f"load{client_id}.{n}@example.com"}
+        start = time.perf_counter()
+        try:
+            created = session.post(f"{base_url}/api/company/create", json=company, timeout=60)
+            created.raise_for_status()
+            submitted = session.post(f"{base_url}/api/assessment/submit", json={
+                "assessment_id": created.json()["assessment_id"],
+                "company_info": company,
+                "responses": responses,
+                "schema_version": schema.get("version")
+            }, timeout=60)
+            submitted.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except requests.RequestException:
+            errors += 1
+        n += 1
+    return {"latencies": latencies, "errors": errors}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_load(base_url: str, clients: int, duration: float) -> Dict:
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        results = pool.map(_client_loop, [(base_url, i, duration) for i in range(clients)])
+
+    latencies = [lat for result in results for lat in result["latencies"]]
+    return {
+        "funnels": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "throughput_per_s": round(len(latencies) / duration, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker load test against a local Chroma server")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="uvicorn worker counts to test")
+    parser.add_argument("--clients", type=int, default=0, help="Load-generating processes (default: 4 x max workers)")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds of load per worker count")
+    parser.add_argument("--chroma-port", type=int, default=0, help="Port of the Chroma server (default: pick a free one)")
+    parser.add_argument("--no-server", action="store_true", help="Use an already running Chroma server on --chroma-port")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.no_server and not args.chroma_port:
+        parser.error("--no-server requires --chroma-port")
+
+    clients = args.clients or 4 * max(args.workers)
+    cpu_count = os.cpu_count() or 1
+    if max(args.workers) + 1 > cpu_count:
+        # Workers, the Chroma server and the load clients all share these cores
+        print(f"[!] Only {cpu_count} CPU(s): scaling flattens beyond {max(cpu_count - 1, 1)} worker(s)")
+    work_dir = tempfile.mkdtemp(prefix="crma_load_")
+    log = open(Path(work_dir) / "servers.log", "wb")
+    chroma_port = args.chroma_port or _free_port()
+
+    chroma = None
+    if not args.no_server:
+        print(f"[*] Starting Chroma server on port {chroma_port} (data in {work_dir})...")
+        chroma = start_chroma_server(str(Path(work_dir) / "chroma"), chroma_port, log)
+
+    runs = []
+    try:
+        for workers in args.workers:
+            port = _free_port()
+            print(f"[*] {workers} worker(s): starting API on port {port}...")
+            api = start_api(workers, port, chroma_port, str(Path(work_dir) / "app"), log)
+            try:
+                result = run_load(f"http://127.0.0.1:{port}", clients, args.duration)
+            finally:
+                _stop(api)
+            result["workers"] = workers
+            runs.append(result)
+            print(f"    {result['throughput_per_s']:>8.2f} funnels/s  p50 {result['p50_ms']}ms  "
+                  f"p95 {result['p95_ms']}ms  errors {result['errors']}")
+    finally:
+        if chroma is not None:
+            _stop(chroma)
+        log.close()
+
+    baseline = runs[0]["throughput_per_s"] / runs[0]["workers"] if runs and runs[0]["throughput_per_s"] else 0
+    print("\nworkers  funnels/s  speedup  efficiency")
+    for run in runs:
+        speedup = run["throughput_per_s"] / baseline if baseline else 0
+        run["speedup"] = round(speedup, 2)
+        run["efficiency"] = round(speedup / run["workers"], 2)
+        print(f"{run['workers']:>7}  {run['throughput_per_s']:>9.2f}  {run['speedup']:>6.2f}x  {run['efficiency']:>9.0%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"clients": clients, "duration_s": args.duration, "cpu_count": cpu_count, "runs": runs}, f, indent=2)
+        print(f"\n[✓] Results written to {args.output}")
+    print(f"[*] Server logs: {log.name}")
+
+
+if __name__ == "__main__":
+    main()
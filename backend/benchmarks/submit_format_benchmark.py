@@ -0,0 +1,123 @@
+"""
+Submission wire-format benchmark
+
+Compares request size and server-side parse + validation time of the full
+AssessmentSubmit body (as older clients send it, with question text and
+type on every answer) against the compact {question_id: option index}
+format as JSON and MessagePack. Runs in-process against the active
+questionnaire schema; no server or storage round trips are involved.
+
+Usage:
+    python benchmarks/submit_format_benchmark.py
+    python benchmarks/submit_format_benchmark.py --iterations 20000 --output submit_formats.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+# Importing main opens storage; keep it away from real data
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="crma_bench_")
+sys.path.append(str(Path(__file__).parent.parent))
+
+import main
+from utils.wire_format import decode_body, encode_msgpack, JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+
+
+def build_payloads(version) -> Dict[str, Dict]:
+    """The same complete answer set in the full and compact shapes"""
+    full, answers = {}, {}
+    for section, questions in version.schema.items():
+        full[section] = []
+        for q in questions:
+            options = q.get("options") or []
+            if q["question_type"] == "multi_select":
+                indexes = list(range(min(2, len(options))))
+                label_answer, compact_answer = [options[i] for i in indexes], indexes
+            elif q["question_type"] == "single_select":
+                label_answer, compact_answer = options[-1], len(options) - 1
+            else:
+                label_answer = compact_answer = "Legacy NAS and two branch offices"
+            full[section].append({
+                "question_id": q["question_id"],
+                "section": section,
+                "question_text": q["question_text"],
+                "question_type": q["question_type"],
+                "answer": label_answer,
+                "comment": ""
+            })
+            answers[q["question_id"]] = compact_answer
+
+    company = {"company_name": "Benchmark Ltd", "contact_email": "ciso@example.com"}
+    return {
+        "full": {"assessment_id": "bench", "company_info": company, "responses": full},
+        "compact": {"assessment_id": "bench", "schema_version": version.version, "answers": answers}
+    }
+
+
+def _time(fn: Callable[[], object], iterations: int) -> float:
+    """Mean microseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Compare full vs compact submission formats")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    version = main.schema_registry.active
+    compiled = version.compiled
+    payloads = build_payloads(version)
+
+    bodies = {
+        "full_json": (json.dumps(payloads["full"]).encode("utf-8"), JSON_MEDIA_TYPE),
+        "compact_json": (json.dumps(payloads["compact"], separators=(",", ":")).encode("utf-8"), JSON_MEDIA_TYPE)
+    }
+    try:
+        bodies["compact_msgpack"] = (encode_msgpack(payloads["compact"]), MSGPACK_MEDIA_TYPE)
+    except RuntimeError as e:
+        print(f"[!] Skipping MessagePack: {e}")
+
+    def _full(body: bytes):
+        # What the /api/assessment/submit path does before storage: Pydantic, then option lookup
+        submission = main.AssessmentSubmit.model_validate_json(body)
+        for responses in submission.responses.values():
+            for response in responses:
+                compiled.encode_answer(response.question_id, response.answer)
+
+    def _compact(body: bytes, content_type: str):
+        payload = main._parse_compact_submission(decode_body(body, content_type))
+        compiled.compact_codes(payload["answers"])
+
+    print(f"[*] Schema {version.version}: {len(compiled.question_ids)} questions, {args.iterations} iterations")
+    results = []
+    for name, (body, content_type) in bodies.items():
+        fn = (lambda b=body: _full(b)) if name == "full_json" else (lambda b=body, c=content_type: _compact(b, c))
+        micros = _time(fn, args.iterations)
+        results.append({"format": name, "bytes": len(body), "parse_validate_us": round(micros, 1)})
+
+    baseline = results[0]
+    print(f"{'format':<18}{'bytes':>8}{'size':>8}{'µs/submit':>12}{'speedup':>9}")
+    for row in results:
+        row["size_ratio"] = round(row["bytes"] / baseline["bytes"], 3)
+        row["speedup"] = round(baseline["parse_validate_us"] / row["parse_validate_us"], 2)
+        print(f"{row['format']:<18}{row['bytes']:>8}{row['size_ratio']:>8.2f}{row['parse_validate_us']:>12.1f}{row['speedup']:>8.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"schema_version": version.version, "iterations": args.iterations, "results": results}, f, indent=2)
+        print(f"[✓] Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,50 @@
+"""
+Questionnaire Schema Compiler Script
+Compiles the assessment workbook into the question/scoring schema and
+caches the artifact by the workbook's content hash
+
+Usage:
+    python compile_schema.py
+    python compile_schema.py path/to/workbook.xlsx --output data/schemas/questionnaire.json
+    python compile_schema.py --force
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from questionnaire.schema_compiler import load_or_compile
+from config import BASE_DIR, SCHEMA_CACHE_DIR
+
+DEFAULT_WORKBOOK = BASE_DIR.parent / "assets" / "Cyber Resilience Maturity Assessment - New.xlsx"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the questionnaire workbook into a schema artifact")
+    parser.add_argument("workbook", nargs="?", default=str(DEFAULT_WORKBOOK))
+    parser.add_argument("--output", help="Also write the compiled artifact to this path")
+    parser.add_argument("--force", action="store_true", help="Recompile even if the cache is current")
+    args = parser.parse_args()
+
+    print(f"[*] Compiling {args.workbook}...")
+    artifact, compiled = load_or_compile(Path(args.workbook), SCHEMA_CACHE_DIR, force=args.force)
+    print(f"[✓] {'Compiled' if compiled else 'Cache hit'}: version {artifact['version']}")
+    print(f"    Questions: {artifact['question_count']}, Max score: {artifact['max_score']}")
+
+    for questions in artifact["schema"].values():
+        for q in questions:
+            print(f"    [{q['question_id']}] {q['question_type']:<13} {q['question_text'][:60]}...")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, indent=2, ensure_ascii=False)
+        print(f"[✓] Artifact written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -53,6 +53,36 @@ COLLECTIONS = {
     "assessments": "assessments_collection"
 }
 
+# ==============================
+# STORAGE BACKEND
+# ==============================
+# "persistent": embedded store under CHROMADB_PATH (one process only)
+# "http": shared Chroma server, e.g. `chroma run --path data/chromadb --port 8000`,
+#         required for `uvicorn --workers N` or several replicas
+CHROMA_MODE = os.getenv("CHROMA_MODE", "persistent").lower()
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+CHROMA_SSL = os.getenv("CHROMA_SSL", "false").lower() == "true"
+# Keep-alive connections per process; size it to the threadpool handling requests
+CHROMA_POOL_SIZE = int(os.getenv("CHROMA_POOL_SIZE", "32"))
+CHROMA_MAX_RETRIES = int(os.getenv("CHROMA_MAX_RETRIES", "3"))
+CHROMA_RETRY_BACKOFF = float(os.getenv("CHROMA_RETRY_BACKOFF", "0.2"))
+CHROMA_REQUEST_TIMEOUT = float(os.getenv("CHROMA_REQUEST_TIMEOUT", "30"))
+# How long startup waits for the server to answer a heartbeat
+CHROMA_STARTUP_TIMEOUT = float(os.getenv("CHROMA_STARTUP_TIMEOUT", "30"))
+# Companies, assessments and responses are hash-routed over this many stores
+# (directories chromadb, chromadb_shard1, ... or suffixed collections in http mode).
+# Run rebalance_shards.py before changing it on existing data.
+CHROMA_SHARDS = int(os.getenv("CHROMA_SHARDS", "1"))
+
+# ==============================
+# SECONDARY INDEXES & LISTING
+# ==============================
+# SQLite sidecar with sortable/filterable columns (rebuildable from ChromaDB)
+INDEX_DB_PATH = Path(os.getenv("INDEX_DB_PATH", DATA_DIR / "index.db"))
+LIST_DEFAULT_PAGE_SIZE = int(os.getenv("LIST_DEFAULT_PAGE_SIZE", "50"))
+LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", "500"))
+
 # ==============================
 # COMPANY SIZE OPTIONS
 # ==============================
@@ -83,6 +113,48 @@ INDUSTRIES = [
     "Other"
 ]
 
+# ==============================
+# STATES (company location, offered by /api/config)
+# ==============================
+STATES = [
+    "Andhra Pradesh",
+    "Arunachal Pradesh",
+    "Assam",
+    "Bihar",
+    "Chhattisgarh",
+    "Goa",
+    "Gujarat",
+    "Haryana",
+    "Himachal Pradesh",
+    "Jharkhand",
+    "Karnataka",
+    "Kerala",
+    "Madhya Pradesh",
+    "Maharashtra",
+    "Manipur",
+    "Meghalaya",
+    "Mizoram",
+    "Nagaland",
+    "Odisha",
+    "Punjab",
+    "Rajasthan",
+    "Sikkim",
+    "Tamil Nadu",
+    "Telangana",
+    "Tripura",
+    "Uttar Pradesh",
+    "Uttarakhand",
+    "West Bengal",
+    "Andaman and Nicobar Islands",
+    "Chandigarh",
+    "Dadra and Nagar Haveli and Daman and Diu",
+    "Delhi",
+    "Jammu and Kashmir",
+    "Ladakh",
+    "Lakshadweep",
+    "Puducherry"
+]
+
 # ==============================
 # REGIONS/COUNTRIES
 # ==============================
@@ -149,6 +221,127 @@ AI_CONFIG = {
     }
 }
 
+# ==============================
+# PDF REPORTS
+# ==============================
+REPORTS_DIR = DATA_DIR / "reports"
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+# Rendered PDFs are evicted least recently used beyond this size, and once older than the max age
+REPORT_CACHE_MAX_MB = float(os.getenv("REPORT_CACHE_MAX_MB", "500"))
+REPORT_CACHE_MAX_AGE_SECONDS = int(os.getenv("REPORT_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+# Attach the cached PDF scorecard to report emails unless the request overrides it
+EMAIL_ATTACH_PDF = os.getenv("EMAIL_ATTACH_PDF", "false").lower() == "true"
+
+# ==============================
+# QUESTIONNAIRE SCHEMA
+# ==============================
+# Optional workbook (.xlsx) or compiled artifact (.json) to serve instead of
+# the built-in questionnaire_schema.py
+QUESTIONNAIRE_WORKBOOK = os.getenv("QUESTIONNAIRE_WORKBOOK", "")
+SCHEMA_CACHE_DIR = DATA_DIR / "schema_cache"
+# Drop a workbook or artifact here to roll out a new questionnaire version;
+# the newest file wins and is picked up without a restart
+SCHEMA_DIR = Path(os.getenv("SCHEMA_DIR", DATA_DIR / "schemas"))
+# Seconds between checks for a changed schema source (0 disables watching)
+SCHEMA_RELOAD_INTERVAL = float(os.getenv("SCHEMA_RELOAD_INTERVAL", "5"))
+# Store select answers that match no option verbatim (counted in app_unmatched_answers_total)
+# instead of rejecting the submission with 422; only for clients still sending free-form labels
+KEEP_UNMATCHED_ANSWERS = os.getenv("KEEP_UNMATCHED_ANSWERS", "false").lower() == "true"
+
+# ==============================
+# ADMIN & BULK EXPORT
+# ==============================
+# Admin endpoints are disabled unless a token is configured
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+# ==============================
+# BULK IMPORT
+# ==============================
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# Per-row errors kept in the API response; counts are always complete
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+
+# ==============================
+# DRAFTS (AUTOSAVE)
+# ==============================
+# Drafts idle for longer than this are discarded (0 keeps them forever)
+DRAFT_TTL_SECONDS = float(os.getenv("DRAFT_TTL_SECONDS", str(7 * 24 * 3600)))
+# Least recently used drafts beyond this spill to disk (or are dropped without a spill dir)
+DRAFT_MAX_IN_MEMORY = int(os.getenv("DRAFT_MAX_IN_MEMORY", "10000"))
+# Set DRAFT_SPILL_DIR= (empty) to keep drafts in memory only
+_draft_spill_dir = os.getenv("DRAFT_SPILL_DIR", str(DATA_DIR / "drafts"))
+DRAFT_SPILL_DIR = Path(_draft_spill_dir) if _draft_spill_dir else None
+DRAFT_SWEEP_INTERVAL = float(os.getenv("DRAFT_SWEEP_INTERVAL", "300"))
+# "memory": per-process LRU (single worker); "sqlite": DRAFT_DB_PATH, shared by every
+# worker, the default in CHROMA_MODE=http
+DRAFT_STORAGE = os.getenv("DRAFT_STORAGE", "sqlite" if CHROMA_MODE == "http" else "memory").lower()
+DRAFT_DB_PATH = Path(os.getenv("DRAFT_DB_PATH", DATA_DIR / "drafts.db"))
+
+# ==============================
+# COMPANY IDENTITY
+# ==============================
+# Reuse the company_id of an earlier registration with the same normalized name and
+# email domain (free-mail domains only by name, on confirmation), so repeat assessments form one history
+COMPANY_IDENTITY_RESOLUTION = os.getenv("COMPANY_IDENTITY_RESOLUTION", "true").lower() == "true"
+
+# ==============================
+# PEER STATISTICS
+# ==============================
+# Seconds between rebuilds of the questionnaire's "X% of your industry chose this" snapshot
+PEER_STATS_REFRESH_INTERVAL = float(os.getenv("PEER_STATS_REFRESH_INTERVAL", "60"))
+# Industries with fewer completed assessments are shown figures for all organisations
+PEER_STATS_MIN_COHORT = int(os.getenv("PEER_STATS_MIN_COHORT", "5"))
+
+# ==============================
+# METRICS
+# ==============================
+# Request/operation metrics middleware and the Prometheus /metrics endpoint
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# ==============================
+# TRACING
+# ==============================
+# Spans per sampled request around storage, scoring and email (see utils/tracing.py)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+# Fraction of requests traced; an incoming W3C traceparent header decides for its caller
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "0.1"))
+# OTLP/JSON lines, one export batch per line; set TRACING_EXPORT_FILE= (empty) to disable
+_tracing_export_file = os.getenv("TRACING_EXPORT_FILE", str(DATA_DIR / "traces" / "spans.jsonl"))
+TRACING_EXPORT_FILE = Path(_tracing_export_file) if _tracing_export_file else None
+# OTLP/HTTP collector endpoint, e.g. http://localhost:4318/v1/traces
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "cyber-resilience-api")
+# Response header carrying the trace id of sampled requests
+TRACING_RESPONSE_HEADER = os.getenv("TRACING_RESPONSE_HEADER", "X-Trace-Id")
+# Traces kept in memory per process for /api/admin/traces
+TRACING_RECENT_TRACES = int(os.getenv("TRACING_RECENT_TRACES", "1000"))
+
+# ==============================
+# TRAFFIC CAPTURE
+# ==============================
+# Anonymized request traces (one JSONL file per worker) for benchmarks/replay_traffic.py
+TRAFFIC_CAPTURE_ENABLED = os.getenv("TRAFFIC_CAPTURE_ENABLED", "false").lower() == "true"
+TRAFFIC_CAPTURE_DIR = Path(os.getenv("TRAFFIC_CAPTURE_DIR", str(DATA_DIR / "traffic")))
+# Fraction of requests recorded
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "1.0"))
+# Key for hashing emails and names; set it so all workers (and restarts) hash alike.
+# Empty picks a random key per process.
+TRAFFIC_CAPTURE_SALT = os.getenv("TRAFFIC_CAPTURE_SALT", "")
+# Larger bodies are recorded by size only
+TRAFFIC_CAPTURE_MAX_BODY = int(os.getenv("TRAFFIC_CAPTURE_MAX_BODY", str(256 * 1024)))
+# Start a new file after this many megabytes
+TRAFFIC_CAPTURE_ROTATE_MB = float(os.getenv("TRAFFIC_CAPTURE_ROTATE_MB", "100"))
+
+# ==============================
+# PROFILING (ADMIN)
+# ==============================
+# Upper bound for one sampling session, in seconds
+PROFILER_MAX_DURATION = float(os.getenv("PROFILER_MAX_DURATION", "300"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+# Stack depth tracemalloc records per allocation (more frames, more overhead)
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "25"))
+
 # ==============================
 # SESSION STATE KEYS
 # ==============================
@@ -0,0 +1,143 @@
+"""
+ChromaDB Client Factory
+Builds the embedded (persistent) or client/server (http) ChromaDB client
+selected by CHROMA_MODE, with pooled keep-alive connections, retries and
+a startup health check for the server mode
+"""
+
+import time
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import chromadb
+from chromadb.config import Settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import (
+    CHROMADB_PATH,
+    CHROMA_MODE,
+    CHROMA_HOST,
+    CHROMA_PORT,
+    CHROMA_SSL,
+    CHROMA_POOL_SIZE,
+    CHROMA_MAX_RETRIES,
+    CHROMA_RETRY_BACKOFF,
+    CHROMA_REQUEST_TIMEOUT,
+    CHROMA_STARTUP_TIMEOUT
+)
+
+CHROMA_MODES = ("persistent", "http")
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with a default timeout (chromadb never passes one)"""
+
+    def __init__(self, timeout: float, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _retry_policy() -> Retry:
+    # Chroma routes reads through POST (/get, /query), so POST must be retried too.
+    # Writes are safe to replay: ids are generated client-side and re-adding an
+    # existing id is a no-op on the server.
+    return Retry(
+        total=CHROMA_MAX_RETRIES,
+        connect=CHROMA_MAX_RETRIES,
+        read=CHROMA_MAX_RETRIES,
+        status=CHROMA_MAX_RETRIES,
+        backoff_factor=CHROMA_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        raise_on_status=False
+    )
+
+
+def _configure_session(client) -> None:
+    """Mount a pooled, retrying adapter on the HTTP client's requests session"""
+    server = getattr(client, "_server", None)
+    session = getattr(server, "_session", None)
+    if session is None:
+        print("[!] ChromaDB HTTP session not found; using default connection handling")
+        return
+
+    adapter = PooledAdapter(
+        timeout=CHROMA_REQUEST_TIMEOUT,
+        pool_connections=1,
+        pool_maxsize=CHROMA_POOL_SIZE,
+        pool_block=False,
+        max_retries=_retry_policy()
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+def _connect_http():
+    """Connect to the Chroma server, waiting up to CHROMA_STARTUP_TIMEOUT for it to come up"""
+    deadline = time.monotonic() + CHROMA_STARTUP_TIMEOUT
+    delay = 0.25
+    while True:
+        try:
+            # HttpClient validates tenant/database on construction, so this is the first health check
+            client = chromadb.HttpClient(
+                host=CHROMA_HOST,
+                port=str(CHROMA_PORT),
+                ssl=CHROMA_SSL,
+                settings=Settings(anonymized_telemetry=False, allow_reset=True)
+            )
+            _configure_session(client)
+            client.heartbeat()
+            return client
+        except Exception as e:
+            if time.monotonic() >= deadline:
+                raise ConnectionError(
+                    f"ChromaDB server at {CHROMA_HOST}:{CHROMA_PORT} not reachable after {CHROMA_STARTUP_TIMEOUT:g}s: {e}"
+                )
+            print(f"[*] Waiting for ChromaDB server at {CHROMA_HOST}:{CHROMA_PORT} ({e.__class__.__name__})...")
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+
+
+def create_client(mode: str = CHROMA_MODE, path: Optional[Path] = None):
+    """
+    Create the ChromaDB client for the configured storage mode
+
+    Args:
+        mode: "persistent" (embedded, single process) or "http" (shared server)
+        path: Store directory for persistent mode (defaults to CHROMADB_PATH)
+    """
+    if mode not in CHROMA_MODES:
+        raise ValueError(f"Unknown CHROMA_MODE '{mode}'. Use one of: {', '.join(CHROMA_MODES)}")
+
+    if mode == "http":
+        return _connect_http()
+
+    return chromadb.PersistentClient(
+        path=str(path or CHROMADB_PATH),
+        settings=Settings(
+            anonymized_telemetry=False,
+            allow_reset=True
+        )
+    )
+
+
+def check_health(client, mode: str = CHROMA_MODE) -> Dict:
+    """Heartbeat the storage backend and report its round-trip latency"""
+    start = time.perf_counter()
+    try:
+        client.heartbeat()
+    except Exception as e:
+        return {"status": "unavailable", "mode": mode, "error": str(e)}
+    return {
+        "status": "ok",
+        "mode": mode,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
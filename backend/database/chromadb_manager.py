@@ -1,63 +1,139 @@
 """
 ChromaDB Manager - Handles all database operations for the questionnaire
 Implements collections for companies, questions, responses, and assessments
+
+Sortable/filterable columns are mirrored into a SQLite index (index_store)
+so listings page by cursor and time ranges are answered from numeric epoch
+columns instead of reading whole collections. Timestamps are also stored
+as epoch seconds (*_ts) in ChromaDB metadata, where $gte/$lt work.
+
+With CHROMA_SHARDS > 1, companies are routed by company_id and assessments
+and their responses by assessment_id to one of N stores; queries that are
+not keyed by a routing id fan out across all shards and merge.
 """
 
-import chromadb
-from chromadb.config import Settings
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
-import json
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from pathlib import Path
 import sys
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
-from config import CHROMADB_PATH, COLLECTIONS
+from config import COLLECTIONS, EXPORT_BATCH_SIZE, CHROMA_MODE, CHROMA_SHARDS, LIST_DEFAULT_PAGE_SIZE, LIST_MAX_PAGE_SIZE
+from .chroma_client import create_client, check_health
+from .sharding import StorageShard, shard_for, shard_path
+from .index_store import IndexStore, COMPANY_COLUMNS, ASSESSMENT_COLUMNS, to_epoch
+from utils.json_codec import dumps, loads
+from utils.metrics import timed_methods
+from utils.company_search import search as company_search, MAX_CANDIDATES as MAX_SEARCH_CANDIDATES
+from utils.company_identity import normalize_name
+
+# Fields a listing can project; anything outside the index columns is read from the documents
+COMPANY_LIST_FIELDS = [
+    "company_id", "created_at", "company_name", "contact_email", "contact_name", "designation",
+    "current_backup_solution", "industry", "company_size", "state", "additional_notes"
+]
+ASSESSMENT_LIST_FIELDS = [
+    "assessment_id", "company_id", "status", "created_at", "completed_at", "updated_at",
+    "completed_sections", "schema_version", "source"
+]
 
 
+def _metadata_answer(code: Any) -> Any:
+    """Metadata values must be scalars: option codes stay ints, anything else is a string"""
+    if isinstance(code, int) and not isinstance(code, bool):
+        return code
+    if isinstance(code, list):
+        return dumps(code)
+    return str(code)
+
+
+@timed_methods("chromadb")
 class ChromaDBManager:
     """
     Manages all ChromaDB operations for the Cyber Resilience Assessment application
     """
     
-    def __init__(self):
-        """Initialize ChromaDB client and create necessary collections"""
-        self.client = chromadb.PersistentClient(
-            path=str(CHROMADB_PATH),
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
-        )
+    def __init__(self, mode: str = CHROMA_MODE, shard_count: int = CHROMA_SHARDS):
+        """
+        Initialize ChromaDB client and create necessary collections
+        
+        Args:
+            mode: "persistent" (embedded) or "http" (shared Chroma server, multi-worker safe)
+            shard_count: Number of stores companies/assessments/responses are spread over
+        """
+        self.mode = mode
+        self.shard_count = max(1, shard_count)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        if mode == "http":
+            # One server: shards are separate collections behind the same pooled client
+            shared_client = create_client(mode)
+            clients = [shared_client] * self.shard_count
+        else:
+            clients = [create_client(mode, shard_path(i)) for i in range(self.shard_count)]
+        
+        # Shard 0 is the original store and also holds the questions
+        self.client = clients[0]
+        self.shards = [StorageShard(i, client, mode) for i, client in enumerate(clients)]
         self._initialize_collections()
+        
+        self.index = IndexStore()
+        if self.index.is_empty() and any(shard.assessments.count() or shard.companies.count() for shard in self.shards):
+            # First start on existing data: populate the listing index once
+            print("[*] Building listing index from existing data...")
+            self.rebuild_index()
     
     def _initialize_collections(self):
         """Create or get existing collections"""
-        # Companies collection
-        self.companies = self.client.get_or_create_collection(
-            name=COLLECTIONS["companies"],
-            metadata={"description": "Stores company information"}
-        )
+        for shard in self.shards:
+            shard.initialize_collections()
         
         # Questions collection
         self.questions = self.client.get_or_create_collection(
             name=COLLECTIONS["questions"],
             metadata={"description": "Stores questionnaire questions"}
         )
-        
-        # Responses collection
-        self.responses = self.client.get_or_create_collection(
-            name=COLLECTIONS["responses"],
-            metadata={"description": "Stores user responses"}
-        )
-        
-        # Assessments collection
-        self.assessments = self.client.get_or_create_collection(
-            name=COLLECTIONS["assessments"],
-            metadata={"description": "Stores complete assessments"}
-        )
+    
+    # ==============================
+    # SHARD ROUTING
+    # ==============================
+    
+    def _shard(self, routing_key: str) -> StorageShard:
+        return self.shards[shard_for(routing_key, self.shard_count)]
+    
+    def _group_by_shard(self, routing_keys: List[str]) -> Dict[int, List[int]]:
+        """Positions of routing_keys grouped by the shard they belong to"""
+        groups: Dict[int, List[int]] = {}
+        for position, key in enumerate(routing_keys):
+            groups.setdefault(shard_for(key, self.shard_count), []).append(position)
+        return groups
+    
+    def _parallel(self, fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        """Run fn over items, concurrently when more than one shard is involved"""
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.shard_count, thread_name_prefix="chroma-shard")
+        return list(self._executor.map(fn, items))
+    
+    def _fan_out(self, fn: Callable[[StorageShard], Any]) -> List[Any]:
+        """Run fn on every shard and return the per-shard results in shard order"""
+        return self._parallel(fn, self.shards)
+    
+    def _add_routed(self, collection: str, ids: List[str], documents: List[str],
+                    metadatas: List[Dict], routing_keys: List[str]):
+        """Add records to the shards their routing keys hash to (one write per shard)"""
+        def _write(group):
+            index, positions = group
+            getattr(self.shards[index], collection).add(
+                ids=[ids[i] for i in positions],
+                documents=[documents[i] for i in positions],
+                metadatas=[metadatas[i] for i in positions]
+            )
+        self._parallel(_write, list(self._group_by_shard(routing_keys).items()))
     
     # ==============================
     # COMPANY OPERATIONS
@@ -73,54 +149,72 @@ class ChromaDBManager:
         Returns:
             company_id: Unique identifier for the company
         """
-        company_id = str(uuid.uuid4())
+        return self.add_companies([company_data])[0]
+    
+    def add_companies(self, companies: List[Dict], ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Add several companies in a single round trip
+        
+        Args:
+            companies: Company dicts; created_at defaults to now
+            ids: Company ids to use instead of random ones (e.g. reproducible generated data)
+        """
+        if not companies:
+            return []
         
-        self.companies.add(
-            ids=[company_id],
-            documents=[json.dumps(company_data)],
+        company_ids = list(ids) if ids else [str(uuid.uuid4()) for _ in companies]
+        now = datetime.now().isoformat()
+        created = [company_data.get("created_at") or now for company_data in companies]
+        
+        self._add_routed(
+            "companies",
+            ids=company_ids,
+            documents=[dumps(company_data) for company_data in companies],
             metadatas=[{
                 "company_name": company_data.get("company_name", ""),
                 "industry": company_data.get("industry", ""),
                 "company_size": company_data.get("company_size", ""),
                 "region": company_data.get("region", ""),
-                "created_at": datetime.now().isoformat()
-            }]
+                "created_at": created_at
+            } for company_data, created_at in zip(companies, created)],
+            routing_keys=company_ids
         )
+        self._index_write(self.index.upsert_companies, [
+            dict(company_data, company_id=company_id, created_at=created_at)
+            for company_id, company_data, created_at in zip(company_ids, companies, created)
+        ])
         
-        return company_id
+        return company_ids
     
     def get_company(self, company_id: str) -> Optional[Dict]:
         """Retrieve company information by ID"""
         try:
-            result = self.companies.get(ids=[company_id])
+            result = self._shard(company_id).companies.get(ids=[company_id])
             if result and result['documents']:
-                return json.loads(result['documents'][0])
+                return loads(result['documents'][0])
             return None
         except Exception as e:
             print(f"Error retrieving company: {e}")
             return None
     
-    def search_companies(self, company_name: str = None, industry: str = None) -> List[Dict]:
-        """Search companies by name or industry"""
-        where_filter = {}
-        
-        if company_name:
-            where_filter["company_name"] = company_name
-        if industry:
-            where_filter["industry"] = industry
+    def search_companies(self, company_name: str = None, industry: str = None,
+                         limit: int = LIST_DEFAULT_PAGE_SIZE) -> List[Dict]:
+        """
+        Search companies by name or industry
         
+        The name is matched fuzzily against company names and contact email
+        domains through the index (see utils/company_search.py), best match
+        first; without one, the first companies (of the industry) are listed.
+        """
         try:
-            if where_filter:
-                results = self.companies.get(where=where_filter)
+            if company_name:
+                items = company_search(self, company_name, min(limit, MAX_SEARCH_CANDIDATES))["items"]
+                company_ids = [item["company_id"] for item in items if not industry or item["industry"] == industry]
             else:
-                results = self.companies.get()
-            
-            companies = []
-            if results and results['documents']:
-                for doc in results['documents']:
-                    companies.append(json.loads(doc))
-            
-            return companies
+                rows, _ = self.index.page_companies(min(limit, LIST_MAX_PAGE_SIZE), industry=industry)
+                company_ids = [row["company_id"] for row in rows]
+            documents = self.get_companies(company_ids)
+            return [documents[company_id] for company_id in company_ids if company_id in documents]
         except Exception as e:
             print(f"Error searching companies: {e}")
             return []
@@ -140,12 +234,44 @@ class ChromaDBManager:
                 "section": question_data.get("section", ""),
                 "question_type": question_data.get("question_type", ""),
                 "order": str(question_data.get("order", 0)),
-                "required": str(question_data.get("required", True))
+                "required": str(question_data.get("required", True)),
+                "schema_version": question_data.get("schema_version", "")
             }]
         )
         
         return question_id
     
+    def replace_questions(self, questions: List[Dict], schema_version: str):
+        """
+        Make the questions collection hold exactly one schema version
+        
+        Idempotent, so several workers may run it concurrently at startup:
+        ids are derived from (version, section, order) and written with
+        upsert, then questions from any other version are deleted.
+        """
+        ids = [
+            f"{schema_version}:{q.get('section', '')}:{q.get('order', 0)}"
+            for q in questions
+        ]
+        if questions:
+            self.questions.upsert(
+                ids=ids,
+                documents=[q.get("question_text", "") for q in questions],
+                metadatas=[{
+                    "section": q.get("section", ""),
+                    "question_type": q.get("question_type", ""),
+                    "order": str(q.get("order", 0)),
+                    "required": str(q.get("required", True)),
+                    "schema_version": schema_version
+                } for q in questions]
+            )
+        
+        current = set(ids)
+        existing = self.questions.get(include=[])
+        stale = [qid for qid in existing["ids"] if qid not in current] if existing else []
+        if stale:
+            self.questions.delete(ids=stale)
+    
     def get_questions_by_section(self, section: str) -> List[Dict]:
         """Get all questions for a specific section"""
         try:
@@ -196,33 +322,84 @@ class ChromaDBManager:
     
     def add_response(self, response_data: Dict) -> str:
         """Add a user response to a question"""
-        response_id = str(uuid.uuid4())
+        return self.add_responses([response_data])[0]
+    
+    @staticmethod
+    def _compact_response(response_data: Dict) -> str:
+        # Question text, type and section are resolved from the schema on read
+        # (CompiledSchema.expand_response), so only the id, code and comment are kept
+        record = {"q": response_data.get("question_id", ""), "a": response_data.get("answer", "")}
+        if response_data.get("comment"):
+            record["c"] = response_data["comment"]
+        return dumps(record)
+    
+    @staticmethod
+    def _read_response(doc: str, metadata: Optional[Dict]) -> Dict:
+        response = loads(doc)
+        if "q" not in response:
+            return response  # written before compact records: full legacy document
+        return {
+            "assessment_id": (metadata or {}).get("assessment_id", ""),
+            "question_id": response["q"],
+            "answer": response.get("a", ""),
+            "comment": response.get("c", "")
+        }
+    
+    def add_responses(self, responses: List[Dict]) -> List[str]:
+        """
+        Add several responses in a single round trip
+        
+        Args:
+            responses: Dicts with assessment_id, question_id, answer (the
+                       CompiledSchema.encode_answer() code) and optional
+                       comment; section is only used for the time index
+        """
+        if not responses:
+            return []
         
-        self.responses.add(
-            ids=[response_id],
-            documents=[json.dumps(response_data)],
+        response_ids = [str(uuid.uuid4()) for _ in responses]
+        timestamp = datetime.now().isoformat()
+        
+        # Responses live on their assessment's shard
+        self._add_routed(
+            "responses",
+            ids=response_ids,
+            documents=[self._compact_response(response_data) for response_data in responses],
             metadatas=[{
                 "assessment_id": response_data.get("assessment_id", ""),
                 "question_id": response_data.get("question_id", ""),
-                "section": response_data.get("section", ""),
-                "answer": str(response_data.get("answer", "")),
-                "timestamp": datetime.now().isoformat()
-            }]
+                "answer": _metadata_answer(response_data.get("answer", "")),
+                "timestamp": timestamp,
+                "timestamp_ts": to_epoch(timestamp)
+            } for response_data in responses],
+            routing_keys=[response_data.get("assessment_id", "") for response_data in responses]
         )
+        self._index_write(self.index.upsert_responses, [
+            dict(response_data, response_id=response_id, timestamp=timestamp,
+                 answer=_metadata_answer(response_data.get("answer", "")))
+            for response_id, response_data in zip(response_ids, responses)
+        ])
         
-        return response_id
+        return response_ids
     
     def get_responses_by_assessment(self, assessment_id: str) -> List[Dict]:
-        """Get all responses for a specific assessment"""
+        """
+        Get all responses for a specific assessment
+        
+        Returns:
+            Dicts with assessment_id, question_id, answer code and comment;
+            expand them with the assessment's CompiledSchema.expand_response()
+        """
         try:
-            results = self.responses.get(
-                where={"assessment_id": assessment_id}
+            results = self._shard(assessment_id).responses.get(
+                where={"assessment_id": assessment_id},
+                include=["documents", "metadatas"]
             )
             
             responses = []
             if results and results['documents']:
-                for doc in results['documents']:
-                    responses.append(json.loads(doc))
+                for doc, metadata in zip(results['documents'], results['metadatas']):
+                    responses.append(self._read_response(doc, metadata))
             
             return responses
             
@@ -234,38 +411,93 @@ class ChromaDBManager:
     # ASSESSMENT OPERATIONS
     # ==============================
     
-    def create_assessment(self, company_id: str) -> str:
-        """Create a new assessment for a company"""
-        assessment_id = str(uuid.uuid4())
+    def create_assessment(self, company_id: str, schema_version: str = None, registration: Dict = None) -> str:
+        """
+        Create a new assessment for a company, pinned to a questionnaire version
         
-        assessment_data = {
-            "assessment_id": assessment_id,
-            "company_id": company_id,
-            "created_at": datetime.now().isoformat(),
-            "status": "in_progress",
-            "completed_sections": []
-        }
+        Args:
+            registration: Company details as entered for this assessment (a
+                          returning company's contact may differ from the
+                          stored company's)
+        """
+        return self.create_assessments([
+            {"company_id": company_id, "schema_version": schema_version, "registration": registration}
+        ])[0]
+    
+    def create_assessments(self, assessments: List[Dict], ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Create several assessments in a single round trip
         
-        self.assessments.add(
-            ids=[assessment_id],
-            documents=[json.dumps(assessment_data)],
-            metadatas=[{
-                "company_id": company_id,
-                "status": "in_progress",
-                "created_at": datetime.now().isoformat()
-            }]
+        Args:
+            assessments: Dicts with company_id and optionally status,
+                         completed_sections, created_at, completed_at
+                         (used when importing already-completed assessments)
+                         schema_version (the questionnaire version the
+                         assessment is scored against) and registration
+                         (company details as entered for it)
+            ids: Assessment ids to use instead of random ones
+        """
+        if not assessments:
+            return []
+        
+        assessment_ids = list(ids) if ids else [str(uuid.uuid4()) for _ in assessments]
+        now = datetime.now().isoformat()
+        documents = []
+        metadatas = []
+        index_rows = []
+        
+        for assessment_id, assessment in zip(assessment_ids, assessments):
+            status = assessment.get("status", "in_progress")
+            created_at = assessment.get("created_at") or now
+            
+            assessment_data = {
+                "assessment_id": assessment_id,
+                "company_id": assessment["company_id"],
+                "created_at": created_at,
+                "status": status,
+                "completed_sections": assessment.get("completed_sections", [])
+            }
+            if status == "completed":
+                assessment_data["completed_at"] = assessment.get("completed_at") or now
+            if assessment.get("source"):
+                assessment_data["source"] = assessment["source"]
+            if assessment.get("schema_version"):
+                assessment_data["schema_version"] = assessment["schema_version"]
+            if assessment.get("registration"):
+                assessment_data["registration"] = assessment["registration"]
+            
+            documents.append(dumps(assessment_data))
+            index_rows.append(assessment_data)
+            metadata = {
+                "company_id": assessment["company_id"],
+                "status": status,
+                "created_at": created_at,
+                "created_ts": to_epoch(created_at)
+            }
+            if "completed_at" in assessment_data:
+                metadata["completed_ts"] = to_epoch(assessment_data["completed_at"])
+            metadatas.append(metadata)
+        
+        self._add_routed(
+            "assessments",
+            ids=assessment_ids,
+            documents=documents,
+            metadatas=metadatas,
+            routing_keys=assessment_ids
         )
+        self._index_write(self.index.upsert_assessments, index_rows)
         
-        return assessment_id
+        return assessment_ids
     
     def update_assessment_status(self, assessment_id: str, status: str, completed_sections: List[str] = None):
         """Update assessment status and completed sections"""
         try:
             # Get current assessment
-            result = self.assessments.get(ids=[assessment_id])
+            assessments = self._shard(assessment_id).assessments
+            result = assessments.get(ids=[assessment_id])
             
             if result and result['documents']:
-                assessment_data = json.loads(result['documents'][0])
+                assessment_data = loads(result['documents'][0])
                 assessment_data['status'] = status
                 assessment_data['updated_at'] = datetime.now().isoformat()
                 
@@ -275,16 +507,21 @@ class ChromaDBManager:
                 if status == "completed":
                     assessment_data['completed_at'] = datetime.now().isoformat()
                 
-                # Update the assessment
-                self.assessments.update(
+                metadata = {
+                    "company_id": assessment_data.get("company_id", ""),
+                    "status": status,
+                    "updated_at": datetime.now().isoformat()
+                }
+                if assessment_data.get("completed_at"):
+                    metadata["completed_ts"] = to_epoch(assessment_data["completed_at"])
+                
+                # Update the assessment (ChromaDB merges metadata keys)
+                assessments.update(
                     ids=[assessment_id],
-                    documents=[json.dumps(assessment_data)],
-                    metadatas=[{
-                        "company_id": assessment_data.get("company_id", ""),
-                        "status": status,
-                        "updated_at": datetime.now().isoformat()
-                    }]
+                    documents=[dumps(assessment_data)],
+                    metadatas=[metadata]
                 )
+                self._index_write(self.index.update_assessment_status, assessment_id, status, assessment_data.get("completed_at"))
                 
         except Exception as e:
             print(f"Error updating assessment: {e}")
@@ -292,32 +529,120 @@ class ChromaDBManager:
     def get_assessment(self, assessment_id: str) -> Optional[Dict]:
         """Retrieve assessment by ID"""
         try:
-            result = self.assessments.get(ids=[assessment_id])
+            result = self._shard(assessment_id).assessments.get(ids=[assessment_id])
             if result and result['documents']:
-                return json.loads(result['documents'][0])
+                return loads(result['documents'][0])
             return None
         except Exception as e:
             print(f"Error retrieving assessment: {e}")
             return None
     
     def get_company_assessments(self, company_id: str) -> List[Dict]:
-        """Get all assessments for a company"""
+        """Get all assessments for a company (fans out: assessments are routed by assessment_id)"""
         try:
-            results = self.assessments.get(
+            per_shard = self._fan_out(lambda shard: shard.assessments.get(
                 where={"company_id": company_id}
-            )
+            ))
             
             assessments = []
-            if results and results['documents']:
-                for doc in results['documents']:
-                    assessments.append(json.loads(doc))
+            for results in per_shard:
+                if results and results['documents']:
+                    for doc in results['documents']:
+                        assessments.append(loads(doc))
             
+            assessments.sort(key=lambda a: a.get("created_at", ""))
             return assessments
             
         except Exception as e:
             print(f"Error retrieving company assessments: {e}")
             return []
     
+    # ==============================
+    # BULK READ OPERATIONS
+    # ==============================
+    
+    def iter_assessments(self, status: str = None, batch_size: int = EXPORT_BATCH_SIZE,
+                         completed_from: Any = None, completed_to: Any = None) -> Iterator[List[Dict]]:
+        """
+        Page through assessments in fixed-size chunks
+        
+        Pages follow a keyset cursor over the index (creation order, or
+        completion order for a window), so each page is one indexed query
+        plus a document fetch, and assessments written while paging are
+        neither skipped nor returned twice.
+        
+        Args:
+            status: Optional status filter (e.g. "completed")
+            batch_size: Number of assessments fetched per round trip
+            completed_from, completed_to: Optional completion window [from, to);
+                a monthly export reads only that month's documents
+            
+        Yields:
+            Lists of assessment dicts, never more than batch_size long
+        """
+        windowed = completed_from is not None or completed_to is not None
+        cursor = None
+        while True:
+            if windowed:
+                rows, cursor = self.index.page_assessments_between(
+                    "completed", to_epoch(completed_from), to_epoch(completed_to), batch_size, cursor, status=status
+                )
+            else:
+                rows, cursor = self.index.page_assessments(batch_size, cursor, status=status)
+            if rows:
+                documents = self.get_assessments([row["assessment_id"] for row in rows])
+                yield [documents[row["assessment_id"]] for row in rows if row["assessment_id"] in documents]
+            if not cursor:
+                return
+    
+    def get_companies(self, company_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch several companies in one round trip, keyed by company_id"""
+        if not company_ids:
+            return {}
+        
+        try:
+            unique_ids = list(set(company_ids))
+            
+            def _fetch(group):
+                index, positions = group
+                return self.shards[index].companies.get(ids=[unique_ids[i] for i in positions], include=["documents"])
+            
+            companies = {}
+            for results in self._parallel(_fetch, list(self._group_by_shard(unique_ids).items())):
+                if results and results['ids']:
+                    for i, cid in enumerate(results['ids']):
+                        companies[cid] = loads(results['documents'][i])
+            return companies
+        except Exception as e:
+            print(f"Error retrieving companies: {e}")
+            return {}
+    
+    def get_responses_for_assessments(self, assessment_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Fetch responses for several assessments in one round trip"""
+        grouped = {aid: [] for aid in assessment_ids}
+        if not assessment_ids:
+            return grouped
+        
+        try:
+            assessment_ids = list(assessment_ids)
+            
+            def _fetch(group):
+                index, positions = group
+                return self.shards[index].responses.get(
+                    where={"assessment_id": {"$in": [assessment_ids[i] for i in positions]}},
+                    include=["documents", "metadatas"]
+                )
+            
+            for results in self._parallel(_fetch, list(self._group_by_shard(assessment_ids).items())):
+                if results and results['documents']:
+                    for doc, metadata in zip(results['documents'], results['metadatas']):
+                        response = self._read_response(doc, metadata)
+                        grouped.setdefault(response.get("assessment_id", ""), []).append(response)
+            return grouped
+        except Exception as e:
+            print(f"Error retrieving responses: {e}")
+            return grouped
+    
     # ==============================
     # UTILITY OPERATIONS
     # ==============================
@@ -345,16 +670,278 @@ class ChromaDBManager:
             except Exception as e2:
                 print(f"[!] Critical error recreating questions: {e2}")
     
+    # ==============================
+    # LISTING (CURSOR PAGINATION)
+    # ==============================
+    
+    def _index_write(self, fn: Callable, *args):
+        # ChromaDB already holds the record; a failed index write is repaired by rebuild_indexes.py
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[!] Index update failed ({fn.__name__}): {e}")
+    
+    @staticmethod
+    def _iter_pages(collection, include: List[str], batch_size: int) -> Iterator[Dict]:
+        offset = 0
+        while True:
+            page = collection.get(limit=batch_size, offset=offset, include=include)
+            if not page or not page["ids"]:
+                break
+            yield page
+            if len(page["ids"]) < batch_size:
+                break
+            offset += batch_size
+    
+    def rebuild_index(self, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+        """Repopulate the listing and time-range index from every shard (analytics rollups are kept)"""
+        self.index.clear(analytics=False)
+        counts = {"companies": 0, "assessments": 0, "responses": 0}
+        for shard in self.shards:
+            for page in self._iter_pages(shard.companies, ["documents", "metadatas"], batch_size):
+                self.index.upsert_companies([
+                    dict(loads(doc), company_id=cid, created_at=(meta or {}).get("created_at", ""))
+                    for cid, doc, meta in zip(page["ids"], page["documents"], page["metadatas"])
+                ])
+                counts["companies"] += len(page["ids"])
+            # Metadata carries everything the index needs; the answer documents are not read
+            for page in self._iter_pages(shard.responses, ["metadatas"], batch_size):
+                self.index.upsert_responses([
+                    dict(meta or {}, response_id=rid) for rid, meta in zip(page["ids"], page["metadatas"])
+                ])
+                counts["responses"] += len(page["ids"])
+            # Read from the shards, not iter_assessments(): the index being rebuilt is its source
+            for page in self._iter_pages(shard.assessments, ["documents"], batch_size):
+                self.index.upsert_assessments([loads(doc) for doc in page["documents"]])
+                counts["assessments"] += len(page["ids"])
+        return counts
+    
+    def backfill_time_metadata(self, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Add the numeric *_ts metadata to records written before it existed
+        
+        Returns:
+            Number of updated records per collection
+        """
+        fields = {
+            "assessments": [("created_at", "created_ts"), ("completed_at", "completed_ts")],
+            "responses": [("timestamp", "timestamp_ts")]
+        }
+        counts = {"assessments": 0, "responses": 0}
+        for shard in self.shards:
+            for collection, pairs in fields.items():
+                ids, metadatas = [], []
+                for page in self._iter_pages(shard.collection(collection), ["documents", "metadatas"], batch_size):
+                    for record_id, doc, meta in zip(page["ids"], page["documents"], page["metadatas"]):
+                        # completed_at only ever lived in the document
+                        source = dict(loads(doc), **(meta or {}))
+                        missing = {
+                            ts_field: to_epoch(source[iso_field])
+                            for iso_field, ts_field in pairs
+                            if ts_field not in (meta or {}) and source.get(iso_field)
+                        }
+                        if missing:
+                            ids.append(record_id)
+                            metadatas.append(missing)
+                # Updated after the scan so offsets stay stable while paging
+                for start in range(0, len(ids), batch_size):
+                    shard.collection(collection).update(
+                        ids=ids[start:start + batch_size],
+                        metadatas=metadatas[start:start + batch_size]
+                    )
+                counts[collection] += len(ids)
+        return counts
+    
+    @staticmethod
+    def _check_fields(fields: Optional[List[str]], allowed: List[str]) -> List[str]:
+        if not fields:
+            return list(allowed)
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+        return list(fields)
+    
+    def list_companies(self, limit: int, cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+                       descending: bool = False, industry: Optional[str] = None) -> Dict:
+        """
+        One page of companies ordered by (created_at, company_id)
+        
+        Cost is proportional to `limit`: the page is read from the index and
+        documents are fetched by id only when a projected field needs them.
+        
+        Returns:
+            {"items": [...], "next_cursor": str or None}
+        
+        Raises:
+            ValueError: on an invalid cursor or unknown field
+        """
+        fields = self._check_fields(fields, COMPANY_LIST_FIELDS)
+        rows, next_cursor = self.index.page_companies(min(limit, LIST_MAX_PAGE_SIZE), cursor, descending, industry)
+        
+        if any(f not in COMPANY_COLUMNS for f in fields):
+            documents = self.get_companies([row["company_id"] for row in rows])
+            rows = [dict(documents.get(row["company_id"], {}), **row) for row in rows]
+        
+        return {
+            "items": [{f: row.get(f, "") for f in fields} for row in rows],
+            "next_cursor": next_cursor
+        }
+    
+    def list_assessments(self, limit: int, cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+                         descending: bool = False, status: Optional[str] = None,
+                         company_id: Optional[str] = None) -> Dict:
+        """One page of assessments ordered by (created_at, assessment_id); see list_companies()"""
+        fields = self._check_fields(fields, ASSESSMENT_LIST_FIELDS)
+        rows, next_cursor = self.index.page_assessments(min(limit, LIST_MAX_PAGE_SIZE), cursor, descending, status, company_id)
+        
+        if any(f not in ASSESSMENT_COLUMNS for f in fields) and rows:
+            documents = self.get_assessments([row["assessment_id"] for row in rows])
+            rows = [dict(documents.get(row["assessment_id"], {}), **row) for row in rows]
+        
+        return {
+            "items": [{f: row.get(f, "") for f in fields} for row in rows],
+            "next_cursor": next_cursor
+        }
+    
+    # ==============================
+    # TIME-RANGE QUERIES
+    # ==============================
+    
+    def list_assessments_between(self, field: str = "completed", start: Any = None, end: Any = None,
+                                 limit: int = LIST_MAX_PAGE_SIZE, cursor: Optional[str] = None,
+                                 fields: Optional[List[str]] = None, descending: bool = False,
+                                 status: Optional[str] = None) -> Dict:
+        """
+        One page of assessments created or completed in [start, end)
+        
+        Args:
+            field: "created" or "completed"
+            start, end: ISO-8601 strings, datetimes or epoch seconds (None = open)
+        
+        Raises:
+            ValueError: on a bad field, timestamp, cursor or projection
+        """
+        fields = self._check_fields(fields, ASSESSMENT_LIST_FIELDS)
+        rows, next_cursor = self.index.page_assessments_between(
+            field, to_epoch(start), to_epoch(end), min(limit, LIST_MAX_PAGE_SIZE), cursor, descending, status
+        )
+        
+        if any(f not in ASSESSMENT_COLUMNS for f in fields) and rows:
+            documents = self.get_assessments([row["assessment_id"] for row in rows])
+            rows = [dict(documents.get(row["assessment_id"], {}), **row) for row in rows]
+        
+        return {
+            "items": [{f: row.get(f, "") for f in fields} for row in rows],
+            "next_cursor": next_cursor
+        }
+    
+    def list_responses_between(self, start: Any = None, end: Any = None, limit: int = LIST_MAX_PAGE_SIZE,
+                               cursor: Optional[str] = None, descending: bool = False,
+                               assessment_id: Optional[str] = None) -> Dict:
+        """One page of responses saved in [start, end), ordered by save time"""
+        rows, next_cursor = self.index.page_responses_between(
+            to_epoch(start), to_epoch(end), min(limit, LIST_MAX_PAGE_SIZE), cursor, descending, assessment_id
+        )
+        for row in rows:
+            row.pop("ts", None)
+        return {"items": rows, "next_cursor": next_cursor}
+    
+    def get_activity(self, start: Any, end: Any, granularity: str = "day") -> Dict[str, List[Dict]]:
+        """Created/completed assessments and saved responses per hour, day or month"""
+        return self.index.activity(to_epoch(start), to_epoch(end), granularity)
+    
+    def record_results(self, rows: List[Dict]):
+        """Add scored assessments to the analytics rollups (see IndexStore.record_results)"""
+        self._index_write(self.index.record_results, rows)
+    
+    def get_maturity_distribution(self, filters: Dict[str, Optional[str]], start: Optional[str] = None,
+                                  end: Optional[str] = None) -> List[Dict]:
+        return self.index.maturity_distribution(filters, start, end)
+    
+    def get_score_breakdown(self, group_by: str, filters: Dict[str, Optional[str]], start: Optional[str] = None,
+                            end: Optional[str] = None) -> List[Dict]:
+        return self.index.score_breakdown(group_by, filters, start, end)
+    
+    def get_answer_frequency(self, filters: Dict[str, Optional[str]], start: Optional[str] = None,
+                             end: Optional[str] = None, question_id: Optional[str] = None) -> List[Dict]:
+        return self.index.answer_frequency(filters, start, end, question_id)
+    
+    def get_answer_breakdown(self, group_by: str) -> List[Dict]:
+        return self.index.answer_breakdown(group_by)
+    
+    def find_company(self, key: str) -> Optional[str]:
+        """company_id already registered under an identity key (see utils/company_identity.py)"""
+        return self.index.company_by_identity(key)
+    
+    def find_company_by_name(self, company_name: str) -> Optional[str]:
+        """Earliest company_id registered under the same normalized name, on any email domain"""
+        return self.index.company_by_name(normalize_name(company_name))
+    
+    def get_company_history(self, company_id: str) -> List[Dict]:
+        return self.index.identity_results(company_id)
+    
+    def get_result_snapshots(self, assessment_ids: List[str]) -> Dict[str, Dict]:
+        return self.index.result_snapshots(assessment_ids)
+    
+    def get_assessments(self, assessment_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch several assessments in one round trip per shard, keyed by assessment_id"""
+        if not assessment_ids:
+            return {}
+        
+        try:
+            unique_ids = list(set(assessment_ids))
+            
+            def _fetch(group):
+                index, positions = group
+                return self.shards[index].assessments.get(ids=[unique_ids[i] for i in positions], include=["documents"])
+            
+            assessments = {}
+            for results in self._parallel(_fetch, list(self._group_by_shard(unique_ids).items())):
+                if results and results['ids']:
+                    for i, aid in enumerate(results['ids']):
+                        assessments[aid] = loads(results['documents'][i])
+            return assessments
+        except Exception as e:
+            print(f"Error retrieving assessments: {e}")
+            return {}
+    
+    def _distinct_clients(self) -> List:
+        clients = []
+        for shard in self.shards:
+            if not any(shard.client is c for c in clients):
+                clients.append(shard.client)
+        return clients
+    
     def reset_database(self):
-        """Reset all collections (USE WITH CAUTION)"""
-        self.client.reset()
+        """Reset all collections on every shard (USE WITH CAUTION)"""
+        for client in self._distinct_clients():
+            client.reset()
         self._initialize_collections()
+        self.index.clear()
+    
+    def health_check(self) -> Dict:
+        """Heartbeat every storage backend; unavailable if any shard is"""
+        checks = self._parallel(lambda client: check_health(client, self.mode), self._distinct_clients())
+        health = dict(checks[0])
+        health["shards"] = self.shard_count
+        if len(checks) > 1:
+            failed = [check for check in checks if check["status"] != "ok"]
+            health["status"] = "unavailable" if failed else "ok"
+            health["latency_ms"] = max(check.get("latency_ms", 0) for check in checks)
+            if failed:
+                health["error"] = "; ".join(check["error"] for check in failed)
+        return health
     
     def get_statistics(self) -> Dict:
-        """Get database statistics"""
+        """Get database statistics (summed over shards)"""
+        counts = self._fan_out(lambda shard: (
+            shard.companies.count(),
+            shard.responses.count(),
+            shard.assessments.count()
+        ))
         return {
-            "total_companies": self.companies.count(),
+            "total_companies": sum(c[0] for c in counts),
             "total_questions": self.questions.count(),
-            "total_responses": self.responses.count(),
-            "total_assessments": self.assessments.count()
+            "total_responses": sum(c[1] for c in counts),
+            "total_assessments": sum(c[2] for c in counts)
         }
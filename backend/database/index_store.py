@@ -0,0 +1,820 @@
+"""
+Secondary Index Store
+SQLite sidecar (WAL mode) holding the sortable and filterable columns of
+companies, assessments and responses, so listings can page by
+(created_at, id) with keyset cursors and time ranges can be answered from
+numeric epoch columns instead of scanning every ChromaDB document
+
+ChromaDB remains the source of truth: the index is written alongside it by
+ChromaDBManager and can be rebuilt from it at any time (rebuild_indexes.py).
+The analytics rollups are derived from scored submissions instead and are
+rebuilt by rescoring (rebuild_analytics.py).
+"""
+
+import base64
+import json
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import INDEX_DB_PATH
+from utils.company_identity import identity_key, normalize_name, email_domain
+from utils.company_search import company_codes, company_trigrams, search_text
+
+COMPANY_COLUMNS = ["company_id", "created_at", "company_name", "industry", "company_size", "state", "identity_key"]
+ASSESSMENT_COLUMNS = ["assessment_id", "company_id", "status", "created_at", "completed_at", "schema_version"]
+RESPONSE_COLUMNS = ["response_id", "assessment_id", "question_id", "answer", "timestamp"]
+
+# Bumped whenever the tables change; an older index is dropped and rebuilt
+INDEX_SCHEMA_VERSION = 8
+# Answer index changes kept for workers catching up; one further behind reloads
+ANSWER_LOG_KEEP = 50000
+# Width of the pre-aggregated activity buckets
+BUCKET_SECONDS = 3600
+GRANULARITIES = {
+    "hour": "strftime('%Y-%m-%dT%H:00', bucket_start, 'unixepoch', 'localtime')",
+    "day": "strftime('%Y-%m-%d', bucket_start, 'unixepoch', 'localtime')",
+    "month": "strftime('%Y-%m', bucket_start, 'unixepoch', 'localtime')"
+}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS companies (
+    company_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    company_name TEXT,
+    industry TEXT,
+    company_size TEXT,
+    state TEXT,
+    -- Normalized name + email domain shared by repeat registrations (utils/company_identity.py)
+    identity_key TEXT
+);
+CREATE INDEX IF NOT EXISTS companies_by_identity ON companies (identity_key, created_at, company_id);
+
+-- Fuzzy company search (utils/company_search.py): normalized name and contact
+-- domain per company, numbered by doc for compact trigram and word postings
+CREATE TABLE IF NOT EXISTS company_search (
+    doc INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id TEXT NOT NULL UNIQUE,
+    search_name TEXT NOT NULL,
+    email_domain TEXT NOT NULL,
+    search_text TEXT NOT NULL,
+    gram_total INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS company_search_by_name ON company_search (search_name);
+CREATE TABLE IF NOT EXISTS company_grams (
+    gram INTEGER NOT NULL,
+    doc INTEGER NOT NULL,
+    PRIMARY KEY (gram, doc)
+) WITHOUT ROWID;
+-- Postings per trigram or word, so a query can start from its rarest ones
+CREATE TABLE IF NOT EXISTS gram_counts (
+    gram INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS gram_added AFTER INSERT ON company_grams BEGIN
+    INSERT INTO gram_counts VALUES (new.gram, 1) ON CONFLICT (gram) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS gram_removed AFTER DELETE ON company_grams BEGIN
+    UPDATE gram_counts SET count = count - 1 WHERE gram = old.gram;
+END;
+CREATE INDEX IF NOT EXISTS companies_by_created ON companies (created_at, company_id);
+
+CREATE TABLE IF NOT EXISTS assessments (
+    assessment_id TEXT PRIMARY KEY,
+    company_id TEXT,
+    status TEXT,
+    created_at TEXT NOT NULL,
+    completed_at TEXT,
+    schema_version TEXT,
+    created_ts REAL,
+    completed_ts REAL
+);
+CREATE INDEX IF NOT EXISTS assessments_by_created ON assessments (created_at, assessment_id);
+CREATE INDEX IF NOT EXISTS assessments_by_status ON assessments (status, created_at, assessment_id);
+CREATE INDEX IF NOT EXISTS assessments_by_company ON assessments (company_id, created_at, assessment_id);
+CREATE INDEX IF NOT EXISTS assessments_by_created_ts ON assessments (created_ts, assessment_id);
+CREATE INDEX IF NOT EXISTS assessments_by_completed_ts ON assessments (completed_ts, assessment_id);
+
+CREATE TABLE IF NOT EXISTS responses (
+    response_id TEXT PRIMARY KEY,
+    assessment_id TEXT,
+    question_id TEXT,
+    answer TEXT,
+    timestamp TEXT,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_by_ts ON responses (ts, response_id);
+
+-- Hourly event counts kept current by triggers, so dashboards read a few
+-- dozen bucket rows instead of counting the underlying records
+CREATE TABLE IF NOT EXISTS activity (
+    kind TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (kind, bucket_start)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS assessment_created AFTER INSERT ON assessments
+WHEN new.created_ts IS NOT NULL BEGIN
+    INSERT INTO activity VALUES ('assessments_created', CAST(new.created_ts / {BUCKET_SECONDS} AS INTEGER) * {BUCKET_SECONDS}, 1)
+    ON CONFLICT (kind, bucket_start) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS assessment_inserted_completed AFTER INSERT ON assessments
+WHEN new.completed_ts IS NOT NULL BEGIN
+    INSERT INTO activity VALUES ('assessments_completed', CAST(new.completed_ts / {BUCKET_SECONDS} AS INTEGER) * {BUCKET_SECONDS}, 1)
+    ON CONFLICT (kind, bucket_start) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS assessment_completion_moved AFTER UPDATE OF completed_ts ON assessments
+WHEN new.completed_ts IS NOT old.completed_ts BEGIN
+    UPDATE activity SET count = count - 1
+    WHERE old.completed_ts IS NOT NULL AND kind = 'assessments_completed'
+      AND bucket_start = CAST(old.completed_ts / {BUCKET_SECONDS} AS INTEGER) * {BUCKET_SECONDS};
+    INSERT INTO activity SELECT 'assessments_completed', CAST(new.completed_ts / {BUCKET_SECONDS} AS INTEGER) * {BUCKET_SECONDS}, 1
+    WHERE new.completed_ts IS NOT NULL
+    ON CONFLICT (kind, bucket_start) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS response_saved AFTER INSERT ON responses BEGIN
+    INSERT INTO activity VALUES ('responses', CAST(new.ts / {BUCKET_SECONDS} AS INTEGER) * {BUCKET_SECONDS}, 1)
+    ON CONFLICT (kind, bucket_start) DO UPDATE SET count = count + 1;
+END;
+
+-- Score and cohort of each scored assessment, with its answers as
+-- [[question_id, option], ...] and per-question points as question_id -> points
+-- (the snapshot delta reports compare); a resubmission replaces the row, and the
+-- triggers take the old contribution out of the rollups before adding the new.
+-- row_id is never reused, so it doubles as the bitmap position of the result
+-- in the answer index (utils/answer_index.py)
+CREATE TABLE IF NOT EXISTS assessment_results (
+    row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    assessment_id TEXT NOT NULL UNIQUE,
+    company_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    industry TEXT NOT NULL,
+    company_size TEXT NOT NULL,
+    state TEXT NOT NULL,
+    maturity_level INTEGER NOT NULL,
+    total_score REAL NOT NULL,
+    answers TEXT NOT NULL,
+    completed_at TEXT NOT NULL,
+    question_scores TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_company ON assessment_results (company_id, completed_at);
+
+-- Rollups per completion month and cohort: dashboards sum a bounded number
+-- of rows whatever the number of submissions
+CREATE TABLE IF NOT EXISTS score_rollup (
+    bucket TEXT NOT NULL,
+    industry TEXT NOT NULL,
+    company_size TEXT NOT NULL,
+    state TEXT NOT NULL,
+    maturity_level INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    PRIMARY KEY (bucket, industry, company_size, state, maturity_level)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS answer_rollup (
+    bucket TEXT NOT NULL,
+    industry TEXT NOT NULL,
+    company_size TEXT NOT NULL,
+    state TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (bucket, industry, company_size, state, question_id, answer)
+) WITHOUT ROWID;
+
+-- Results added (1) and removed (0) in commit order, replayed by every
+-- process holding an answer index to stay current without reloading
+CREATE TABLE IF NOT EXISTS answer_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    row_id INTEGER NOT NULL,
+    added INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS result_added AFTER INSERT ON assessment_results BEGIN
+    INSERT INTO score_rollup VALUES (new.bucket, new.industry, new.company_size, new.state, new.maturity_level, 1, new.total_score)
+    ON CONFLICT (bucket, industry, company_size, state, maturity_level)
+    DO UPDATE SET count = count + 1, score_sum = score_sum + excluded.score_sum;
+    INSERT INTO answer_rollup
+    SELECT new.bucket, new.industry, new.company_size, new.state, json_extract(value, '$[0]'), json_extract(value, '$[1]'), 1
+    FROM json_each(new.answers) WHERE true
+    ON CONFLICT (bucket, industry, company_size, state, question_id, answer) DO UPDATE SET count = count + 1;
+    INSERT INTO answer_changes (row_id, added) VALUES (new.row_id, 1);
+END;
+CREATE TRIGGER IF NOT EXISTS result_removed AFTER DELETE ON assessment_results BEGIN
+    UPDATE score_rollup SET count = count - 1, score_sum = score_sum - old.total_score
+    WHERE bucket = old.bucket AND industry = old.industry AND company_size = old.company_size
+      AND state = old.state AND maturity_level = old.maturity_level;
+    UPDATE answer_rollup SET count = count - 1
+    WHERE bucket = old.bucket AND industry = old.industry AND company_size = old.company_size AND state = old.state
+      AND (question_id, answer) IN (SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(old.answers));
+    INSERT INTO answer_changes (row_id, added) VALUES (old.row_id, 0);
+END;
+"""
+
+_TABLES = ["companies", "assessments", "responses", "activity", "company_search", "company_grams", "gram_counts"]
+# answer_changes last: emptying the results logs a removal per row first
+_ANALYTICS_TABLES = ["assessment_results", "score_rollup", "answer_rollup", "answer_changes"]
+# Cohort dimensions analytics can filter and group by
+COHORT_COLUMNS = ["industry", "company_size", "state"]
+
+
+def to_epoch(value: Union[str, int, float, datetime, None]) -> Optional[float]:
+    """
+    Sortable epoch seconds for an ISO-8601 string, datetime or number
+    (naive values are local time, like the datetime.now().isoformat() stamps)
+    
+    Raises:
+        ValueError: if a string is neither a number nor an ISO-8601 timestamp
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value!r} (use ISO-8601 or epoch seconds)")
+
+
+# ==============================
+# CURSORS
+# ==============================
+
+def encode_cursor(sort_key: Union[str, float], record_id: str) -> str:
+    """Opaque keyset cursor: the sort key of the last row on the page"""
+    raw = json.dumps([sort_key, record_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Union[str, float], str]:
+    """
+    Raises:
+        ValueError: if the cursor was not produced by encode_cursor()
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_key, record_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(sort_key, (str, int, float)):
+            raise TypeError(sort_key)
+        return sort_key, str(record_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _upsert_sql(table: str, columns: List[str], key: str) -> str:
+    # ON CONFLICT ... DO UPDATE (not INSERT OR REPLACE) so the activity triggers
+    # see an update of an existing row rather than a silent delete + insert
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != key)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+    )
+
+
+class IndexStore:
+    """
+    Thread-safe access to the index database (one connection per thread)
+    """
+
+    def __init__(self, path: Path = INDEX_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_SCHEMA_VERSION:
+                # Derived data: drop the old layout and let the manager rebuild it
+                for table in _TABLES + _ANALYTICS_TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # WAL lets readers proceed while a writer (possibly another worker process) commits
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # ==============================
+    # WRITES
+    # ==============================
+
+    def upsert_companies(self, rows: Iterable[Dict[str, Any]]):
+        """
+        Rows are company dicts; the identity key and the search postings are
+        derived from company_name and contact_email
+        """
+        rows = list(rows)
+        values = [
+            tuple(row.get(column) or "" for column in COMPANY_COLUMNS[:-1])
+            + (row.get("identity_key") or identity_key(row.get("company_name"), row.get("contact_email")),)
+            for row in rows
+        ]
+        if not values:
+            return
+        search = {
+            row["company_id"]: (normalize_name(row.get("company_name")), email_domain(row.get("contact_email")))
+            for row in rows
+        }
+        company_ids = list(search)
+        with self._connect() as conn:
+            conn.executemany(_upsert_sql("companies", COMPANY_COLUMNS, "company_id"), values)
+            # Postings of a renamed company are removed by (gram, doc), regenerated from the old name
+            previous = {
+                row[0]: (row[1], (row[2], row[3]))
+                for row in conn.execute(
+                    f"SELECT company_id, doc, search_name, email_domain FROM company_search "
+                    f"WHERE company_id IN ({', '.join('?' for _ in company_ids)})",
+                    company_ids
+                )
+            }
+            changed = [company_id for company_id in company_ids
+                       if company_id not in previous or previous[company_id][1] != search[company_id]]
+            if not changed:
+                return
+            conn.executemany("DELETE FROM company_grams WHERE gram = ? AND doc = ?", [
+                (code, previous[company_id][0])
+                for company_id in changed if company_id in previous
+                for code in company_codes(*previous[company_id][1])
+            ])
+            conn.executemany(
+                _upsert_sql("company_search", ["company_id", "search_name", "email_domain", "search_text", "gram_total"],
+                            "company_id"),
+                [
+                    (company_id,) + search[company_id]
+                    + (search_text(*search[company_id]), len(company_trigrams(*search[company_id])))
+                    for company_id in changed
+                ]
+            )
+            docs = conn.execute(
+                f"SELECT doc, company_id FROM company_search WHERE company_id IN ({', '.join('?' for _ in changed)})",
+                changed
+            ).fetchall()
+            conn.executemany("INSERT INTO company_grams VALUES (?, ?)", [
+                (code, doc) for doc, company_id in docs for code in company_codes(*search[company_id])
+            ])
+
+    def upsert_assessments(self, rows: Iterable[Dict[str, Any]]):
+        columns = ASSESSMENT_COLUMNS + ["created_ts", "completed_ts"]
+        values = [
+            tuple(row.get(column) or "" for column in ASSESSMENT_COLUMNS)
+            + (to_epoch(row.get("created_at")), to_epoch(row.get("completed_at")))
+            for row in rows
+        ]
+        if not values:
+            return
+        with self._connect() as conn:
+            conn.executemany(_upsert_sql("assessments", columns, "assessment_id"), values)
+
+    def update_assessment_status(self, assessment_id: str, status: str, completed_at: Optional[str] = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE assessments SET status = ?, completed_at = COALESCE(?, completed_at), "
+                "completed_ts = COALESCE(?, completed_ts) WHERE assessment_id = ?",
+                (status, completed_at, to_epoch(completed_at), assessment_id)
+            )
+
+    def upsert_responses(self, rows: Iterable[Dict[str, Any]]):
+        columns = RESPONSE_COLUMNS + ["ts"]
+        values = [
+            # "" only for missing values: option code 0 is a real answer
+            tuple("" if row.get(column) is None else str(row[column]) for column in RESPONSE_COLUMNS)
+            + (to_epoch(row.get("timestamp")),)
+            for row in rows
+        ]
+        values = [value for value in values if value[-1] is not None]
+        if not values:
+            return
+        with self._connect() as conn:
+            conn.executemany(_upsert_sql("responses", columns, "response_id"), values)
+
+    def assessment_versions(self, assessment_ids: List[str]) -> Dict[str, str]:
+        """schema_version of each listed assessment (for decoding its answer codes)"""
+        if not assessment_ids:
+            return {}
+        unique_ids = list(set(assessment_ids))
+        rows = self._connect().execute(
+            f"SELECT assessment_id, schema_version FROM assessments "
+            f"WHERE assessment_id IN ({', '.join('?' for _ in unique_ids)})",
+            unique_ids
+        ).fetchall()
+        return {row["assessment_id"]: row["schema_version"] for row in rows}
+
+    def clear(self, analytics: bool = True):
+        """Empty the index; analytics=False keeps the rollups (they can't be rebuilt from records alone)"""
+        with self._connect() as conn:
+            for table in _TABLES + (_ANALYTICS_TABLES if analytics else []):
+                conn.execute(f"DELETE FROM {table}")
+
+    def is_empty(self) -> bool:
+        conn = self._connect()
+        return all(
+            conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+            for table in ("companies", "assessments", "responses")
+        )
+
+    # ==============================
+    # ANALYTICS ROLLUPS
+    # ==============================
+
+    def record_results(self, rows: Iterable[Dict[str, Any]]):
+        """
+        Add scored assessments to the rollups, replacing earlier results of
+        the same assessments. The cohort comes from the indexed company.
+
+        Args:
+            rows: Dicts with assessment_id, company_id, completed_at,
+                  maturity_level, total_score, answers
+                  ([[question_id, option], ...], one pair per selected option)
+                  and question_scores ({question_id: points})
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        with self._connect() as conn:
+            company_ids = list({row["company_id"] for row in rows})
+            cohorts = {
+                row["company_id"]: row
+                for row in conn.execute(
+                    f"SELECT company_id, {', '.join(COHORT_COLUMNS)} FROM companies "
+                    f"WHERE company_id IN ({', '.join('?' for _ in company_ids)})",
+                    company_ids
+                ).fetchall()
+            }
+            conn.executemany("DELETE FROM assessment_results WHERE assessment_id = ?",
+                             [(row["assessment_id"],) for row in rows])
+            conn.executemany(
+                f"INSERT INTO assessment_results (assessment_id, company_id, bucket, {', '.join(COHORT_COLUMNS)}, "
+                f"maturity_level, total_score, answers, completed_at, question_scores) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (row["assessment_id"], row["company_id"], str(row["completed_at"])[:7])
+                    + tuple((cohorts[row["company_id"]][column] or "") if row["company_id"] in cohorts else ""
+                            for column in COHORT_COLUMNS)
+                    + (int(row["maturity_level"]), float(row["total_score"]), json.dumps(row["answers"]),
+                       str(row["completed_at"]), json.dumps(row.get("question_scores") or {}))
+                    for row in rows
+                ]
+            )
+            conn.execute("DELETE FROM answer_changes WHERE seq <= (SELECT MAX(seq) FROM answer_changes) - ?",
+                         (ANSWER_LOG_KEEP,))
+
+    def _cohort_filter(self, filters: Dict[str, Optional[str]], start: Optional[str],
+                       end: Optional[str]) -> Tuple[str, List[Any]]:
+        """WHERE clause over cohort columns and the month range [start, end] (YYYY-MM)"""
+        clauses = ["count > 0"]
+        params: List[Any] = []
+        for column in COHORT_COLUMNS:
+            if filters.get(column) is not None:
+                clauses.append(f"{column} = ?")
+                params.append(filters[column])
+        if start:
+            clauses.append("bucket >= ?")
+            params.append(start)
+        if end:
+            clauses.append("bucket <= ?")
+            params.append(end)
+        return " AND ".join(clauses), params
+
+    def maturity_distribution(self, filters: Dict[str, Optional[str]], start: Optional[str] = None,
+                              end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Assessments and score sum per maturity level"""
+        where, params = self._cohort_filter(filters, start, end)
+        rows = self._connect().execute(
+            f"SELECT maturity_level, SUM(count) AS count, SUM(score_sum) AS score_sum FROM score_rollup "
+            f"WHERE {where} GROUP BY maturity_level ORDER BY maturity_level",
+            params
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def score_breakdown(self, group_by: str, filters: Dict[str, Optional[str]], start: Optional[str] = None,
+                        end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Assessments and score sum per cohort value or month
+
+        Raises:
+            ValueError: for an unknown group_by
+        """
+        column = "bucket" if group_by == "month" else group_by
+        if column not in COHORT_COLUMNS + ["bucket"]:
+            raise ValueError(f"group_by must be one of: {', '.join(COHORT_COLUMNS + ['month'])}")
+        where, params = self._cohort_filter(filters, start, end)
+        rows = self._connect().execute(
+            f"SELECT {column} AS value, SUM(count) AS count, SUM(score_sum) AS score_sum FROM score_rollup "
+            f"WHERE {where} GROUP BY {column} ORDER BY {column}",
+            params
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def answer_frequency(self, filters: Dict[str, Optional[str]], start: Optional[str] = None,
+                         end: Optional[str] = None, question_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """How often each option was picked, per question"""
+        where, params = self._cohort_filter(filters, start, end)
+        if question_id:
+            where += " AND question_id = ?"
+            params.append(question_id)
+        rows = self._connect().execute(
+            f"SELECT question_id, answer, SUM(count) AS count FROM answer_rollup "
+            f"WHERE {where} GROUP BY question_id, answer ORDER BY question_id, count DESC",
+            params
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def answer_breakdown(self, group_by: str) -> List[Dict[str, Any]]:
+        """
+        How often each option was picked, per question and cohort value
+
+        Raises:
+            ValueError: for an unknown group_by
+        """
+        if group_by not in COHORT_COLUMNS:
+            raise ValueError(f"group_by must be one of: {', '.join(COHORT_COLUMNS)}")
+        rows = self._connect().execute(
+            f"SELECT {group_by} AS value, question_id, answer, SUM(count) AS count FROM answer_rollup "
+            f"WHERE count > 0 GROUP BY {group_by}, question_id, answer"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def clear_analytics(self):
+        with self._connect() as conn:
+            for table in _ANALYTICS_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+
+    def scored_assessments(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM assessment_results").fetchone()[0]
+
+    # ==============================
+    # COMPANY IDENTITY AND HISTORY
+    # ==============================
+
+    def company_by_identity(self, key: str) -> Optional[str]:
+        """First registered company_id with this identity key"""
+        if not key:
+            return None
+        row = self._connect().execute(
+            "SELECT company_id FROM companies WHERE identity_key = ? ORDER BY created_at, company_id LIMIT 1", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def company_by_name(self, search_name: str) -> Optional[str]:
+        """First registered company_id with this normalized name, whatever its email domain"""
+        if not search_name:
+            return None
+        row = self._connect().execute(
+            "SELECT s.company_id FROM company_search s JOIN companies c ON c.company_id = s.company_id "
+            "WHERE s.search_name = ? ORDER BY c.created_at, c.company_id LIMIT 1",
+            (search_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def company_identity(self, company_id: str) -> Optional[str]:
+        """Identity key of a company ("" if it has none), None if the company is not indexed"""
+        row = self._connect().execute("SELECT identity_key FROM companies WHERE company_id = ?", (company_id,)).fetchone()
+        return row[0] if row else None
+
+    def identity_results(self, company_id: str) -> List[Dict[str, Any]]:
+        """
+        Scored assessments of the company and of every company sharing its
+        identity key (registrations from before resolution), oldest first
+        """
+        rows = self._connect().execute(
+            "SELECT r.assessment_id, r.company_id, r.completed_at, r.maturity_level, r.total_score "
+            "FROM assessment_results r WHERE r.company_id = ? OR r.company_id IN ("
+            "  SELECT c.company_id FROM companies c JOIN companies me ON me.company_id = ? "
+            "  WHERE me.identity_key != '' AND c.identity_key = me.identity_key) "
+            "ORDER BY r.completed_at, r.assessment_id",
+            (company_id, company_id)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def result_snapshots(self, assessment_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored scoring snapshot per assessment_id, with answers and question_scores decoded"""
+        if not assessment_ids:
+            return {}
+        rows = self._connect().execute(
+            f"SELECT r.assessment_id, r.company_id, r.completed_at, r.maturity_level, r.total_score, r.answers, "
+            f"r.question_scores, c.identity_key FROM assessment_results r "
+            f"LEFT JOIN companies c ON c.company_id = r.company_id "
+            f"WHERE r.assessment_id IN ({', '.join('?' for _ in assessment_ids)})",
+            list(assessment_ids)
+        ).fetchall()
+        snapshots = {}
+        for row in rows:
+            snapshot = dict(row)
+            snapshot["answers"] = json.loads(snapshot["answers"])
+            snapshot["question_scores"] = json.loads(snapshot["question_scores"])
+            snapshots[snapshot["assessment_id"]] = snapshot
+        return snapshots
+
+    # ==============================
+    # COMPANY SEARCH
+    # ==============================
+
+    def gram_counts(self, grams: Iterable[int]) -> Dict[int, int]:
+        grams = list(grams)
+        if not grams:
+            return {}
+        rows = self._connect().execute(
+            f"SELECT gram, count FROM gram_counts WHERE gram IN ({', '.join('?' for _ in grams)})", grams
+        ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def company_search_candidates(self, grams: List[int], prefix: str, budget: int, limit: int) -> List[Dict[str, Any]]:
+        """
+        Companies sharing the most of `grams` (reading at most `budget`
+        postings) plus those whose normalized name starts with `prefix`
+        """
+        conn = self._connect()
+        docs: List[int] = []
+        if grams:
+            docs = [row[0] for row in conn.execute(
+                f"SELECT doc FROM (SELECT doc FROM company_grams WHERE gram IN ({', '.join('?' for _ in grams)}) LIMIT ?) "
+                f"GROUP BY doc ORDER BY COUNT(*) DESC LIMIT ?",
+                grams + [budget, limit]
+            )]
+        # Normalized names only contain [a-z0-9 ], all sorting before "{"
+        docs += [row[0] for row in conn.execute(
+            "SELECT doc FROM company_search WHERE search_name >= ? AND search_name < ? ORDER BY search_name LIMIT ?",
+            (prefix, prefix + "{", limit)
+        )]
+        docs = list(dict.fromkeys(docs))
+        if not docs:
+            return []
+        rows = conn.execute(
+            f"SELECT s.company_id, s.search_name, s.email_domain, s.search_text, s.gram_total, c.company_name, c.industry, c.company_size, c.state, "
+            f"c.created_at FROM company_search s JOIN companies c ON c.company_id = s.company_id "
+            f"WHERE s.doc IN ({', '.join('?' for _ in docs)})",
+            docs
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # ==============================
+    # ANSWER INDEX FEED
+    # ==============================
+
+    def answer_log_position(self) -> int:
+        """Sequence number of the latest logged result change (0 if none)"""
+        row = self._connect().execute("SELECT seq FROM sqlite_sequence WHERE name = 'answer_changes'").fetchone()
+        return row[0] if row else 0
+
+    def iter_result_answers(self, batch_size: int = 10000) -> Iterator[List[Tuple[int, str]]]:
+        """Batches of (row_id, answers JSON) for every scored assessment"""
+        cursor = self._connect().execute("SELECT row_id, answers FROM assessment_results ORDER BY row_id")
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            yield [(row[0], row[1]) for row in batch]
+
+    def answer_changes(self, since: int) -> Optional[List[Tuple[int, int, int, Optional[str]]]]:
+        """
+        Result changes logged after sequence number `since`, oldest first, as
+        (seq, row_id, added, answers JSON); answers are None for a row that
+        is gone by now (its removal follows later in the log)
+
+        Returns:
+            None when the log no longer reaches back to `since` (pruned,
+            cleared or recreated), meaning the caller has to reload
+        """
+        rows = self._connect().execute(
+            "SELECT c.seq, c.row_id, c.added, r.answers FROM answer_changes c "
+            "LEFT JOIN assessment_results r ON r.row_id = c.row_id WHERE c.seq > ? ORDER BY c.seq",
+            (since,)
+        ).fetchall()
+        if rows:
+            return [tuple(row) for row in rows] if rows[0][0] == since + 1 else None
+        return [] if self.answer_log_position() == since else None
+
+    def result_rows(self, row_ids: List[int]) -> List[Dict[str, Any]]:
+        """Cohort, month and score of scored assessments by row_id, in the order given"""
+        if not row_ids:
+            return []
+        rows = self._connect().execute(
+            f"SELECT row_id, assessment_id, company_id, bucket, {', '.join(COHORT_COLUMNS)}, maturity_level, total_score "
+            f"FROM assessment_results WHERE row_id IN ({', '.join('?' for _ in row_ids)})",
+            row_ids
+        ).fetchall()
+        by_id = {row["row_id"]: dict(row) for row in rows}
+        return [by_id[row_id] for row_id in row_ids if row_id in by_id]
+
+    # ==============================
+    # KEYSET PAGINATION
+    # ==============================
+
+    def _page(self, table: str, id_column: str, columns: List[str], limit: int,
+              cursor: Optional[str], descending: bool, filters: Dict[str, Any],
+              sort_column: str = "created_at",
+              ranges: Optional[List[Tuple[str, Any]]] = None) -> Tuple[List[Dict], Optional[str]]:
+        clauses = []
+        params: List[Any] = []
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        for clause, value in ranges or []:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        if cursor:
+            sort_key, record_id = decode_cursor(cursor)
+            # Row-value comparison keeps the order stable when the sort key ties
+            clauses.append(f"({sort_column}, {id_column}) {'<' if descending else '>'} (?, ?)")
+            params.extend([sort_key, record_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        direction = "DESC" if descending else "ASC"
+        selected = columns if sort_column in columns else columns + [sort_column]
+        sql = (
+            f"SELECT {', '.join(selected)} FROM {table} {where} "
+            f"ORDER BY {sort_column} {direction}, {id_column} {direction} LIMIT ?"
+        )
+        # One extra row tells us whether another page exists without a COUNT(*)
+        rows = [dict(row) for row in self._connect().execute(sql, params + [limit + 1]).fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last[sort_column], last[id_column])
+        return rows, next_cursor
+
+    def page_companies(self, limit: int, cursor: Optional[str] = None, descending: bool = False,
+                       industry: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        return self._page("companies", "company_id", COMPANY_COLUMNS, limit, cursor, descending,
+                          {"industry": industry})
+
+    def page_assessments(self, limit: int, cursor: Optional[str] = None, descending: bool = False,
+                         status: Optional[str] = None, company_id: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        return self._page("assessments", "assessment_id", ASSESSMENT_COLUMNS, limit, cursor, descending,
+                          {"status": status, "company_id": company_id})
+
+    # ==============================
+    # TIME RANGES
+    # ==============================
+
+    def page_assessments_between(self, field: str, start_ts: Optional[float], end_ts: Optional[float],
+                                 limit: int, cursor: Optional[str] = None, descending: bool = False,
+                                 status: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Assessments whose created_ts / completed_ts lies in [start_ts, end_ts),
+        ordered by that timestamp
+
+        Raises:
+            ValueError: on an unknown field or invalid cursor
+        """
+        if field not in ("created", "completed"):
+            raise ValueError("field must be 'created' or 'completed'")
+        sort_column = f"{field}_ts"
+        # An open lower bound still has to skip rows without the timestamp (NULL)
+        ranges = [
+            (f"{sort_column} >= ?", start_ts if start_ts is not None else float("-inf")),
+            (f"{sort_column} < ?", end_ts)
+        ]
+        return self._page("assessments", "assessment_id", ASSESSMENT_COLUMNS, limit, cursor, descending,
+                          {"status": status}, sort_column=sort_column, ranges=ranges)
+
+    def page_responses_between(self, start_ts: Optional[float], end_ts: Optional[float], limit: int,
+                               cursor: Optional[str] = None, descending: bool = False,
+                               assessment_id: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Responses saved in [start_ts, end_ts), ordered by save time"""
+        return self._page("responses", "response_id", RESPONSE_COLUMNS, limit, cursor, descending,
+                          {"assessment_id": assessment_id}, sort_column="ts",
+                          ranges=[("ts >= ?", start_ts), ("ts < ?", end_ts)])
+
+    def activity(self, start_ts: float, end_ts: float, granularity: str = "day") -> Dict[str, List[Dict]]:
+        """
+        Event counts per hour/day/month in [start_ts, end_ts), read from the
+        hourly buckets (bounds are rounded to whole buckets)
+
+        Returns:
+            {kind: [{"period": "2024-05-01", "count": 12}, ...]} for
+            assessments_created, assessments_completed and responses
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+        rows = self._connect().execute(
+            f"SELECT kind, {GRANULARITIES[granularity]} AS period, SUM(count) AS count FROM activity "
+            "WHERE bucket_start >= ? AND bucket_start < ? AND count > 0 "
+            "GROUP BY kind, period ORDER BY kind, period",
+            (int(start_ts // BUCKET_SECONDS) * BUCKET_SECONDS, end_ts)
+        ).fetchall()
+        result: Dict[str, List[Dict]] = {"assessments_created": [], "assessments_completed": [], "responses": []}
+        for row in rows:
+            result.setdefault(row["kind"], []).append({"period": row["period"], "count": row["count"]})
+        return result
@@ -0,0 +1,81 @@
+"""
+Storage Sharding
+Stable key -> shard routing and the per-shard collection set used by
+ChromaDBManager when CHROMA_SHARDS > 1
+"""
+
+import hashlib
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import CHROMADB_PATH, COLLECTIONS
+
+
+def _key_hash(key: str) -> int:
+    # Python's hash() is salted per process; routing must agree across workers
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shard_for(key: str, shard_count: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach): growing from N to N+1 shards
+    moves only ~1/(N+1) of the keys, so rebalancing copies little data
+    """
+    if shard_count <= 1:
+        return 0
+    h = _key_hash(key)
+    b, j = -1, 0
+    while j < shard_count:
+        b = j
+        h = (h * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((h >> 33) + 1)))
+    return b
+
+
+def shard_path(index: int) -> Path:
+    """Shard 0 is the original CHROMADB_PATH so single-shard data needs no migration"""
+    if index == 0:
+        return CHROMADB_PATH
+    return CHROMADB_PATH.with_name(f"{CHROMADB_PATH.name}_shard{index}")
+
+
+def collection_name(key: str, index: int, mode: str) -> str:
+    """On a shared server shards are separate collections rather than directories"""
+    name = COLLECTIONS[key]
+    if mode == "http" and index > 0:
+        return f"{name}_shard{index}"
+    return name
+
+
+class StorageShard:
+    """
+    One shard: a client plus its companies, assessments and responses collections
+    (questions are not sharded; ChromaDBManager keeps them on shard 0's client)
+    """
+
+    def __init__(self, index: int, client, mode: str):
+        self.index = index
+        self.client = client
+        self.mode = mode
+        self.companies = None
+        self.assessments = None
+        self.responses = None
+
+    def initialize_collections(self):
+        """Create or get existing collections"""
+        self.companies = self.client.get_or_create_collection(
+            name=collection_name("companies", self.index, self.mode),
+            metadata={"description": "Stores company information"}
+        )
+        self.responses = self.client.get_or_create_collection(
+            name=collection_name("responses", self.index, self.mode),
+            metadata={"description": "Stores user responses"}
+        )
+        self.assessments = self.client.get_or_create_collection(
+            name=collection_name("assessments", self.index, self.mode),
+            metadata={"description": "Stores complete assessments"}
+        )
+
+    def collection(self, key: str):
+        return getattr(self, key)
@@ -0,0 +1,62 @@
+"""
+Bulk Export Script
+Streams all assessments (company info, answers and scores) to a file
+without loading the whole dataset into memory
+
+Usage:
+    python export_assessments.py --format csv --output assessments.csv
+    python export_assessments.py --format ndjson --status all > assessments.ndjson
+    python export_assessments.py --format csv --since 2024-05-01 --until 2024-06-01 --output may.csv
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from database.chromadb_manager import ChromaDBManager
+from database.index_store import to_epoch
+from questionnaire.schema_registry import SchemaRegistry
+from utils.exporter import EXPORT_FORMATS, export_stream
+from config import EXPORT_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export assessments as NDJSON, CSV or Parquet")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--output", help="Output file (defaults to stdout)")
+    parser.add_argument("--status", default="completed", help="Assessment status to export, or 'all'")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--since", help="Only assessments completed at or after this ISO date/time")
+    parser.add_argument("--until", help="Only assessments completed before this ISO date/time")
+    args = parser.parse_args()
+    try:
+        to_epoch(args.since), to_epoch(args.until)
+    except ValueError as e:
+        parser.error(str(e))
+
+    db = ChromaDBManager()
+    registry = SchemaRegistry()
+    question_ids = registry.active.compiled.question_ids
+    status = None if args.status == "all" else args.status
+
+    stream = export_stream(db, registry, question_ids, export_format=args.format,
+                           status=status, batch_size=args.batch_size,
+                           completed_from=args.since, completed_to=args.until)
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    total_bytes = 0
+    try:
+        for chunk in stream:
+            out.write(chunk)
+            total_bytes += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"[✓] Exported {total_bytes:,} bytes ({args.format})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Synthetic Data Generator
+Fills the database with realistic companies, assessments and responses for
+scale testing, deterministically for a given seed
+
+Generation runs in worker processes, chunk by chunk; writes go through the
+bulk storage methods from a pool of writer threads. The printed digest only
+depends on the seed and options, so two runs can be compared without
+diffing the database.
+
+Usage:
+    python generate_data.py --companies 10000 --seed 7
+    python generate_data.py --companies 1000000 --workers 8 --writers 4 --chunk-size 2000
+    python generate_data.py --print-distribution > distribution.json
+    python generate_data.py --companies 500 --distribution distribution.json --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dt_time
+from multiprocessing import Pool
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from questionnaire.schema_registry import SchemaRegistry
+from utils.synthetic import DEFAULT_DISTRIBUTION, chunk_digest, generate_chunk, load_distribution, write_chunk
+from config import IMPORT_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic assessment data for scale testing")
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--seed", default="42", help="Same seed, same data (ids included)")
+    parser.add_argument("--assessments-per-company", type=float, default=1.5, help="Mean; each company has at least one")
+    parser.add_argument("--days", type=int, default=365, help="Spread sign-ups and assessments over this many days")
+    parser.add_argument("--end-date", help="Last day of the window, YYYY-MM-DD (default: today)")
+    parser.add_argument("--distribution", help="JSON file overriding the answer distributions (see --print-distribution)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Companies per generation chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Generator processes")
+    parser.add_argument("--writers", type=int, default=2, help="Concurrent bulk writers")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--source", default="synthetic", help="Recorded on each generated assessment")
+    parser.add_argument("--dry-run", action="store_true", help="Generate and report without writing")
+    parser.add_argument("--print-distribution", action="store_true", help="Print the default distributions and exit")
+    args = parser.parse_args()
+
+    if args.print_distribution:
+        print(json.dumps(DEFAULT_DISTRIBUTION, indent=2))
+        return
+    if args.companies < 1 or args.chunk_size < 1 or args.workers < 1 or args.writers < 1:
+        parser.error("--companies, --chunk-size, --workers and --writers must be positive")
+
+    try:
+        distribution = load_distribution(args.distribution)
+    except (OSError, ValueError) as e:
+        parser.error(f"--distribution: {e}")
+
+    # The end of the window is fixed by --end-date, never by the clock, when reproducing a run
+    end_day = datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else datetime.now().date()
+    end = datetime.combine(end_day, dt_time(23, 59, 59))
+
+    active = SchemaRegistry().active
+    tasks = [
+        {
+            "chunk": index,
+            "start": start,
+            "count": min(args.chunk_size, args.companies - start),
+            "seed": args.seed,
+            "distribution": distribution,
+            "schema": active.schema,
+            "schema_version": active.version,
+            "max_score": active.max_score,
+            "end": end.isoformat(),
+            "days": args.days,
+            "assessments_per_company": args.assessments_per_company,
+            "source": args.source
+        }
+        for index, start in enumerate(range(0, args.companies, args.chunk_size))
+    ]
+
+    db = None
+    if not args.dry_run:
+        # Imported lazily so --dry-run works without the database dependencies
+        from database.chromadb_manager import ChromaDBManager
+        db = ChromaDBManager()
+
+    print(f"[*] Generating {args.companies} companies (seed {args.seed}, schema {active.version}, "
+          f"{len(tasks)} chunks){' (dry run)' if args.dry_run else ''}...")
+    totals = {"companies": 0, "assessments": 0, "responses": 0}
+    totals_lock = threading.Lock()
+    digest = hashlib.sha256()
+    # Bounds generated-but-unwritten chunks so memory stays flat at any scale
+    in_flight = threading.BoundedSemaphore(args.writers * 2)
+    started = time.perf_counter()
+
+    def write(chunk):
+        try:
+            counts = write_chunk(db, chunk, args.batch_size)
+            with totals_lock:
+                for key, value in counts.items():
+                    totals[key] += value
+        finally:
+            in_flight.release()
+
+    pool = Pool(args.workers) if args.workers > 1 else None
+    chunks = pool.imap(generate_chunk, tasks) if pool else map(generate_chunk, tasks)
+    futures = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.writers, thread_name_prefix="writer") as writers:
+            for done, chunk in enumerate(chunks, 1):
+                digest.update(chunk_digest(chunk))
+                if args.dry_run:
+                    for key in totals:
+                        totals[key] += len(chunk[key])
+                else:
+                    in_flight.acquire()
+                    futures.append(writers.submit(write, chunk))
+                    # Surface write errors early instead of after generating everything
+                    for future in [f for f in futures if f.done()]:
+                        future.result()
+                        futures.remove(future)
+                if done % 10 == 0 or done == len(tasks):
+                    print(f"    {done}/{len(tasks)} chunks generated")
+            for future in futures:
+                future.result()
+    finally:
+        if pool:
+            pool.terminate()
+
+    elapsed = time.perf_counter() - started
+    print(f"[✓] Companies:   {totals['companies']}")
+    print(f"[✓] Assessments: {totals['assessments']}")
+    print(f"[✓] Responses:   {totals['responses']}")
+    print(f"[✓] Digest:      {digest.hexdigest()[:16]}")
+    print(f"[✓] Done in {elapsed:.1f}s ({totals['companies'] / elapsed:.0f} companies/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Bulk Import Script
+Imports offline assessments from an XLSX or CSV file in batches
+
+Usage:
+    python import_assessments.py --template offline_template.csv
+    python import_assessments.py answers.xlsx --sheet Responses --errors errors.csv
+    python import_assessments.py answers.csv --dry-run
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from questionnaire.schema_registry import SchemaRegistry
+from utils.importer import iter_rows, import_rows, write_template
+from config import IMPORT_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import offline assessments from XLSX/CSV")
+    parser.add_argument("file", nargs="?", help="Path to the .xlsx or .csv file")
+    parser.add_argument("--sheet", help="Worksheet name (XLSX only, defaults to the first sheet)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Validate without writing")
+    parser.add_argument("--errors", help="Write every rejected row to this CSV file")
+    parser.add_argument("--results", help="Write every imported row's assessment id and score to this CSV file")
+    parser.add_argument("--template", help="Write an empty CSV template with the expected columns and exit")
+    args = parser.parse_args()
+
+    # Same source resolution as the API, so imports are pinned to the version it serves
+    active = SchemaRegistry().active
+    compiled = active.compiled
+
+    if args.template:
+        write_template(args.template, compiled)
+        print(f"[✓] Template written to {args.template}")
+        return
+    if not args.file:
+        parser.error("file is required unless --template is given")
+
+    # Imported lazily so --template works without the database dependencies
+    from database.chromadb_manager import ChromaDBManager
+
+    db = None if args.dry_run else ChromaDBManager()
+    scorer = active.scorer
+
+    error_file = open(args.errors, "w", newline="", encoding="utf-8") if args.errors else None
+    result_file = open(args.results, "w", newline="", encoding="utf-8") if args.results else None
+    error_writer = csv.writer(error_file) if error_file else None
+    result_writer = None
+    if result_file:
+        result_writer = csv.DictWriter(result_file, fieldnames=["row", "company_name", "assessment_id", "total_score", "maturity_label"])
+        result_writer.writeheader()
+    if error_writer:
+        error_writer.writerow(["row", "errors"])
+
+    print(f"[*] Importing {args.file}{' (dry run)' if args.dry_run else ''}...")
+    try:
+        report = import_rows(
+            db, scorer, compiled,
+            iter_rows(args.file, args.file, sheet_name=args.sheet),
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            source=f"import:{Path(args.file).name}",
+            on_error=(lambda row, errors: error_writer.writerow([row, " | ".join(errors)])) if error_writer else None,
+            on_result=result_writer.writerow if result_writer else None
+        )
+    finally:
+        for f in (error_file, result_file):
+            if f:
+                f.close()
+
+    print(f"[✓] Rows read: {report.total_rows}")
+    print(f"[✓] Imported:  {report.imported}")
+    print(f"[!] Rejected:  {report.failed}")
+    for label, count in sorted(report.maturity_distribution.items()):
+        print(f"    {label}: {count}")
+    if report.failed and not error_writer:
+        for error in report.errors[:20]:
+            print(f"    Row {error['row']}: {'; '.join(error['errors'])}")
+
+
+if __name__ == "__main__":
+    main()
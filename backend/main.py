@@ -3,14 +3,18 @@ FastAPI Backend for Cyber Resilience Assessment Platform
 Main application entry point
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Depends, Header, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+import secrets
+import asyncio
 import json
+import logging
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Union
-from datetime import datetime
+from typing import Any, List, Optional, Dict, Union
+from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
 import sys
 from pathlib import Path
@@ -20,6 +24,8 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -28,12 +34,85 @@ os.environ["ANONYMIZED_TELEMETRY"] = "False"
 os.environ["CHROMA_SERVER_NO_INTERACTIVE_AUTH"] = "True"
 
 from database.chromadb_manager import ChromaDBManager
-from questionnaire.questionnaire_schema import get_questionnaire_schema, get_question_count
-from utils.scoring import ResilienceScorer
+from database.index_store import to_epoch
+from questionnaire.schema_registry import SchemaRegistry, SchemaVersion
+from utils.report_generator import ReportGenerator
+from utils.exporter import EXPORT_FORMATS, export_stream
+from utils.analytics import result_row, maturity_report, score_report, answer_report, cohort_report
+from utils.answer_index import AnswerIndex, compile_query
+from utils.peer_stats import PeerStats
+from utils.company_identity import identity_key, email_domain, is_free_mail
+from utils.company_history import history_report, delta_report
+from utils.company_search import search as search_companies
+from utils.importer import iter_rows, import_rows
+from utils.json_codec import FastJSONResponse, dumps_bytes
+from utils.draft_store import create_draft_store
+from utils.metrics import REGISTRY, MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, timed
+from utils.tracing import TRACER, TracedRoute, TracingMiddleware
+from utils.profiler import SamplingProfiler, MemoryProfiler, ProfilerMiddleware
+from utils.traffic_capture import TrafficRecorder, TrafficCaptureMiddleware
+from utils.wire_format import decode_body, encode_msgpack, wants_msgpack, MSGPACK_MEDIA_TYPE
+from config import EMAIL_ATTACH_PDF, ADMIN_API_TOKEN, SCHEMA_RELOAD_INTERVAL, LIST_DEFAULT_PAGE_SIZE, LIST_MAX_PAGE_SIZE
+from config import DRAFT_STORAGE, DRAFT_SWEEP_INTERVAL, METRICS_ENABLED, PROFILER_INTERVAL_MS, PEER_STATS_REFRESH_INTERVAL
+from config import TRAFFIC_CAPTURE_ENABLED, TRAFFIC_CAPTURE_SALT, TRACING_ENABLED
+from config import COMPANY_SIZES, INDUSTRIES, STATES, COMPANY_IDENTITY_RESOLUTION, KEEP_UNMATCHED_ANSWERS
+
+# Load the questionnaire: newest file in SCHEMA_DIR, QUESTIONNAIRE_WORKBOOK, or the built-in schema.
+# Each version carries its own compiled schema and scorer and is swapped in atomically on change.
+schema_registry = SchemaRegistry()
 
-# Initialize database and scorer
+# Initialize database
 db = ChromaDBManager()
-scorer = ResilienceScorer()
+report_generator = ReportGenerator()
+
+# Admin-triggered profiling; idle (no sampler thread, no tracemalloc) until started
+profiler = SamplingProfiler()
+memory_profiler = MemoryProfiler()
+
+# Bitmaps of scored assessments per answer option, loaded on the first cohort query
+answer_index = AnswerIndex(db.index)
+
+# "X% of your industry chose this" snapshot for the questionnaire page
+peer_stats = PeerStats(db, schema_registry)
+
+# In-progress answers: autosaves land here and reach ChromaDB once, at submit
+draft_store = create_draft_store()
+
+# Anonymized request traces for benchmarks/replay_traffic.py (off unless enabled)
+traffic_recorder = TrafficRecorder() if TRAFFIC_CAPTURE_ENABLED else None
+
+def sync_questions(version: SchemaVersion):
+    """Reload the questions collection when it does not match the schema version"""
+    schema = version.schema
+    expected_count = version.artifact["question_count"]
+    
+    # Check if we need to reload
+    existing_questions = db.get_all_questions()
+    current_count = len(existing_questions) if existing_questions else 0
+    stored_versions = {q["metadata"].get("schema_version", "") for q in existing_questions or []}
+    
+    if current_count == expected_count and stored_versions == {version.version}:
+        print(f"[OK] Questions already loaded ({current_count} questions)")
+        return
+    
+    print(f"[!] Questions out of date: DB has {current_count}, schema {version.version} has {expected_count}")
+    print("[*] Replacing questions...")
+    
+    # Upsert + delete-stale instead of clear-and-reload, so concurrent workers converge
+    question_data = []
+    for section_name, questions in schema.items():
+        for idx, question in enumerate(questions):
+            question_data.append({
+                "section": section_name,
+                "question_text": question["question_text"],
+                "question_type": question["question_type"],
+                "order": idx,
+                "required": question.get("required", True)
+            })
+    db.replace_questions(question_data, version.version)
+    print(f"[✓] Loaded {expected_count} questions from schema")
+
+schema_registry.add_listener(sync_questions)
 
 # Lifespan event handler (replaces deprecated on_event)
 @asynccontextmanager
@@ -42,62 +121,73 @@ async def lifespan(app: FastAPI):
     print("[*] Starting Cyber Resilience Assessment API...")
     print("[*] Initializing ChromaDB...")
     
-    # FORCE RELOAD: Always reload questions from schema
-    print("[*] Loading questionnaire from schema...")
-    schema = get_questionnaire_schema()
-    expected_count = get_question_count()
+    active = schema_registry.active
+    print(f"[*] Loading questionnaire from schema ({active.artifact['source_file']}, version {active.version})...")
+    sync_questions(active)
     
-    # Check if we need to reload
-    existing_questions = db.get_all_questions()
-    current_count = len(existing_questions) if existing_questions else 0
+    # Pick up new schema versions without a restart
+    watcher = None
+    if SCHEMA_RELOAD_INTERVAL > 0:
+        watcher = asyncio.create_task(schema_registry.watch(SCHEMA_RELOAD_INTERVAL))
+        print(f"[*] Watching {schema_registry.schema_dir} for schema changes every {SCHEMA_RELOAD_INTERVAL:g}s")
     
-    if current_count != expected_count:
-        print(f"[!] Question count mismatch: DB has {current_count}, Schema has {expected_count}")
-        print("[*] Clearing old questions and reloading...")
-        
-        # Clear old questions
-        db.clear_questions()
-        
-        # Load new questions from schema
-        for section_name, questions in schema.items():
-            for idx, question in enumerate(questions):
-                question_data = {
-                    "section": section_name,
-                    "question_text": question["question_text"],
-                    "question_type": question["question_type"],
-                    "order": idx,
-                    "required": question.get("required", True)
-                }
-                db.add_question(question_data)
-        print(f"[✓] Loaded {expected_count} questions from schema")
-    else:
-        print(f"[OK] Questions already loaded ({current_count} questions)")
+    draft_sweeper = None
+    if DRAFT_SWEEP_INTERVAL > 0:
+        draft_sweeper = asyncio.create_task(draft_store.run_sweeper(DRAFT_SWEEP_INTERVAL))
+    if db.mode == "http" and DRAFT_STORAGE == "memory":
+        print("[!] DRAFT_STORAGE=memory keeps drafts per worker; with several workers autosaves "
+              "and submits of one assessment can see different drafts. Use DRAFT_STORAGE=sqlite")
+    
+    if db.index.scored_assessments() == 0 and db.index.page_assessments(1, status="completed")[0]:
+        print("[!] Analytics rollups are empty; run: python rebuild_analytics.py")
+    
+    peer_stats.refresh()
+    peer_refresher = None
+    if PEER_STATS_REFRESH_INTERVAL > 0:
+        peer_refresher = asyncio.create_task(peer_stats.run_refresher(PEER_STATS_REFRESH_INTERVAL))
     
     stats = db.get_statistics()
     print(f"[Stats] Questions: {stats['total_questions']}, Companies: {stats['total_companies']}, Assessments: {stats['total_assessments']}")
     print("[OK] API Ready!")
     
-    
-    # Print registered routes
-    print("\n[DEBUG] Registered Routes:")
     for route in app.routes:
         if hasattr(route, "path"):
-            print(f"  - {route.path} [{','.join(route.methods)}]")
-    print("----------------------------\n")
+            logger.debug("Registered route %s [%s]", route.path, ",".join(sorted(getattr(route, "methods", None) or [])))
     
     yield
     
     # Shutdown
     print("[*] Shutting down API...")
+    if watcher is not None:
+        watcher.cancel()
+    if draft_sweeper is not None:
+        draft_sweeper.cancel()
+    if peer_refresher is not None:
+        peer_refresher.cancel()
+    spilled = draft_store.spill_all()
+    if spilled:
+        print(f"[*] Saved {spilled} open drafts to {draft_store.spill_dir}")
+    profiler.stop()
+    if traffic_recorder is not None:
+        traffic_recorder.close()
+        print(f"[*] Traffic capture: {traffic_recorder.describe()}")
+    TRACER.shutdown()
+    report_generator.shutdown()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
     title="Cyber Resilience Assessment API",
     description="Backend API for SBA Info Solutions Cyber Resilience Assessment Platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson rendering for every endpoint that returns plain data
+    default_response_class=FastJSONResponse
 )
 
+# Before any route is declared: adds the request.validate span (body parsing, Pydantic)
+if TRACING_ENABLED:
+    app.router.route_class = TracedRoute
+
 
 # CORS middleware for React frontend
 app.add_middleware(
@@ -108,6 +198,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+if traffic_recorder is not None:
+    if not TRAFFIC_CAPTURE_SALT:
+        print("[!] TRAFFIC_CAPTURE_SALT is not set; hashes will differ between workers and restarts")
+    app.add_middleware(TrafficCaptureMiddleware, recorder=traffic_recorder)
+
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, tracer=TRACER)
+
+# Outermost, so latency includes CORS handling and error responses
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    REGISTRY.gauge_callback("drafts_in_memory", "Autosave drafts held in memory",
+                            draft_store.in_memory_count)
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     print(f"\n[Validation Error] {json.dumps(exc.errors(), indent=2)}")
@@ -116,6 +222,13 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors()},
     )
 
+def require_admin(x_admin_token: str = Header(default="")):
+    """Guard for admin endpoints: requires the ADMIN_API_TOKEN header value"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin API is disabled (ADMIN_API_TOKEN not set)")
+    if not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 # ========================================
 # PYDANTIC MODELS
 # ========================================
@@ -132,23 +245,40 @@ class CompanyInfo(BaseModel):
     company_size: Optional[str] = ""
     state: Optional[str] = ""
     additional_notes: Optional[str] = ""
+    # Answer to "same organisation as the earlier registration of this name?", asked when
+    # the contact email is a free-mail address (see create_company)
+    confirm_same_organisation: Optional[bool] = None
 
 class QuestionResponse(BaseModel):
     question_id: str
-    section: str
-    question_text: str
-    question_type: str
     answer: Union[str, List[str]]
     comment: Optional[str] = ""
+    # Derivable from question_id via the schema; still accepted from older clients but ignored
+    section: Optional[str] = None
+    question_text: Optional[str] = None
+    question_type: Optional[str] = None
 
 class Assessment(BaseModel):
     company_info: CompanyInfo
     responses: List[QuestionResponse]
 
+class DraftPatch(BaseModel):
+    # question_id -> option label(s), option index(es) or text; null clears the answer
+    answers: Dict[str, Optional[Union[int, str, List[Union[int, str]]]]] = {}
+    # question_id -> comment; null or "" clears it
+    comments: Dict[str, Optional[str]] = {}
+
 class AssessmentSubmit(BaseModel):
     assessment_id: str
     company_info: CompanyInfo
-    responses: Dict[str, List[QuestionResponse]]
+    # May be empty when the answers were autosaved as a draft
+    responses: Dict[str, List[QuestionResponse]] = {}
+    # Version the client loaded; the version stored on the assessment takes precedence
+    schema_version: Optional[str] = None
+
+class CohortQuery(BaseModel):
+    # {"question_id", "option" | "options"} terms, combined with {"and": [...]}, {"or": [...]}, {"not": ...}
+    where: Dict[str, Any]
 
 # ========================================
 # API ENDPOINTS
@@ -164,6 +294,17 @@ async def root():
         "version": "1.0.0"
     }
 
+@app.get("/api/health")
+async def health_check():
+    """Readiness probe: checks the storage backend as well as the API process"""
+    storage = await run_in_threadpool(db.health_check)
+    body = {
+        "status": "ok" if storage["status"] == "ok" else "degraded",
+        "storage": storage,
+        "schema_version": schema_registry.active.version
+    }
+    return JSONResponse(status_code=200 if storage["status"] == "ok" else 503, content=body)
+
 @app.get("/api/config")
 async def get_config():
     """Get application configuration"""
@@ -179,84 +320,47 @@ async def get_config():
             "background": "#000000",
             "card_bg": "#1a1a1a"
         },
-        "company_sizes": [
-            "1-50 employees",
-            "51-200 employees",
-            "201-500 employees",
-            "501-1000 employees",
-            "1001-5000 employees",
-            "5000+ employees"
-        ],
-        "industries": [
-            "Banking & Financial Services",
-            "Insurance",
-            "Healthcare",
-            "Government",
-            "Energy & Utilities",
-            "Telecommunications",
-            "Manufacturing",
-            "Retail & E-commerce",
-            "Technology",
-            "Transportation & Logistics",
-            "Education",
-            "Other"
-        ],
-        "states": [
-            "Andhra Pradesh",
-            "Arunachal Pradesh",
-            "Assam",
-            "Bihar",
-            "Chhattisgarh",
-            "Goa",
-            "Gujarat",
-            "Haryana",
-            "Himachal Pradesh",
-            "Jharkhand",
-            "Karnataka",
-            "Kerala",
-            "Madhya Pradesh",
-            "Maharashtra",
-            "Manipur",
-            "Meghalaya",
-            "Mizoram",
-            "Nagaland",
-            "Odisha",
-            "Punjab",
-            "Rajasthan",
-            "Sikkim",
-            "Tamil Nadu",
-            "Telangana",
-            "Tripura",
-            "Uttar Pradesh",
-            "Uttarakhand",
-            "West Bengal",
-            "Andaman and Nicobar Islands",
-            "Chandigarh",
-            "Dadra and Nagar Haveli and Daman and Diu",
-            "Delhi",
-            "Jammu and Kashmir",
-            "Ladakh",
-            "Lakshadweep",
-            "Puducherry"
-        ]
+        "company_sizes": COMPANY_SIZES,
+        "industries": INDUSTRIES,
+        "states": STATES
     }
 
+# Serialized schema bodies by version: a version's content never changes
+_schema_bodies: Dict[str, bytes] = {}
+
 @app.get("/api/questionnaire/schema")
-async def get_questionnaire():
-    """Get complete questionnaire schema"""
-    schema = get_questionnaire_schema()
-    total_questions = get_question_count()
+async def get_questionnaire(version: Optional[str] = None):
+    """Get complete questionnaire schema (the active version unless one is requested)"""
+    schema_version = schema_registry.active
+    if version:
+        schema_version = schema_registry.get(version)
+        if schema_version is None:
+            raise HTTPException(status_code=404, detail="Schema version not found")
     
-    return {
-        "total_questions": total_questions,
-        "sections": list(schema.keys()),
-        "schema": schema
-    }
+    body = _schema_bodies.get(schema_version.version)
+    if body is None:
+        schema = schema_version.schema
+        body = dumps_bytes({
+            "version": schema_version.version,
+            "total_questions": schema_version.artifact["question_count"],
+            "sections": list(schema.keys()),
+            "schema": schema
+        })
+        _schema_bodies[schema_version.version] = body
+    return Response(content=body, media_type="application/json")
+
+@app.get("/api/questionnaire/peer-stats")
+async def get_peer_stats(industry: Optional[str] = None):
+    """
+    Share of organisations (in the industry, when it has enough submissions)
+    that chose each option, as percentages per question_id and option label
+    """
+    return Response(content=peer_stats.body(industry), media_type="application/json")
 
 @app.get("/api/questionnaire/sections")
 async def get_sections():
     """Get list of all sections"""
-    schema = get_questionnaire_schema()
+    schema = schema_registry.active.schema
     sections = []
     
     for section_name, questions in schema.items():
@@ -269,44 +373,168 @@ async def get_sections():
 
 @app.post("/api/company/create")
 async def create_company(company: CompanyInfo):
-    """Create a new company and start assessment"""
+    """
+    Create a new company (or find the organisation's earlier registration) and start assessment
+    
+    A free-mail contact address can't identify the organisation, so a registration from
+    one is only linked by name when confirm_same_organisation is true. While it is unset,
+    409 asks every free-mail registrant for that confirmation, whether or not the name is
+    on file. The response never says whether an earlier registration was found, so this
+    public endpoint can't be used to probe which organisations have registered.
+    """
     try:
-        # Save company to database
         company_data = company.dict()
-        company_id = db.add_company(company_data)
+        confirmed = company_data.pop("confirm_same_organisation")
+        # Repeat registrations keep the first company_id, so their assessments form one history
+        company_id = None
+        if COMPANY_IDENTITY_RESOLUTION:
+            key = identity_key(company.company_name, company.contact_email)
+            if key:
+                company_id = db.find_company(key)
+            elif is_free_mail(email_domain(company.contact_email)):
+                if confirmed is None:
+                    raise HTTPException(status_code=409, detail={
+                        "needs_confirmation": True,
+                        "message": (f"A personal email address doesn't tell us which organisation you "
+                                    f"represent. Has '{company.company_name}' completed this assessment before?")
+                    })
+                if confirmed:
+                    company_id = db.find_company_by_name(company.company_name)
+        if company_id is None:
+            company_id = db.add_company(company_data)
         
-        # Create assessment
-        assessment_id = db.create_assessment(company_id)
+        # Create assessment, pinned to the questionnaire version being served; the details
+        # entered are kept with it, as a returning company's contact may have changed
+        schema_version = schema_registry.active.version
+        assessment_id = db.create_assessment(company_id, schema_version, registration=company_data)
         
         return {
             "success": True,
             "company_id": company_id,
             "assessment_id": assessment_id,
-            "message": "Company created and assessment started successfully"
+            "schema_version": schema_version,
+            "message": "Assessment started successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _store_answers(assessment_id: str, codes: Dict, comments: Dict[str, str]):
+    """Persist answers as compact (question_id, answer code, comment) records in one round trip"""
+    db.add_responses([
+        {"assessment_id": assessment_id, "question_id": q_id, "answer": code, "comment": comments.get(q_id, "")}
+        for q_id, code in codes.items()
+    ])
+
+def _encode_responses(compiled, responses: List[QuestionResponse]):
+    """
+    Answer codes and comments of full-form responses
+
+    Raises:
+        ValueError: listing every unknown question and, unless
+                    KEEP_UNMATCHED_ANSWERS, every answer that matches no option
+    """
+    codes, comments, errors = {}, {}, []
+    for r in responses:
+        try:
+            codes[r.question_id] = compiled.encode_answer(r.question_id, r.answer, KEEP_UNMATCHED_ANSWERS)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        comments[r.question_id] = r.comment or ""
+    if errors:
+        raise ValueError("; ".join(errors))
+    return codes, comments
+
+def _draft_version(assessment_id: str) -> SchemaVersion:
+    """
+    Schema version a draft is validated against. The assessment is only
+    read when the draft is created; later autosaves don't touch ChromaDB.
+    """
+    version = draft_store.schema_version(assessment_id)
+    if version:
+        return schema_registry.resolve(version)
+    assessment = db.get_assessment(assessment_id)
+    if not assessment:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    if assessment.get("status") == "completed":
+        raise HTTPException(status_code=409, detail="Assessment has already been submitted")
+    return schema_registry.resolve(assessment.get("schema_version"))
+
+def _draft_codes(compiled, answers: Dict) -> Dict:
+    """
+    Answer codes for a draft delta: option indexes and text as in compact
+    submissions, plus lists of option labels for multi-select questions
+
+    Raises:
+        ValueError: listing every invalid answer
+    """
+    label_lists = {
+        q_id: value for q_id, value in answers.items()
+        if isinstance(value, list) and value and all(isinstance(item, str) for item in value)
+    }
+    codes = compiled.compact_codes({q_id: value for q_id, value in answers.items() if q_id not in label_lists})
+    for q_id, labels in label_lists.items():
+        if q_id not in compiled.by_id:
+            raise ValueError(f"Unknown question '{q_id}'")
+        codes[q_id] = compiled.encode_answer(q_id, labels)
+    return codes
+
+@app.patch("/api/assessment/{assessment_id}/draft")
+async def patch_draft(assessment_id: str, delta: DraftPatch):
+    """
+    Autosave: merge per-question changes into the assessment's draft.
+    Nothing reaches ChromaDB until /api/assessment/submit.
+    """
+    schema_version = _draft_version(assessment_id)
+    compiled = schema_version.compiled
+    
+    cleared = [q_id for q_id, value in delta.answers.items() if value is None]
+    unknown = [q_id for q_id in cleared + list(delta.comments) if q_id not in compiled.by_id]
+    try:
+        if unknown:
+            raise ValueError("; ".join(f"Unknown question '{q_id}'" for q_id in unknown))
+        codes = _draft_codes(compiled, {q_id: value for q_id, value in delta.answers.items() if value is not None})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    summary = draft_store.apply(assessment_id, schema_version.version, codes, delta.comments, cleared)
+    return {"success": True, "schema_version": schema_version.version, **summary}
+
+@app.get("/api/assessment/{assessment_id}/draft")
+async def get_draft(assessment_id: str):
+    """Autosaved answers (as option labels) for resuming an assessment"""
+    draft = draft_store.get(assessment_id)
+    if draft is None:
+        raise HTTPException(status_code=404, detail="No draft for this assessment")
+    compiled = schema_registry.resolve(draft["schema_version"]).compiled
+    draft["answers"] = {q_id: compiled.decode_answer(q_id, code) for q_id, code in draft["answers"].items()}
+    return draft
+
+@app.delete("/api/assessment/{assessment_id}/draft")
+async def discard_draft(assessment_id: str):
+    """Throw away autosaved answers"""
+    return {"success": True, "discarded": draft_store.pop(assessment_id) is not None}
+
 @app.post("/api/responses/save")
 async def save_responses(assessment_id: str, responses: List[QuestionResponse]):
-    """Save assessment responses"""
+    """Save assessment responses to the draft; they are written to the database on submit"""
     try:
-        for response in responses:
-            response_data = {
-                "assessment_id": assessment_id,
-                "section": response.section,
-                "question_id": response.question_id,
-                "question_text": response.question_text,
-                "question_type": response.question_type,
-                "answer": response.answer,
-                "comment": response.comment or ""
-            }
-            db.add_response(response_data)
+        schema_version = _draft_version(assessment_id)
+        try:
+            codes, comments = _encode_responses(schema_version.compiled, responses)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        summary = draft_store.apply(assessment_id, schema_version.version, codes, comments, [])
         
         return {
             "success": True,
+            "revision": summary["revision"],
             "message": f"Saved {len(responses)} responses successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -316,47 +544,166 @@ async def submit_assessment(submission: AssessmentSubmit):
     try:
         assessment_id = submission.assessment_id
         
-        # Save all responses
-        all_responses = []
-        for section_responses in submission.responses.values():
-            all_responses.extend(section_responses)
+        assessment = db.get_assessment(assessment_id)
+        if not assessment:
+            raise HTTPException(status_code=404, detail="Assessment not found")
+        if assessment.get("status") == "completed":
+            raise HTTPException(status_code=409, detail="Assessment has already been submitted")
+        
+        # Score against the version the assessment started with, even if a newer one was rolled out since
+        schema_version = schema_registry.resolve(assessment.get("schema_version") or submission.schema_version)
+        compiled = schema_version.compiled
+        try:
+            submitted, submitted_comments = _encode_responses(
+                compiled, [r for section_responses in submission.responses.values() for r in section_responses]
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
         
-        # Save responses to database
-        for response in all_responses:
-            response_data = {
-                "assessment_id": assessment_id,
-                "section": response.section,
-                "question_id": response.question_id,
-                "question_text": response.question_text,
-                "question_type": response.question_type,
-                "answer": response.answer,
-                "comment": response.comment or ""
-            }
-            db.add_response(response_data)
+        # Autosaved draft first; answers in the submission win
+        draft = draft_store.pop(assessment_id)
+        codes = dict(draft["answers"]) if draft else {}
+        comments = dict(draft["comments"]) if draft else {}
+        codes.update(submitted)
+        comments.update(submitted_comments)
+        if not codes:
+            if draft:
+                draft_store.restore(draft)
+            raise HTTPException(status_code=400, detail="No answers submitted and no draft saved")
         
-        # Update assessment status
-        completed_sections = list(submission.responses.keys())
-        db.update_assessment_status(assessment_id, "completed", completed_sections)
+        try:
+            # One batch write per assessment
+            _store_answers(assessment_id, codes, comments)
+            
+            completed_sections = list(submission.responses.keys())
+            completed_sections += sorted({compiled.section_of[q_id] for q_id in codes if q_id in compiled.section_of}
+                                         - set(completed_sections))
+            db.update_assessment_status(assessment_id, "completed", completed_sections)
+        except Exception:
+            if draft:
+                draft_store.restore(draft)
+            raise
         
         # Calculate scores using new 12-question logic
         # We need to pass a dictionary of {question_id: answer} to the scorer
-        scoring_responses = {}
-        for r in all_responses:
-            scoring_responses[r.question_id] = r.answer
+        scoring_responses = {q_id: compiled.decode_answer(q_id, code) for q_id, code in codes.items()}
             
-        results = scorer.calculate_score(scoring_responses)
+        results = schema_version.scorer.calculate_score(scoring_responses)
+        if assessment.get("company_id"):
+            db.record_results([result_row(compiled, assessment_id, assessment["company_id"], scoring_responses, results)])
         
-        return {
+        # Plain JSON types already: skip FastAPI's jsonable_encoder pass over question_details
+        return FastJSONResponse({
             "success": True,
             "assessment_id": assessment_id,
+            "schema_version": schema_version.version,
             "results": results,
             "company_info": submission.company_info.dict()
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_compact_submission(payload) -> Dict:
+    """Shape check for the compact body; answers themselves are checked by CompiledSchema.compact_codes()"""
+    if not isinstance(payload, dict):
+        raise ValueError("Body must be an object")
+    if not isinstance(payload.get("assessment_id"), str) or not payload["assessment_id"]:
+        raise ValueError("assessment_id is required")
+    if not isinstance(payload.get("answers", {}), dict):
+        raise ValueError("answers must be a {question_id: value} object")
+    if payload.get("schema_version") is not None and not isinstance(payload["schema_version"], str):
+        raise ValueError("schema_version must be a string")
+    comments = payload.get("comments") or {}
+    if not isinstance(comments, dict) or not all(isinstance(c, str) for c in comments.values()):
+        raise ValueError("comments must be a {question_id: text} object")
+    return payload
+
+@app.post("/api/assessment/submit/compact")
+async def submit_assessment_compact(request: Request):
+    """
+    Submit answers as {question_id: option_index | [indexes] | text} for a
+    schema version, sent as JSON or MessagePack (by Content-Type).
+    The response is MessagePack when the Accept header asks for it.
+    
+    Body: {"assessment_id", "schema_version", "answers", "comments"?}
+    answers may be empty when they were autosaved to the draft.
+    """
+    try:
+        payload = _parse_compact_submission(decode_body(await request.body(), request.headers.get("content-type", "")))
+    except (LookupError, RuntimeError) as e:
+        # Unknown media type, or MessagePack without msgpack installed
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    assessment_id = payload["assessment_id"]
+    assessment = db.get_assessment(assessment_id)
+    if not assessment:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    if assessment.get("status") == "completed":
+        raise HTTPException(status_code=409, detail="Assessment has already been submitted")
+    
+    # Option indexes only mean something for the version they were taken from
+    schema_version = schema_registry.resolve(assessment.get("schema_version") or payload.get("schema_version"))
+    if payload.get("schema_version") and payload["schema_version"] != schema_version.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Answers index schema version {payload['schema_version']} but the assessment uses {schema_version.version}"
+        )
+    compiled = schema_version.compiled
+    
+    try:
+        submitted = compiled.compact_codes(payload.get("answers") or {})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    # Autosaved draft first; answers in the submission win
+    draft = draft_store.pop(assessment_id)
+    codes = dict(draft["answers"]) if draft else {}
+    codes.update(submitted)
+    comments = dict(draft["comments"]) if draft else {}
+    comments.update(payload.get("comments") or {})
+    if not codes:
+        if draft:
+            draft_store.restore(draft)
+        raise HTTPException(status_code=400, detail="No answers submitted and no draft saved")
+    
+    try:
+        try:
+            _store_answers(assessment_id, codes, comments)
+            completed_sections = sorted({compiled.section_of[q_id] for q_id in codes if q_id in compiled.section_of})
+            db.update_assessment_status(assessment_id, "completed", completed_sections)
+        except Exception:
+            if draft:
+                draft_store.restore(draft)
+            raise
+        
+        answers = {q_id: compiled.decode_answer(q_id, code) for q_id, code in codes.items()}
+        results = schema_version.scorer.calculate_score(answers)
+        if assessment.get("company_id"):
+            db.record_results([result_row(compiled, assessment_id, assessment["company_id"], answers, results)])
+        company = db.get_company(assessment.get("company_id", "")) or {}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    body = {
+        "success": True,
+        "assessment_id": assessment_id,
+        "schema_version": schema_version.version,
+        "results": results,
+        "company_info": company
+    }
+    if wants_msgpack(request.headers.get("accept", "")):
+        try:
+            return Response(content=encode_msgpack(body), media_type=MSGPACK_MEDIA_TYPE)
+        except RuntimeError:
+            pass  # msgpack unavailable: fall back to JSON
+    return FastJSONResponse(body)
+
 @app.get("/api/assessment/{assessment_id}")
 async def get_assessment(assessment_id: str):
     """Get assessment details"""
@@ -365,24 +712,409 @@ async def get_assessment(assessment_id: str):
         if not assessment:
             raise HTTPException(status_code=404, detail="Assessment not found")
         
-        responses = db.get_responses_by_assessment(assessment_id)
+        # Stored records hold answer codes; text comes from the version the assessment is pinned to
+        compiled = schema_registry.resolve(assessment.get("schema_version")).compiled
+        responses = [compiled.expand_response(r) for r in db.get_responses_by_assessment(assessment_id)]
         
-        return {
+        # Decoded documents are plain JSON types; render them without the jsonable_encoder pass
+        return FastJSONResponse({
             "assessment": assessment,
             "responses": responses
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.get("/api/stats")
 async def get_statistics():
     """Get database statistics"""
     try:
         stats = db.get_statistics()
+        stats["drafts"] = draft_store.describe()
+        if traffic_recorder is not None:
+            stats["traffic_capture"] = traffic_recorder.describe()
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ========================================
+# ADMIN ENDPOINTS
+# ========================================
+
+@app.get("/api/admin/export", dependencies=[Depends(require_admin)])
+async def export_assessments(
+    format: str = "ndjson",
+    status: Optional[str] = "completed",
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    """Stream assessments with company info, answers and scores, optionally only those completed in [start, end)"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}")
+    try:
+        # Validate before streaming starts; errors mid-stream can't change the status code
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        stream = export_stream(db, schema_registry, schema_registry.active.compiled.question_ids, export_format=format,
+                               status=status or None, completed_from=start_ts, completed_to=end_ts)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    spec = EXPORT_FORMATS[format]
+    filename = f"assessments_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{spec['extension']}"
+    return StreamingResponse(
+        stream,
+        media_type=spec["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.post("/api/admin/import", dependencies=[Depends(require_admin)])
+async def import_assessments(
+    file: UploadFile = File(...),
+    sheet: Optional[str] = None,
+    dry_run: bool = False
+):
+    """Bulk import offline assessments from an XLSX or CSV upload"""
+    active = schema_registry.active
+    
+    def _run_import():
+        rows = iter_rows(file.file, file.filename or "", sheet_name=sheet)
+        return import_rows(db, active.scorer, active.compiled, rows, dry_run=dry_run, source=f"import:{file.filename}")
+    
+    try:
+        # Parsing and batched writes are blocking; keep them off the event loop
+        report = await run_in_threadpool(_run_import)
+    except (ValueError, RuntimeError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {"success": True, "dry_run": dry_run, **report.to_dict()}
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """`fields=a,b,c` projection parameter"""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+@app.get("/api/admin/companies", dependencies=[Depends(require_admin)])
+async def list_companies(
+    limit: int = Query(LIST_DEFAULT_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    industry: Optional[str] = None
+):
+    """Cursor-paginated companies ordered by created_at; pass next_cursor back to continue"""
+    try:
+        page = await run_in_threadpool(db.list_companies, limit, cursor, _parse_fields(fields), order == "desc", industry)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"limit": limit, "order": order, **page}
+
+@app.get("/api/admin/assessments", dependencies=[Depends(require_admin)])
+async def list_assessments(
+    limit: int = Query(LIST_DEFAULT_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    status: Optional[str] = None,
+    company_id: Optional[str] = None
+):
+    """Cursor-paginated assessments ordered by created_at, optionally filtered by status or company"""
+    try:
+        page = await run_in_threadpool(
+            db.list_assessments, limit, cursor, _parse_fields(fields), order == "desc", status, company_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"limit": limit, "order": order, **page}
+
+@app.get("/api/admin/companies/search", dependencies=[Depends(require_admin)])
+async def search_company_names(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(LIST_DEFAULT_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
+    """Companies whose name or contact email domain resembles `q` (prefixes and misspellings match), best first"""
+    try:
+        result = await run_in_threadpool(search_companies, db, q, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"q": q, "limit": limit, "offset": offset, **result}
+
+@app.get("/api/admin/companies/{company_id}/history", dependencies=[Depends(require_admin)])
+async def get_company_history(company_id: str):
+    """Scored assessments of the organisation (all its registrations), oldest first, with score changes"""
+    report = await run_in_threadpool(history_report, db, company_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return report
+
+@app.get("/api/admin/assessments/{assessment_id}/delta/{other_assessment_id}", dependencies=[Depends(require_admin)])
+async def get_assessment_delta(assessment_id: str, other_assessment_id: str):
+    """Total score, maturity and per-question changes from one scored assessment to the other"""
+    try:
+        return await run_in_threadpool(
+            delta_report, db, schema_registry.active.compiled, assessment_id, other_assessment_id
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/api/admin/assessments/range", dependencies=[Depends(require_admin)])
+async def list_assessments_in_range(
+    field: str = Query("completed", pattern="^(created|completed)$"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    status: Optional[str] = None
+):
+    """Assessments created/completed in [start, end) (ISO-8601 or epoch seconds), cursor-paginated by that time"""
+    try:
+        page = await run_in_threadpool(
+            db.list_assessments_between, field, start, end, limit, cursor, _parse_fields(fields), order == "desc", status
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"field": field, "start": start, "end": end, "limit": limit, "order": order, **page}
+
+def _parse_answer_code(value: str):
+    """Index rows hold answer codes as text: "2" -> 2, '["a", "b"]' -> list, labels unchanged"""
+    if value.isdigit():
+        return int(value)
+    if value.startswith("["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+@app.get("/api/admin/responses", dependencies=[Depends(require_admin)])
+async def list_responses_in_range(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    since_minutes: Optional[float] = Query(None, gt=0),
+    limit: int = Query(LIST_DEFAULT_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    assessment_id: Optional[str] = None
+):
+    """Responses saved in [start, end), or in the last `since_minutes` (e.g. 60 for the last hour)"""
+    if since_minutes is not None:
+        start = (datetime.now() - timedelta(minutes=since_minutes)).isoformat()
+    
+    def _decoded_page():
+        page = db.list_responses_between(start, end, limit, cursor, order == "desc", assessment_id)
+        versions = db.index.assessment_versions([item["assessment_id"] for item in page["items"]])
+        for item in page["items"]:
+            compiled = schema_registry.resolve(versions.get(item["assessment_id"])).compiled
+            if compiled.options.get(item["question_id"]):
+                item["answer"] = compiled.decode_answer(item["question_id"], _parse_answer_code(item["answer"]))
+            item["section"] = compiled.section_of.get(item["question_id"], "")
+        return page
+    
+    try:
+        # The version lookup is a SQLite query too: keep it and the decoding off the event loop
+        page = await run_in_threadpool(_decoded_page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"start": start, "end": end, "limit": limit, "order": order, **page}
+
+@app.get("/api/admin/activity", dependencies=[Depends(require_admin)])
+async def get_activity(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    granularity: str = Query("day", pattern="^(hour|day|month)$")
+):
+    """Assessments created/completed and responses saved per period (defaults to the last 30 days)"""
+    end = end or datetime.now().isoformat()
+    start = start or (datetime.now() - timedelta(days=30)).isoformat()
+    try:
+        activity = await run_in_threadpool(db.get_activity, start, end, granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"start": start, "end": end, "granularity": granularity, **activity}
+
+# ========================================
+# ANALYTICS (pre-aggregated rollups)
+# ========================================
+
+MONTH_PATTERN = "^[0-9]{4}-(0[1-9]|1[0-2])$"
+
+def analytics_filters(
+    industry: Optional[str] = None,
+    company_size: Optional[str] = None,
+    state: Optional[str] = None,
+    start: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First completion month, YYYY-MM"),
+    end: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last completion month, YYYY-MM")
+) -> Dict:
+    """Cohort and completion-month filters shared by the analytics endpoints"""
+    return {
+        "cohort": {"industry": industry, "company_size": company_size, "state": state},
+        "start": start,
+        "end": end
+    }
+
+@app.get("/api/analytics/maturity", dependencies=[Depends(require_admin)])
+async def get_maturity_distribution(filters: Dict = Depends(analytics_filters)):
+    """Completed assessments per maturity level"""
+    report = await run_in_threadpool(maturity_report, db, filters["cohort"], filters["start"], filters["end"])
+    return {"filters": filters, **report}
+
+@app.get("/api/analytics/scores", dependencies=[Depends(require_admin)])
+async def get_score_breakdown(
+    group_by: str = Query("industry", pattern="^(industry|company_size|state|month)$"),
+    filters: Dict = Depends(analytics_filters)
+):
+    """Average total score by industry, company size, state or completion month"""
+    try:
+        report = await run_in_threadpool(score_report, db, group_by, filters["cohort"], filters["start"], filters["end"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"filters": filters, **report}
+
+@app.get("/api/analytics/answers", dependencies=[Depends(require_admin)])
+async def get_answer_frequency(question_id: Optional[str] = None, filters: Dict = Depends(analytics_filters)):
+    """How often each option was chosen, per question"""
+    report = await run_in_threadpool(
+        answer_report, db, schema_registry.active.compiled, filters["cohort"], filters["start"], filters["end"], question_id
+    )
+    return {"filters": filters, **report}
+
+@app.post("/api/analytics/cohort", dependencies=[Depends(require_admin)])
+async def query_cohort(
+    query: CohortQuery,
+    limit: int = Query(LIST_DEFAULT_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Scored assessments by answers, e.g. no immutability and an RTO of Days/Weeks:
+    {"where": {"and": [{"not": {"question_id": "q2", "options": ["Immutability + Air-gap", "Immutability + Tape"]}},
+                       {"question_id": "q1a", "option": "Days/Weeks"}]}}
+    """
+    try:
+        compiled_query = compile_query(query.where, schema_registry.active.compiled)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    report = await run_in_threadpool(cohort_report, db, answer_index, compiled_query, limit, offset)
+    return {"where": query.where, "limit": limit, "offset": offset, **report}
+
+@app.get("/api/admin/schema", dependencies=[Depends(require_admin)])
+async def get_schema_versions():
+    """Active questionnaire version and all versions assessments may be pinned to"""
+    return {
+        "active": schema_registry.active.describe(),
+        "versions": schema_registry.known_versions()
+    }
+
+@app.post("/api/admin/schema/reload", dependencies=[Depends(require_admin)])
+async def reload_schema(force: bool = False):
+    """Check the schema source now instead of waiting for the next poll"""
+    changed = await run_in_threadpool(schema_registry.reload, force)
+    return {"success": True, "changed": changed, "active": schema_registry.active.describe()}
+
+@app.post("/api/admin/profiler/start", dependencies=[Depends(require_admin)])
+async def start_profiler(
+    duration: float = Query(30, gt=0, description="Seconds before the session stops by itself"),
+    interval_ms: float = Query(None, description="Milliseconds between stack samples"),
+    request_rate: Optional[float] = Query(None, description="Sample only while this fraction of requests is in flight"),
+    path: str = Query("", description="With request_rate: only select requests under this path"),
+    include_idle: bool = False,
+    reset: bool = True
+):
+    """
+    Start a sampling session: a fixed window over all threads, or (with
+    request_rate) only while selected requests such as
+    path=/api/assessment/submit are being handled
+    """
+    try:
+        return profiler.start(duration, interval_ms or PROFILER_INTERVAL_MS, request_rate, path, include_idle, reset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/admin/profiler/stop", dependencies=[Depends(require_admin)])
+async def stop_profiler():
+    status = await run_in_threadpool(profiler.stop)
+    return dict(status, top_functions=profiler.top_functions())
+
+@app.get("/api/admin/profiler", dependencies=[Depends(require_admin)])
+async def get_profiler_status(top: int = Query(20, ge=1, le=200)):
+    return dict(profiler.status(), top_functions=profiler.top_functions(top))
+
+@app.get("/api/admin/profiler/collapsed", dependencies=[Depends(require_admin)])
+async def download_collapsed_stacks():
+    """Collapsed stacks of all sessions since the last reset (flamegraph.pl, speedscope, inferno)"""
+    return Response(
+        content=profiler.collapsed(),
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="profile-{datetime.now():%Y%m%d-%H%M%S}.collapsed"'}
+    )
+
+@app.post("/api/admin/profiler/memory/snapshot", dependencies=[Depends(require_admin)])
+async def take_memory_snapshot():
+    """Start tracemalloc (first call) and snapshot allocations; take one before and one after the load"""
+    return await run_in_threadpool(memory_profiler.snapshot)
+
+@app.get("/api/admin/profiler/memory", dependencies=[Depends(require_admin)])
+async def get_memory_growth(
+    include: str = Query("chromadb", description="Only allocations whose traceback passes through matching files"),
+    group_by: str = Query("lineno", description="lineno, filename or traceback"),
+    limit: int = Query(30, ge=1, le=500)
+):
+    """Allocation growth between the last two snapshots, largest first"""
+    try:
+        return await run_in_threadpool(memory_profiler.diff, include, group_by, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.delete("/api/admin/profiler/memory", dependencies=[Depends(require_admin)])
+async def stop_memory_profiler():
+    """Stop tracemalloc and drop its snapshots (tracing slows every allocation)"""
+    memory_profiler.stop()
+    return {"success": True}
+
+@app.get("/api/admin/traces", dependencies=[Depends(require_admin)])
+async def list_traces(
+    min_duration_ms: float = Query(0, ge=0, description="Only requests at least this slow"),
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """Exporter status and the recent traced requests of this process, slowest first"""
+    return dict(TRACER.status(), requests=TRACER.recent(min_duration_ms, limit))
+
+@app.get("/api/admin/traces/{trace_id}", dependencies=[Depends(require_admin)])
+async def get_trace(trace_id: str):
+    """Spans of a recent trace, by the id from the X-Trace-Id response header"""
+    spans = TRACER.get_trace(trace_id.lower())
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found (not sampled, handled by another worker, or expired)")
+    return {"trace_id": trace_id.lower(), "spans": spans}
+
 # Import email sender
 from utils.email_sender import send_assessment_email
 
@@ -390,16 +1122,110 @@ class EmailRequest(BaseModel):
     email: EmailStr
     company_name: str
     results: Dict
+    attach_pdf: Optional[bool] = None
+
+class ReportRequest(BaseModel):
+    company_name: str
+    results: Dict
 
 from fastapi import BackgroundTasks
 
+def _report_extras(results: Dict) -> Dict:
+    """Recommendations and summary text rendered alongside the scorecard"""
+    scorer = schema_registry.active.scorer
+    return {
+        "recommendations": scorer.generate_recommendations(results),
+        "summary": scorer.get_result_summary(results)
+    }
+
+@timed("email.send_with_report")
+def _send_email_with_report(to_email: str, company_name: str, results: Dict):
+    """Background task: reuse (or render once) the cached PDF, then send"""
+    attachment_path = None
+    try:
+        _, attachment_path = report_generator.get_or_render(company_name, results, **_report_extras(results))
+    except Exception as e:
+        print(f"[!] PDF report unavailable, sending email without attachment: {e}")
+    return send_assessment_email(to_email, company_name, results, attachment_path)
+
+def _range_file_response(path: Path, range_header: Optional[str], media_type: str, filename: str) -> Response:
+    """Serve a file honouring a single `Range: bytes=start-end` request"""
+    file_size = path.stat().st_size
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "private, max-age=86400"
+    }
+    
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    
+    start_str, _, end_str = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+        else:
+            # Suffix range: last N bytes
+            start = max(file_size - int(end_str), 0)
+            end = file_size - 1
+    except ValueError:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    
+    end = min(end, file_size - 1)
+    if start > end or start >= file_size:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+    
+    with open(path, "rb") as f:
+        f.seek(start)
+        content = f.read(end - start + 1)
+    
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    return Response(content=content, status_code=206, media_type=media_type, headers=headers)
+
+@app.post("/api/assessment/report")
+async def create_report(request: ReportRequest):
+    """Render (or reuse) the PDF scorecard and return its download URL"""
+    try:
+        report_id, _ = await report_generator.get_or_render_async(
+            request.company_name,
+            request.results,
+            **_report_extras(request.results)
+        )
+        return {
+            "success": True,
+            "report_id": report_id,
+            "download_url": f"/api/assessment/report/{report_id}.pdf"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/assessment/report/{report_id}.pdf")
+async def download_report(report_id: str, request: Request):
+    """Download a cached PDF scorecard (supports HTTP range requests)"""
+    if not report_id.isalnum():
+        raise HTTPException(status_code=400, detail="Invalid report id")
+    
+    path = report_generator.get_cached(report_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    return _range_file_response(
+        path,
+        request.headers.get("range"),
+        media_type="application/pdf",
+        filename="Cyber_Resilience_Scorecard.pdf"
+    )
+
 @app.post("/api/assessment/send-email")
 async def send_report_email(request: EmailRequest, background_tasks: BackgroundTasks):
     """Send assessment report via email (Background Task)"""
     try:
+        attach_pdf = EMAIL_ATTACH_PDF if request.attach_pdf is None else request.attach_pdf
+        
         # Send in background to avoid blocking the UI
         background_tasks.add_task(
-            send_assessment_email,
+            _send_email_with_report if attach_pdf else send_assessment_email,
             request.email,
             request.company_name,
             request.results
@@ -1,4 +1,5 @@
 """Questionnaire package initialization"""
 from .questionnaire_schema import get_questionnaire_schema, get_question_count
+from .compiled_schema import CompiledSchema, get_compiled_schema
 
-__all__ = ['get_questionnaire_schema', 'get_question_count']
+__all__ = ['get_questionnaire_schema', 'get_question_count', 'CompiledSchema', 'get_compiled_schema']
@@ -0,0 +1,268 @@
+"""
+Compiled Questionnaire Schema
+Precomputes per-question option lookups from the questionnaire schema so
+answers can be validated and normalized without scanning option lists,
+and encoded compactly for storage: single-select answers as the option
+index, multi-select answers as a bitset of option indexes
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.metrics import UNMATCHED_ANSWERS
+from .questionnaire_schema import get_questionnaire_schema
+
+# Separators accepted for multi-select answers supplied as a single string
+MULTI_SELECT_SEPARATORS = (";", "|", "\n")
+# Bitsets stay within the integers JSON consumers (JavaScript) represent exactly
+MAX_BITSET_OPTIONS = 53
+
+Answer = Union[str, List[str]]
+
+
+def _normalize_label(label: Any) -> str:
+    """Case- and whitespace-insensitive key for option matching"""
+    return " ".join(str(label).split()).casefold()
+
+
+def _is_blank(answer: Any) -> bool:
+    return answer is None or answer == [] or (isinstance(answer, str) and not answer.strip())
+
+
+def _is_index(value: Any, option_count: int) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < option_count
+
+
+def schema_hash(schema: Dict[str, List[Dict]]) -> str:
+    """Content hash identifying a questionnaire schema version"""
+    payload = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+class CompiledSchema:
+    """
+    Flattened, indexed view of a questionnaire schema
+    """
+
+    def __init__(self, schema: Dict[str, List[Dict]], version: Optional[str] = None):
+        self.schema = schema
+        self.version = version or schema_hash(schema)
+
+        self.questions: List[Dict] = []
+        self.by_id: Dict[str, Dict] = {}
+        self.section_of: Dict[str, str] = {}
+        self.options: Dict[str, List[str]] = {}
+        self.option_index: Dict[str, Dict[str, int]] = {}
+        self.id_by_text: Dict[str, str] = {}
+        self._lookup: Dict[str, Dict[str, str]] = {}
+
+        for section, questions in schema.items():
+            for q in questions:
+                q_id = q["question_id"]
+                self.questions.append(q)
+                self.by_id[q_id] = q
+                self.section_of[q_id] = section
+                self.id_by_text[_normalize_label(q["question_text"])] = q_id
+
+                options = list(q.get("options", [])) if q["question_type"] != "text" else []
+                self.options[q_id] = options
+                self.option_index[q_id] = {label: i for i, label in enumerate(options)}
+                self._lookup[q_id] = {_normalize_label(label): label for label in options}
+
+        self.question_ids: List[str] = [q["question_id"] for q in self.questions]
+
+    def resolve_question_id(self, key: str) -> Optional[str]:
+        """Map a column header (question id or full question text) to a question id"""
+        if key in self.by_id:
+            return key
+        lowered = str(key).strip().lower()
+        if lowered in self.by_id:
+            return lowered
+        return self.id_by_text.get(_normalize_label(key))
+
+    def validate_answer(self, question_id: str, answer: Any) -> Answer:
+        """
+        Validate an answer against the question's options
+
+        Returns:
+            The answer normalized to canonical option labels (list for multi-select)
+
+        Raises:
+            ValueError: if the question is unknown or the answer is not a valid option
+        """
+        question = self.by_id.get(question_id)
+        if question is None:
+            raise ValueError(f"Unknown question '{question_id}'")
+
+        q_type = question["question_type"]
+        if q_type == "text":
+            return "" if answer is None else str(answer).strip()
+
+        lookup = self._lookup[question_id]
+
+        if q_type == "multi_select":
+            if isinstance(answer, str):
+                parts = [answer]
+                for separator in MULTI_SELECT_SEPARATORS:
+                    parts = [piece for part in parts for piece in part.split(separator)]
+            else:
+                parts = list(answer or [])
+
+            selected: List[str] = []
+            for part in parts:
+                if not str(part).strip():
+                    continue
+                label = lookup.get(_normalize_label(part))
+                if label is None:
+                    raise ValueError(f"{question_id}: '{part}' is not a valid option")
+                if label not in selected:
+                    selected.append(label)
+            return selected
+
+        if isinstance(answer, list):
+            if len(answer) != 1:
+                raise ValueError(f"{question_id}: expected a single option, got {len(answer)}")
+            answer = answer[0]
+
+        label = lookup.get(_normalize_label(answer))
+        if label is None:
+            raise ValueError(f"{question_id}: '{answer}' is not a valid option")
+        return label
+
+    # ==============================
+    # COMPACT ANSWER CODES
+    # ==============================
+
+    def encode_answer(self, question_id: str, answer: Any,
+                      keep_unmatched: bool = False) -> Union[int, str, List[str]]:
+        """
+        Storage code for an answer: option index (single-select), bitset
+        (multi-select) or the text itself. A blank single-select answer (a
+        question that only has a comment) is stored as "".
+
+        Args:
+            keep_unmatched: store a select answer that matches no option
+                            verbatim instead of rejecting it; each one is
+                            counted in app_unmatched_answers_total
+
+        Raises:
+            ValueError: if the question is unknown or, unless keep_unmatched,
+                        the answer is not a valid option
+        """
+        question = self.by_id.get(question_id)
+        if question is None:
+            raise ValueError(f"Unknown question '{question_id}'")
+        if question["question_type"] == "text":
+            return answer
+        if question["question_type"] == "single_select" and _is_blank(answer):
+            return ""
+        try:
+            canonical = self.validate_answer(question_id, answer)
+        except ValueError:
+            if not keep_unmatched:
+                raise
+            UNMATCHED_ANSWERS.labels(question_id).inc()
+            return answer
+
+        index = self.option_index[question_id]
+        if isinstance(canonical, list):
+            if len(self.options[question_id]) > MAX_BITSET_OPTIONS:
+                return canonical
+            bits = 0
+            for label in canonical:
+                bits |= 1 << index[label]
+            return bits
+        return index[canonical]
+
+    def decode_answer(self, question_id: str, code: Any) -> Any:
+        """Inverse of encode_answer(); strings and lists (including legacy stored labels) pass through"""
+        if not isinstance(code, int) or isinstance(code, bool):
+            return code
+        question = self.by_id.get(question_id)
+        options = self.options.get(question_id, [])
+        if question is None or not options:
+            return code
+
+        if question["question_type"] == "multi_select":
+            return [label for i, label in enumerate(options) if code >> i & 1]
+        return options[code] if 0 <= code < len(options) else code
+
+    def compact_codes(self, answers: Dict[str, Any]) -> Dict[str, Union[int, str, List[str]]]:
+        """
+        Validate a compact submission {question_id: option index | [indexes] | text}
+        against the option counts and return the storage codes
+
+        Text is accepted for every question: option labels of select
+        questions must match an option (multi-select labels may be joined
+        with ; | or newlines), anything goes for text questions. Integers
+        must index an existing option of a single-select question and
+        integer lists of a multi-select question.
+
+        Raises:
+            ValueError: listing every invalid answer
+        """
+        codes: Dict[str, Union[int, str, List[str]]] = {}
+        errors: List[str] = []
+
+        for q_id, value in answers.items():
+            question = self.by_id.get(q_id)
+            if question is None:
+                errors.append(f"Unknown question '{q_id}'")
+                continue
+            if isinstance(value, str):
+                try:
+                    codes[q_id] = self.encode_answer(q_id, value)
+                except ValueError as e:
+                    errors.append(str(e))
+                continue
+
+            q_type = question["question_type"]
+            option_count = len(self.options[q_id])
+
+            if q_type == "single_select" and _is_index(value, option_count):
+                codes[q_id] = value
+            elif (q_type == "multi_select" and isinstance(value, list)
+                    and all(_is_index(i, option_count) for i in value)):
+                indexes = sorted(set(value))
+                if option_count > MAX_BITSET_OPTIONS:
+                    codes[q_id] = [self.options[q_id][i] for i in indexes]
+                else:
+                    codes[q_id] = sum(1 << i for i in indexes)
+            else:
+                expected = {"single_select": f"an option index 0-{option_count - 1}",
+                            "multi_select": f"a list of option indexes 0-{option_count - 1}"}.get(q_type, "text")
+                errors.append(f"{q_id}: expected {expected}, got {value!r}")
+
+        if errors:
+            raise ValueError("; ".join(errors))
+        return codes
+
+    def expand_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Full response (section, question text and type, decoded answer) for a
+        stored (question_id, answer code, comment) record
+        """
+        q_id = response.get("question_id", "")
+        question = self.by_id.get(q_id, {})
+        expanded = dict(response)
+        expanded["section"] = response.get("section") or self.section_of.get(q_id, "")
+        expanded["question_text"] = response.get("question_text") or question.get("question_text", "")
+        expanded["question_type"] = response.get("question_type") or question.get("question_type", "")
+        expanded["answer"] = self.decode_answer(q_id, response.get("answer"))
+        expanded.setdefault("comment", "")
+        return expanded
+
+
+_default_compiled: Optional[CompiledSchema] = None
+
+
+def get_compiled_schema() -> CompiledSchema:
+    """Compiled view of the built-in questionnaire schema (cached)"""
+    global _default_compiled
+    if _default_compiled is None:
+        _default_compiled = CompiledSchema(get_questionnaire_schema())
+    return _default_compiled
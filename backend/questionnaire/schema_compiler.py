@@ -0,0 +1,280 @@
+"""
+Questionnaire Schema Compiler
+Builds the question and scoring schema from the assessment workbook in a
+single streaming pass and caches the compiled artifact by file hash
+
+The workbook layout (see assets/Cyber Resilience Maturity Assessment - New.xlsx):
+- "Assessment Questionnaire*" sheets: a "Question #" header row, then one
+  row per question (number, text, response type, level) followed by one
+  row per answer option in column B
+- "Scoring Guide" sheet: (question, option, "N Points") rows that override
+  the default positional scoring when an option label matches exactly
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import SCHEMA_CACHE_DIR
+from .questionnaire_schema import get_questionnaire_schema, get_max_score
+from .compiled_schema import schema_hash
+
+# Bump whenever the compiled output format or parsing rules change
+COMPILER_VERSION = "1"
+
+SECTION_NAME = "Cyber Resilience Assessment"
+DOMAIN = "Cyber Resilience"
+
+RESPONSE_TYPES = {
+    "single select": "single_select",
+    "confidence scale": "single_select",
+    "check box": "multi_select",
+    "checkbox": "multi_select",
+    "multi select": "multi_select",
+    "open response": "text"
+}
+
+# Options that never earn points regardless of position
+NON_SCORING_OPTIONS = {"no idea", "not applicable"}
+
+POINTS_PATTERN = re.compile(r"(\d+)\s*point", re.IGNORECASE)
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Content hash of the workbook, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return " ".join(str(value).split())
+
+
+def _question_number(value: Any) -> str:
+    """'1a', 2, 2.0 -> '1a', '2', '2'"""
+    return _cell_text(value).lower().replace(" ", "")
+
+
+def _base_number(number: str) -> str:
+    match = re.match(r"\d+", number)
+    return match.group(0) if match else number
+
+
+def _clean_option(value: Any) -> str:
+    # Some option cells carry stray punctuation, e.g. "Yes, "
+    return _cell_text(value).rstrip(" ,")
+
+
+def _parse_questionnaire_rows(rows) -> List[Dict[str, Any]]:
+    """Collect questions and their option rows from one questionnaire sheet"""
+    questions: List[Dict[str, Any]] = []
+    in_body = False
+    current: Optional[Dict[str, Any]] = None
+
+    for values in rows:
+        cells = [_cell_text(v) for v in (list(values) + [None] * 4)[:4]]
+        number, text, response_type, level = cells
+
+        if not in_body:
+            in_body = number.lower() == "question #"
+            continue
+
+        if number:
+            current = None
+            if not text:
+                # Numbered placeholder without a question (e.g. "12")
+                continue
+            current = {
+                "number": _question_number(number),
+                "text": text,
+                "response_type": response_type.lower(),
+                "level": level,
+                "options": []
+            }
+            questions.append(current)
+        elif current is not None and text:
+            current["options"].append(_clean_option(text))
+
+    return questions
+
+
+def _parse_scoring_guide(rows) -> Dict[str, Dict[str, int]]:
+    """{base question number: {normalized option: points}}"""
+    guide: Dict[str, Dict[str, int]] = {}
+    for values in rows:
+        cells = [_cell_text(v) for v in (list(values) + [None] * 3)[:3]]
+        question, option, rule = cells
+        match = POINTS_PATTERN.search(rule)
+        if not question or not option or not match:
+            continue
+        number = _base_number(question.split("-")[0].strip().lower())
+        guide.setdefault(number, {})[option.casefold()] = int(match.group(1))
+    return guide
+
+
+def _build_question(raw: Dict[str, Any], guide: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+    options = raw["options"]
+    if raw["response_type"]:
+        question_type = RESPONSE_TYPES.get(raw["response_type"], "single_select")
+    else:
+        question_type = "single_select" if options else "text"
+
+    scoring: Dict[str, int] = {}
+    if question_type != "text":
+        overrides = guide.get(_base_number(raw["number"]), {})
+        position = 0
+        for option in options:
+            if option.casefold() in NON_SCORING_OPTIONS:
+                scoring[option] = 0
+                continue
+            scoring[option] = overrides.get(option.casefold(), position)
+            position += 1
+
+    level = raw["level"] or "Informational"
+    return {
+        "question_id": f"q{raw['number']}",
+        "domain": DOMAIN,
+        "question_text": raw["text"],
+        "question_type": question_type,
+        "options": options,
+        "scoring": scoring,
+        "help_text": f"Question {raw['number']} ({level})",
+        "required": True
+    }
+
+
+def compile_workbook(path: Path) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Read the workbook once (openpyxl read-only mode) and emit the
+    questionnaire schema in the same shape as get_questionnaire_schema()
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Compiling a workbook requires openpyxl (pip install openpyxl)")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        candidates: List[List[Dict[str, Any]]] = []
+        guide: Dict[str, Dict[str, int]] = {}
+        for sheet in workbook.worksheets:
+            title = sheet.title.lower()
+            rows = sheet.iter_rows(values_only=True)
+            if title.startswith("assessment questionnaire"):
+                candidates.append(_parse_questionnaire_rows(rows))
+            elif title.startswith("scoring guide"):
+                guide = _parse_scoring_guide(rows)
+    finally:
+        workbook.close()
+
+    if not candidates:
+        raise ValueError(f"No 'Assessment Questionnaire' sheet found in {path}")
+
+    # Several revisions of the questionnaire may coexist; the one that
+    # lists answer options beneath each question is the authoritative one
+    raw_questions = max(candidates, key=lambda qs: (sum(len(q["options"]) for q in qs), len(qs)))
+    return {SECTION_NAME: [_build_question(raw, guide) for raw in raw_questions]}
+
+
+def calculate_max_score(schema: Dict[str, List[Dict[str, Any]]]) -> int:
+    """Sum of the best achievable points over scored questions"""
+    return sum(
+        max(q["scoring"].values())
+        for questions in schema.values()
+        for q in questions
+        if q.get("scoring")
+    )
+
+
+def build_artifact(schema: Dict[str, List[Dict[str, Any]]], source: str, source_sha256: str) -> Dict[str, Any]:
+    """Wrap a schema with the metadata the backend needs to serve it"""
+    return {
+        "version": source_sha256[:12],
+        "compiler_version": COMPILER_VERSION,
+        "source_file": source,
+        "source_sha256": source_sha256,
+        "compiled_at": datetime.now().isoformat(),
+        "question_count": sum(len(questions) for questions in schema.values()),
+        "max_score": calculate_max_score(schema),
+        "schema": schema
+    }
+
+
+def _cache_path(cache_dir: Path, source_sha256: str) -> Path:
+    return Path(cache_dir) / f"{source_sha256[:16]}-c{COMPILER_VERSION}.json"
+
+
+def load_or_compile(path: Path, cache_dir: Path = SCHEMA_CACHE_DIR, force: bool = False) -> Tuple[Dict[str, Any], bool]:
+    """
+    Return the compiled artifact for a workbook, compiling only on a cache miss
+
+    Returns:
+        (artifact, compiled) where compiled is False when served from cache
+    """
+    path = Path(path)
+    source_sha256 = file_sha256(path)
+    cache_file = _cache_path(cache_dir, source_sha256)
+
+    if cache_file.exists() and not force:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f), False
+
+    artifact = build_artifact(compile_workbook(path), path.name, source_sha256)
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, cache_file)
+
+    return artifact, True
+
+
+def artifact_from_schema(schema: Dict[str, List[Dict[str, Any]]], source: str, max_score: Optional[int] = None) -> Dict[str, Any]:
+    """Artifact for a schema that did not come from a workbook, versioned by content hash"""
+    return {
+        "version": schema_hash(schema),
+        "compiler_version": COMPILER_VERSION,
+        "source_file": source,
+        "source_sha256": "",
+        "compiled_at": "",
+        "question_count": sum(len(questions) for questions in schema.values()),
+        "max_score": calculate_max_score(schema) if max_score is None else max_score,
+        "schema": schema
+    }
+
+
+def load_artifact(path: Path) -> Dict[str, Any]:
+    """
+    Load a compiled JSON artifact, or compile (with caching) an .xlsx workbook
+
+    A JSON file holding just the {section: [questions]} mapping is accepted
+    too and wrapped into an artifact.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "schema" not in data:
+            return artifact_from_schema(data, path.name)
+        return data
+    artifact, _ = load_or_compile(path)
+    return artifact
+
+
+def builtin_artifact() -> Dict[str, Any]:
+    """Artifact for the questionnaire hard-coded in questionnaire_schema.py"""
+    return artifact_from_schema(get_questionnaire_schema(), "questionnaire_schema.py", get_max_score())
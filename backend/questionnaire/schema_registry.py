@@ -0,0 +1,220 @@
+"""
+Questionnaire Schema Registry
+Holds the active questionnaire version and every version still referenced
+by in-flight assessments, and hot-swaps in new versions as the schema
+source changes on disk
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import SCHEMA_DIR, SCHEMA_CACHE_DIR, QUESTIONNAIRE_WORKBOOK
+from utils.scoring import ResilienceScorer
+from .compiled_schema import CompiledSchema
+from .schema_compiler import load_artifact, builtin_artifact
+
+SCHEMA_SUFFIXES = (".json", ".xlsx")
+
+
+class SchemaVersion:
+    """
+    One immutable questionnaire version: artifact, compiled lookups and scorer
+    """
+
+    def __init__(self, artifact: Dict[str, Any]):
+        if not artifact.get("schema") or not artifact.get("question_count"):
+            raise ValueError("Schema artifact contains no questions")
+
+        self.artifact = artifact
+        self.version: str = artifact["version"]
+        self.schema: Dict[str, List[Dict]] = artifact["schema"]
+        self.max_score: int = artifact["max_score"]
+        self.compiled = CompiledSchema(self.schema, self.version)
+        self.scorer = ResilienceScorer(self.schema, self.max_score)
+
+    def describe(self) -> Dict[str, Any]:
+        return {key: value for key, value in self.artifact.items() if key != "schema"}
+
+
+class SchemaRegistry:
+    """
+    Resolves the schema source, loads it and swaps it in atomically
+
+    Source precedence: newest *.json/*.xlsx in SCHEMA_DIR, then
+    QUESTIONNAIRE_WORKBOOK, then the built-in questionnaire_schema.py.
+    Every activated artifact is also written to SCHEMA_CACHE_DIR/versions so
+    assessments pinned to a retired version can still be scored after a
+    restart or by another worker.
+    """
+
+    def __init__(self, schema_dir: Path = SCHEMA_DIR, workbook: str = QUESTIONNAIRE_WORKBOOK,
+                 versions_dir: Path = SCHEMA_CACHE_DIR / "versions"):
+        self.schema_dir = Path(schema_dir)
+        self.workbook = workbook
+        self.versions_dir = Path(versions_dir)
+
+        self._versions: Dict[str, SchemaVersion] = {}
+        self._listeners: List[Callable[[SchemaVersion], None]] = []
+        self._reload_lock = threading.Lock()
+        self._fingerprint: Optional[Tuple] = None
+        self._failed_fingerprint: Optional[Tuple] = None
+
+        self._active: Optional[SchemaVersion] = None
+        self.reload()
+
+    @property
+    def active(self) -> SchemaVersion:
+        """
+        The current version. Callers should read this once per request and
+        keep the reference, so a concurrent swap never mixes two versions.
+        """
+        return self._active
+
+    def add_listener(self, callback: Callable[[SchemaVersion], None]):
+        """Call `callback(version)` after each swap (from the reloading thread)"""
+        self._listeners.append(callback)
+
+    # ==============================
+    # SOURCE RESOLUTION
+    # ==============================
+
+    def _source_path(self) -> Optional[Path]:
+        candidates = []
+        if self.schema_dir.is_dir():
+            for path in self.schema_dir.iterdir():
+                # Skip editor/Excel lock files and partially written temp files
+                if path.name.startswith((".", "~$")) or path.suffix.lower() not in SCHEMA_SUFFIXES:
+                    continue
+                try:
+                    candidates.append((path.stat().st_mtime_ns, path.name, path))
+                except FileNotFoundError:
+                    continue
+        if candidates:
+            return max(candidates)[2]
+        if self.workbook:
+            return Path(self.workbook)
+        return None
+
+    def _current_fingerprint(self) -> Tuple[Optional[Path], Tuple]:
+        path = self._source_path()
+        if path is None:
+            return None, ("builtin",)
+        stat = path.stat()
+        return path, (str(path), stat.st_mtime_ns, stat.st_size)
+
+    # ==============================
+    # LOADING & SWAPPING
+    # ==============================
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the schema source if it changed since the last check
+
+        Returns:
+            True if a different version became active
+
+        Raises:
+            Exception: only when no version has been loaded yet; later
+                failures keep the current version and are logged
+        """
+        with self._reload_lock:
+            try:
+                path, fingerprint = self._current_fingerprint()
+            except OSError as e:
+                # Source vanished between listing and stat; try again next poll
+                if self._active is None:
+                    raise
+                print(f"[!] Schema source unavailable, keeping version {self._active.version}: {e}")
+                return False
+
+            if not force and fingerprint in (self._fingerprint, self._failed_fingerprint):
+                return False
+
+            try:
+                artifact = load_artifact(path) if path is not None else builtin_artifact()
+                version = self._versions.get(artifact["version"]) or SchemaVersion(artifact)
+            except Exception as e:
+                if self._active is None:
+                    raise
+                # Remember the broken source so it is not re-parsed on every poll
+                self._failed_fingerprint = fingerprint
+                print(f"[!] Schema reload failed, keeping version {self._active.version}: {e}")
+                return False
+
+            self._fingerprint = fingerprint
+            self._failed_fingerprint = None
+            if self._active is not None and version.version == self._active.version:
+                return False
+
+            self._versions[version.version] = version
+            self._persist(version)
+            previous = self._active
+            self._active = version
+
+        if previous is not None:
+            print(f"[✓] Questionnaire schema {previous.version} -> {version.version} ({artifact.get('source_file', '')})")
+        for callback in self._listeners:
+            try:
+                callback(version)
+            except Exception as e:
+                print(f"[!] Schema reload listener failed: {e}")
+        return True
+
+    def get(self, version: Optional[str]) -> Optional[SchemaVersion]:
+        """Look up a specific version (memory first, then the versions directory)"""
+        if not version or not version.isalnum():
+            return None
+        loaded = self._versions.get(version)
+        if loaded is not None:
+            return loaded
+
+        path = self.versions_dir / f"{version}.json"
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded = SchemaVersion(json.load(f))
+        except Exception as e:
+            print(f"[!] Could not load schema version {version}: {e}")
+            return None
+        return self._versions.setdefault(version, loaded)
+
+    def resolve(self, version: Optional[str]) -> SchemaVersion:
+        """The requested version if known, otherwise the active one"""
+        return self.get(version) or self.active
+
+    def known_versions(self) -> List[str]:
+        versions = set(self._versions)
+        if self.versions_dir.is_dir():
+            versions.update(path.stem for path in self.versions_dir.glob("*.json"))
+        return sorted(versions)
+
+    def _persist(self, version: SchemaVersion):
+        path = self.versions_dir / f"{version.version}.json"
+        if path.exists():
+            return
+        try:
+            self.versions_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(version.artifact, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[!] Could not persist schema version {version.version}: {e}")
+
+    # ==============================
+    # WATCHING
+    # ==============================
+
+    async def watch(self, interval: float):
+        """Poll the schema source every `interval` seconds (run as an asyncio task)"""
+        while True:
+            await asyncio.sleep(interval)
+            # Stat calls and workbook compilation are blocking
+            await asyncio.to_thread(self.reload)
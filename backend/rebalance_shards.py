@@ -0,0 +1,124 @@
+"""
+Move stored companies, assessments and responses between shards after
+changing the shard count
+
+Stop the API first, run this, then restart with CHROMA_SHARDS set to the
+new count. Records are copied (with their stored embeddings) before they
+are deleted from the old shard, so an interrupted run can simply be
+repeated.
+
+Usage:
+    python rebalance_shards.py --from 1 --to 4
+    python rebalance_shards.py --from 4 --to 2 --dry-run
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent))
+
+from database.chroma_client import create_client
+from database.sharding import StorageShard, shard_for, shard_path
+from config import CHROMA_MODE, CHROMA_SHARDS, EXPORT_BATCH_SIZE
+
+SHARDED_COLLECTIONS = ["companies", "assessments", "responses"]
+
+
+def open_shards(count: int, mode: str) -> List[StorageShard]:
+    if mode == "http":
+        client = create_client(mode)
+        clients = [client] * count
+    else:
+        clients = [create_client(mode, shard_path(i)) for i in range(count)]
+    shards = [StorageShard(i, client, mode) for i, client in enumerate(clients)]
+    for shard in shards:
+        shard.initialize_collections()
+    return shards
+
+
+def _routing_key(collection: str, record_id: str, metadata: Dict) -> str:
+    # Responses follow their assessment; everything else routes by its own id
+    if collection == "responses":
+        return (metadata or {}).get("assessment_id", "")
+    return record_id
+
+
+def plan_moves(shard: StorageShard, collection: str, target_count: int, batch_size: int) -> Dict[int, List[str]]:
+    """Scan one collection and group the ids that belong elsewhere by target shard"""
+    moves: Dict[int, List[str]] = {}
+    source = shard.collection(collection)
+    offset = 0
+    while True:
+        page = source.get(limit=batch_size, offset=offset, include=["metadatas"])
+        ids = page["ids"] if page else []
+        if not ids:
+            break
+        for record_id, metadata in zip(ids, page["metadatas"]):
+            target = shard_for(_routing_key(collection, record_id, metadata), target_count)
+            if target != shard.index:
+                moves.setdefault(target, []).append(record_id)
+        if len(ids) < batch_size:
+            break
+        offset += batch_size
+    return moves
+
+
+def move_records(source: StorageShard, target: StorageShard, collection: str, ids: List[str], batch_size: int) -> int:
+    """Copy a set of records to the target shard, then delete them from the source"""
+    moved = 0
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        records = source.collection(collection).get(ids=batch_ids, include=["documents", "metadatas", "embeddings"])
+        if not records["ids"]:
+            continue
+        target.collection(collection).add(
+            ids=records["ids"],
+            documents=records["documents"],
+            metadatas=records["metadatas"],
+            embeddings=records["embeddings"]
+        )
+        source.collection(collection).delete(ids=records["ids"])
+        moved += len(records["ids"])
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebalance sharded storage to a new shard count")
+    parser.add_argument("--from", dest="source_count", type=int, default=CHROMA_SHARDS, help="Current shard count (default: CHROMA_SHARDS)")
+    parser.add_argument("--to", dest="target_count", type=int, required=True, help="New shard count")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many records would move")
+    args = parser.parse_args()
+
+    if args.source_count < 1 or args.target_count < 1:
+        parser.error("shard counts must be at least 1")
+
+    print(f"[*] Rebalancing {CHROMA_MODE} storage from {args.source_count} to {args.target_count} shard(s)...")
+    shards = open_shards(max(args.source_count, args.target_count), CHROMA_MODE)
+
+    total_moved = 0
+    for shard in shards[:args.source_count]:
+        for collection in SHARDED_COLLECTIONS:
+            moves = plan_moves(shard, collection, args.target_count, args.batch_size)
+            for target_index, ids in sorted(moves.items()):
+                if args.dry_run:
+                    print(f"  shard {shard.index} -> {target_index}: {len(ids)} {collection} would move")
+                    total_moved += len(ids)
+                    continue
+                moved = move_records(shard, shards[target_index], collection, ids, args.batch_size)
+                total_moved += moved
+                print(f"  shard {shard.index} -> {target_index}: moved {moved} {collection}")
+
+    verb = "would move" if args.dry_run else "moved"
+    print(f"[✓] {total_moved} records {verb}")
+    if not args.dry_run:
+        print(f"[*] Restart the API with CHROMA_SHARDS={args.target_count}")
+        if args.target_count < args.source_count and CHROMA_MODE != "http":
+            empty = ", ".join(str(shard_path(i)) for i in range(args.target_count, args.source_count))
+            print(f"[*] Shards beyond {args.target_count - 1} are now empty and can be deleted: {empty}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Rebuild the analytics rollups
+
+Rescores every completed assessment against the questionnaire version it
+was taken with and recomputes the maturity, score and answer rollups served
+by /api/analytics/* (running workers reload their answer index from them).
+Submissions, imports and generated data are recorded as they are written;
+run it after upgrading the index, restoring a backup or changing the
+scoring.
+
+Usage:
+    python rebuild_analytics.py
+    python rebuild_analytics.py --batch-size 2000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from database.chromadb_manager import ChromaDBManager
+from questionnaire.schema_registry import SchemaRegistry
+from utils.analytics import rebuild
+from config import EXPORT_BATCH_SIZE, INDEX_DB_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute the analytics rollups from stored assessments")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Assessments rescored per round trip")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = ChromaDBManager()
+    registry = SchemaRegistry()
+
+    print(f"[*] Rebuilding analytics rollups in {INDEX_DB_PATH}...")
+    counts = rebuild(db, registry, args.batch_size)
+    print(f"[✓] Rescored {counts['assessments']} completed assessments")
+    if counts["skipped"]:
+        print(f"[!] Skipped {counts['skipped']} without responses or company")
+    print(f"[✓] Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Rebuild the SQLite secondary indexes from ChromaDB
+
+The indexes are derived data: run this after restoring a ChromaDB backup,
+after an index write failed, or to start over with a deleted index.db.
+
+Usage:
+    python rebuild_indexes.py
+    python rebuild_indexes.py --backfill-metadata   # also add *_ts epoch fields to old records
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from database.chromadb_manager import ChromaDBManager
+from config import INDEX_DB_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the listing and time-range indexes")
+    parser.add_argument("--backfill-metadata", action="store_true",
+                        help="Write numeric created_ts/completed_ts/timestamp_ts metadata to records that lack it")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = ChromaDBManager()
+
+    if args.backfill_metadata:
+        print("[*] Backfilling epoch metadata in ChromaDB...")
+        updated = db.backfill_time_metadata()
+        print(f"[✓] Updated {updated['assessments']} assessments, {updated['responses']} responses")
+
+    print(f"[*] Rebuilding indexes in {INDEX_DB_PATH}...")
+    counts = db.rebuild_index()
+    print(f"[✓] Listing index: {counts['companies']} companies, {counts['assessments']} assessments")
+    print(f"[✓] Time index: {counts['responses']} responses")
+    print(f"[✓] Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,16 @@ def reset_database():
     else:
         print("[*] No existing database found")
     
+    # Extra shard directories (CHROMA_SHARDS > 1)
+    for shard_dir in sorted(chromadb_path.parent.glob(f"{chromadb_path.name}_shard*")):
+        print(f"[*] Deleting shard at: {shard_dir}")
+        shutil.rmtree(shard_dir)
+
+    # Listing index is derived from ChromaDB, so it goes too
+    for index_file in sorted(chromadb_path.parent.glob("index.db*")):
+        print(f"[*] Deleting index at: {index_file}")
+        index_file.unlink()
+
     print()
     
     # Step 2: Initialize new database
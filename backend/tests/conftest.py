@@ -0,0 +1,22 @@
+"""
+Test setup: backend modules are imported the way the API imports them
+(backend/ on sys.path), with runtime data kept out of backend/data
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="assessment-tests-"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def compiled():
+    """CompiledSchema of the built-in questionnaire"""
+    from questionnaire.compiled_schema import CompiledSchema
+    from questionnaire.questionnaire_schema import get_questionnaire_schema
+    return CompiledSchema(get_questionnaire_schema())
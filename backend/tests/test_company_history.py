@@ -0,0 +1,97 @@
+"""Company history and assessment deltas over the scoring snapshots kept in the index"""
+
+import pytest
+
+from database.index_store import IndexStore
+from utils.analytics import result_row
+from utils.company_history import delta_report, history_report
+from utils.scoring import ResilienceScorer
+
+
+class _DB:
+    """The ChromaDBManager methods the reports use, served by the index alone"""
+
+    def __init__(self, index: IndexStore):
+        self.index = index
+
+    def get_result_snapshots(self, assessment_ids):
+        return self.index.result_snapshots(assessment_ids)
+
+    def get_company_history(self, company_id):
+        return self.index.identity_results(company_id)
+
+
+BEFORE = {"q1a": "Days/Weeks", "q2": ["Network isolation only"], "q3": "1 drill annually", "q8": "CRM"}
+AFTER = {"q1a": "Minutes", "q2": ["Immutability + Air-gap", "Zero-trust immutable"], "q3": "1 drill annually", "q8": "none"}
+
+
+@pytest.fixture
+def db(tmp_path, compiled):
+    index = IndexStore(tmp_path / "index.db")
+    index.upsert_companies([
+        {"company_id": "c1", "created_at": "2026-01-01T00:00:00", "company_name": "Acme Ltd", "contact_email": "a@acme.com"},
+        {"company_id": "c2", "created_at": "2026-02-01T00:00:00", "company_name": "ACME", "contact_email": "b@acme.com"},
+        {"company_id": "c3", "created_at": "2026-02-01T00:00:00", "company_name": "Other Org", "contact_email": "c@other.com"},
+    ])
+    scorer = ResilienceScorer()
+    index.record_results([
+        result_row(compiled, assessment_id, company_id, answers, scorer.calculate_score(answers), completed_at)
+        for assessment_id, company_id, answers, completed_at in [
+            ("a1", "c1", BEFORE, "2026-01-10T00:00:00"),
+            ("a2", "c2", AFTER, "2026-03-10T00:00:00"),
+            ("a3", "c3", AFTER, "2026-03-11T00:00:00"),
+        ]
+    ])
+    return _DB(index)
+
+
+def test_delta_between_two_snapshots(db, compiled):
+    report = delta_report(db, compiled, "a1", "a2")
+    assert report["from"]["assessment_id"] == "a1" and report["to"]["assessment_id"] == "a2"
+    assert report["same_organisation"]
+    assert report["total_score_delta"] == round(report["to"]["total_score"] - report["from"]["total_score"], 2)
+    assert report["total_score_delta"] > 0
+
+    questions = {q["question_id"]: q for q in report["questions"]}
+    assert [q["question_id"] for q in report["questions"]] == [
+        q_id for q_id in compiled.question_ids if q_id in questions
+    ]
+    assert questions["q1a"]["from_answer"] == "Days/Weeks" and questions["q1a"]["to_answer"] == "Minutes"
+    assert questions["q1a"]["score_delta"] == questions["q1a"]["to_score"] - questions["q1a"]["from_score"]
+    assert questions["q2"]["to_answer"] == ["Immutability + Air-gap", "Zero-trust immutable"]
+    assert questions["q1a"]["changed"] and questions["q2"]["changed"]
+    assert not questions["q3"]["changed"]
+    assert report["changed_questions"] == sum(q["changed"] for q in report["questions"])
+
+
+def test_delta_flags_different_organisations(db, compiled):
+    assert not delta_report(db, compiled, "a1", "a3")["same_organisation"]
+
+
+def test_delta_of_unknown_assessment(db, compiled):
+    with pytest.raises(LookupError, match="missing"):
+        delta_report(db, compiled, "a1", "missing")
+
+
+def test_history_spans_registrations_of_one_organisation(db):
+    report = history_report(db, "c2")
+    assert report["company_ids"] == ["c1", "c2"]
+    assert [a["assessment_id"] for a in report["assessments"]] == ["a1", "a2"]
+    first, second = report["assessments"]
+    assert first["score_change"] is None
+    assert second["score_change"] == round(second["total_score"] - first["total_score"], 2)
+    assert history_report(db, "nope") is None
+
+
+def test_free_mail_registrations_are_matched_by_name_only_on_request(tmp_path):
+    index = IndexStore(tmp_path / "index.db")
+    index.upsert_companies([
+        {"company_id": "g1", "created_at": "2026-01-01T00:00:00", "company_name": "Sunrise Traders",
+         "contact_email": "x@gmail.com"},
+        {"company_id": "g2", "created_at": "2026-02-01T00:00:00", "company_name": "Sunrise Traders Pvt Ltd",
+         "contact_email": "y@gmail.com"},
+    ])
+    assert index.company_identity("g1") == "" and index.company_identity("g2") == ""
+    assert index.company_by_identity("sunrise traders|gmail.com") is None
+    assert index.company_by_name("sunrise traders") == "g1"
+    assert [row["company_id"] for row in index.identity_results("g2")] == []
@@ -0,0 +1,50 @@
+"""Identity keys linking repeat registrations of an organisation"""
+
+import pytest
+
+from utils.company_identity import email_domain, identity_key, is_free_mail, normalize_name
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("The Acme Co., Pvt. Ltd.", "acme"),
+    ("ACME  Limited", "acme"),
+    ("Société Générale SA", "societe generale"),
+    ("Tata Consultancy Services", "tata consultancy services"),
+    ("A&B Corp", "a and b"),
+    ("The", "the"),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_name(name, expected):
+    assert normalize_name(name) == expected
+
+
+def test_email_domain():
+    assert email_domain(" Jane@Acme.COM ") == "acme.com"
+    assert email_domain("acme.com") == ""
+    assert email_domain(None) == ""
+
+
+def test_same_organisation_shares_a_key():
+    assert identity_key("Acme Pvt. Ltd.", "jane@acme.com") == identity_key("ACME", "raj@acme.com") == "acme|acme.com"
+
+
+def test_different_domain_is_a_different_organisation():
+    assert identity_key("Acme", "jane@acme.com") != identity_key("Acme", "jane@acme-industries.in")
+
+
+def test_empty_name_never_matches():
+    assert identity_key("", "jane@acme.com") == ""
+    assert identity_key("Ltd.", "jane@acme.com") == ""
+
+
+@pytest.mark.parametrize("email", ["owner@gmail.com", "owner@outlook.com", "owner@yahoo.co.in", "OWNER@Hotmail.com"])
+def test_free_mail_registrations_get_no_key(email):
+    # Unrelated organisations with similar names must not merge through a shared webmail domain
+    assert is_free_mail(email_domain(email))
+    assert identity_key("Sunrise Traders", email) == ""
+
+
+def test_company_domains_are_not_free_mail():
+    assert not is_free_mail("hdfcbank.com")
+    assert not is_free_mail("")
@@ -0,0 +1,111 @@
+"""Answer codes of CompiledSchema: storage encoding, decoding and rejection of invalid answers"""
+
+import pytest
+
+from utils.metrics import UNMATCHED_ANSWERS
+
+
+# ==============================
+# encode_answer / decode_answer
+# ==============================
+
+def test_single_select_round_trip(compiled):
+    for index, label in enumerate(compiled.options["q1a"]):
+        code = compiled.encode_answer("q1a", label)
+        assert code == index
+        assert compiled.decode_answer("q1a", code) == label
+
+
+def test_labels_match_case_and_whitespace_insensitively(compiled):
+    assert compiled.encode_answer("q1a", "  days/WEEKS ") == 0
+
+
+def test_multi_select_round_trip(compiled):
+    labels = ["Zero-trust immutable", "Network isolation only"]
+    code = compiled.encode_answer("q2", labels)
+    assert code == 0b10001
+    # Decoded in option order
+    assert compiled.decode_answer("q2", code) == ["Network isolation only", "Zero-trust immutable"]
+
+
+def test_multi_select_accepts_joined_labels(compiled):
+    assert compiled.encode_answer("q2", "Network isolation only; Role-based controls") == 0b11
+
+
+def test_text_is_stored_as_given(compiled):
+    assert compiled.encode_answer("q8", "Legacy ERP") == "Legacy ERP"
+    assert compiled.decode_answer("q8", "Legacy ERP") == "Legacy ERP"
+
+
+def test_blank_answers_mean_comment_only(compiled):
+    assert compiled.encode_answer("q1a", "") == ""
+    assert compiled.encode_answer("q2", []) == 0
+    assert compiled.decode_answer("q2", 0) == []
+
+
+def test_unknown_question_is_rejected(compiled):
+    with pytest.raises(ValueError, match="Unknown question 'q99'"):
+        compiled.encode_answer("q99", "Days")
+
+
+@pytest.mark.parametrize("question_id, answer", [
+    ("q1a", "Other: about a week"),
+    ("q1a", ["Days", "Hours"]),
+    ("q2", ["Network isolation only", "Something else"]),
+])
+def test_unmatched_select_answer_is_rejected(compiled, question_id, answer):
+    with pytest.raises(ValueError, match=question_id):
+        compiled.encode_answer(question_id, answer)
+
+
+def test_unmatched_answer_kept_only_on_request_and_counted(compiled):
+    counter = UNMATCHED_ANSWERS.labels("q1a")
+    before = counter.value()
+    assert compiled.encode_answer("q1a", "Other: about a week", keep_unmatched=True) == "Other: about a week"
+    assert counter.value() == before + 1
+    # Legacy labels decode as themselves
+    assert compiled.decode_answer("q1a", "Other: about a week") == "Other: about a week"
+
+
+# ==============================
+# compact_codes
+# ==============================
+
+def test_compact_codes_match_full_form_encoding(compiled):
+    full = {"q1a": "Hours", "q2": ["Role-based controls", "Immutability + Air-gap"], "q8": "none"}
+    compact = {"q1a": 3, "q2": [2, 1, 2], "q8": "none"}
+    assert compiled.compact_codes(compact) == {q_id: compiled.encode_answer(q_id, a) for q_id, a in full.items()}
+
+
+def test_compact_codes_accept_option_labels(compiled):
+    assert compiled.compact_codes({"q1a": "hours", "q2": "Role-based controls|Immutability + Air-gap"}) == {
+        "q1a": 3, "q2": 0b110
+    }
+
+
+def test_compact_codes_round_trip(compiled):
+    codes = compiled.compact_codes({"q1b": 1, "q5": [0, 4]})
+    assert {q_id: compiled.decode_answer(q_id, code) for q_id, code in codes.items()} == {
+        "q1b": "1 day", "q5": ["Logs reviewed post-incident", "AI-driven predictive detection"]
+    }
+
+
+@pytest.mark.parametrize("answers, message", [
+    ({"q1a": 6}, "q1a: expected an option index 0-5"),
+    ({"q1a": True}, "q1a: expected an option index"),
+    ({"q2": [0, 9]}, "q2: expected a list of option indexes"),
+    ({"q2": 1}, "q2: expected a list of option indexes"),
+    ({"q8": 0}, "q8: expected text"),
+    ({"q1a": "Other: about a week"}, "q1a: 'Other: about a week' is not a valid option"),
+    ({"q2": "Network isolation only; Something else"}, "q2: '.*Something else' is not a valid option"),
+    ({"zz": 0}, "Unknown question 'zz'"),
+])
+def test_compact_codes_reject_invalid_answers(compiled, answers, message):
+    with pytest.raises(ValueError, match=message):
+        compiled.compact_codes(answers)
+
+
+def test_compact_codes_report_every_error(compiled):
+    with pytest.raises(ValueError) as error:
+        compiled.compact_codes({"q1a": 99, "q1b": "nope", "q3": 0})
+    assert str(error.value).count(";") == 1
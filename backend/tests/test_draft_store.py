@@ -0,0 +1,182 @@
+"""DraftStore: delta merging, idle TTL, LRU eviction and the disk spill; SharedDraftStore across workers"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from utils.draft_store import DraftStore, SharedDraftStore
+
+
+@pytest.fixture
+def spill_dir(tmp_path):
+    return tmp_path / "drafts"
+
+
+def _age(store: DraftStore, assessment_id: str, seconds: float):
+    with store._lock:
+        store._drafts[assessment_id]["updated_at"] -= seconds
+
+
+def test_deltas_merge(spill_dir):
+    store = DraftStore(ttl=60, max_in_memory=10, spill_dir=spill_dir)
+    store.apply("a1", "v1", {"q1a": 0, "q2": 3}, {"q1a": "note"}, [])
+    summary = store.apply("a1", "v1", {"q1a": 4}, {"q1a": ""}, ["q2"])
+    assert summary["revision"] == 2 and summary["answered"] == 1
+    draft = store.get("a1")
+    assert draft["answers"] == {"q1a": 4} and draft["comments"] == {}
+    assert store.schema_version("a1") == "v1"
+
+
+def test_get_returns_a_copy(spill_dir):
+    store = DraftStore(ttl=60, max_in_memory=10, spill_dir=spill_dir)
+    store.apply("a1", "v1", {"q1a": 0}, {}, [])
+    store.get("a1")["answers"]["q1a"] = 5
+    assert store.get("a1")["answers"] == {"q1a": 0}
+
+
+def test_idle_drafts_expire(spill_dir):
+    store = DraftStore(ttl=60, max_in_memory=10, spill_dir=spill_dir)
+    store.apply("a1", "v1", {"q1a": 0}, {}, [])
+    store.apply("a2", "v1", {"q1a": 1}, {}, [])
+    _age(store, "a1", 61)
+    assert store.get("a1") is None
+    assert store.get("a2") is not None
+    _age(store, "a2", 61)
+    assert store.sweep() == 1
+    assert store.in_memory_count() == 0
+
+
+def test_sweep_removes_expired_spilled_drafts(spill_dir):
+    store = DraftStore(ttl=60, max_in_memory=10, spill_dir=spill_dir)
+    store.apply("a1", "v1", {"q1a": 0}, {}, [])
+    assert store.spill_all() == 1
+    path = next(spill_dir.glob("*.json"))
+    stale = time.time() - 120
+    os.utime(path, (stale, stale))
+    assert store.sweep() == 1
+    assert store.get("a1") is None
+
+
+def test_least_recently_used_drafts_spill_and_reload(spill_dir):
+    store = DraftStore(ttl=60, max_in_memory=2, spill_dir=spill_dir)
+    store.apply("a1", "v1", {"q1a": 0}, {"q1a": "first"}, [])
+    store.apply("a2", "v1", {"q1a": 1}, {}, [])
+    store.get("a1")                                   # a2 is now least recently used
+    store.apply("a3", "v1", {"q1a": 2}, {}, [])
+    assert store.in_memory_count() == 2
+    assert store.stats["evicted"] == 1 and len(list(spill_dir.glob("*.json"))) == 1
+
+    draft = store.get("a2")                           # loaded back from disk, a1 spills instead
+    assert draft["answers"] == {"q1a": 1} and draft["revision"] == 1
+    assert store.stats["loaded"] == 1
+    assert store.get("a1")["comments"] == {"q1a": "first"}
+
+
+def test_eviction_without_spill_dir_drops_drafts():
+    store = DraftStore(ttl=60, max_in_memory=1, spill_dir=None)
+    store.apply("a1", "v1", {"q1a": 0}, {}, [])
+    store.apply("a2", "v1", {"q1a": 1}, {}, [])
+    assert store.get("a1") is None
+    assert store.describe()["on_disk"] == 0
+
+
+def test_spilled_drafts_survive_a_restart(spill_dir):
+    store = DraftStore(ttl=60, max_in_memory=10, spill_dir=spill_dir)
+    store.apply("a1", "v1", {"q1a": 0, "q2": 5}, {"q2": "see notes"}, [])
+    store.apply("a1", "v1", {"q1a": 2}, {}, [])
+    assert store.spill_all() == 1
+    assert store.in_memory_count() == 0
+
+    restarted = DraftStore(ttl=60, max_in_memory=10, spill_dir=spill_dir)
+    assert restarted.describe()["on_disk"] == 1
+    draft = restarted.pop("a1")
+    assert draft["answers"] == {"q1a": 2, "q2": 5} and draft["revision"] == 2
+    # Submitted: gone from memory and disk
+    assert restarted.get("a1") is None
+    assert not list(spill_dir.glob("*.json"))
+
+
+def test_restore_puts_a_popped_draft_back(spill_dir):
+    store = DraftStore(ttl=60, max_in_memory=10, spill_dir=spill_dir)
+    store.apply("a1", "v1", {"q1a": 0}, {}, [])
+    draft = store.pop("a1")
+    store.restore(draft)
+    assert store.get("a1")["answers"] == {"q1a": 0}
+
+
+def test_in_memory_count_does_not_list_the_spill_dir(spill_dir, monkeypatch):
+    store = DraftStore(ttl=60, max_in_memory=1, spill_dir=spill_dir)
+    store.apply("a1", "v1", {"q1a": 0}, {}, [])
+    store.apply("a2", "v1", {"q1a": 1}, {}, [])
+
+    def no_glob(self, pattern):
+        raise AssertionError("spill directory listed")
+
+    monkeypatch.setattr(type(spill_dir), "glob", no_glob)
+    assert store.in_memory_count() == 1
+
+
+# ==============================
+# SHARED (SQLITE) STORE
+# ==============================
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two stores on one database, as two API workers open it"""
+    path = tmp_path / "drafts.db"
+    return SharedDraftStore(path, ttl=60), SharedDraftStore(path, ttl=60)
+
+
+def test_shared_deltas_merge_across_workers(workers):
+    first, second = workers
+    first.apply("a1", "v1", {"q1a": 0, "q2": 3}, {"q1a": "note"}, [])
+    summary = second.apply("a1", "v1", {"q1a": 4}, {"q1a": ""}, ["q2"])
+    assert summary["revision"] == 2 and summary["answered"] == 1
+    assert first.get("a1")["answers"] == {"q1a": 4} and first.get("a1")["comments"] == {}
+    assert first.schema_version("a1") == "v1"
+
+
+def test_shared_pop_is_seen_by_every_worker(workers):
+    first, second = workers
+    first.apply("a1", "v1", {"q1a": 0}, {}, [])
+    draft = second.pop("a1")
+    assert draft["answers"] == {"q1a": 0}
+    assert first.get("a1") is None and first.pop("a1") is None
+
+    first.restore(draft)
+    assert second.get("a1")["revision"] == 1
+    # An autosave after the pop wins over restoring the popped draft
+    second.pop("a1")
+    second.apply("a1", "v1", {"q2": 1}, {}, [])
+    first.restore(draft)
+    assert first.get("a1")["answers"] == {"q2": 1}
+
+
+def test_shared_drafts_expire(workers):
+    first, second = workers
+    first.apply("a1", "v1", {"q1a": 0}, {}, [])
+    first.apply("a2", "v1", {"q1a": 1}, {}, [])
+    first._connect().execute("UPDATE drafts SET updated_at = updated_at - 61 WHERE assessment_id = 'a1'")
+    assert second.get("a1") is None
+    assert second.sweep() == 1
+    assert second.describe()["stored"] == 1
+
+
+def test_shared_concurrent_autosaves_are_not_lost(tmp_path):
+    path = tmp_path / "drafts.db"
+
+    def autosave(worker):
+        store = SharedDraftStore(path, ttl=60)
+        for _ in range(20):
+            store.apply("a1", "v1", {f"q{worker}": worker}, {}, [])
+
+    threads = [threading.Thread(target=autosave, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    draft = SharedDraftStore(path, ttl=60).get("a1")
+    assert draft["revision"] == 160
+    assert draft["answers"] == {f"q{worker}": worker for worker in range(8)}
@@ -0,0 +1,106 @@
+"""Bulk import: imported assessments reach the analytics rollups like submitted ones"""
+
+import csv
+import io
+import uuid
+
+import pytest
+
+from database.index_store import IndexStore
+from utils.analytics import MATURITY_LABELS
+from utils.importer import COMPANY_COLUMNS, import_rows, iter_csv_rows
+from utils.scoring import ResilienceScorer
+
+
+class _DB:
+    """The ChromaDBManager writes the importer makes, mirrored into the index only"""
+
+    def __init__(self, index: IndexStore):
+        self.index = index
+        self.responses = []
+        self.added_companies = 0
+        self.assessments = []
+
+    def add_companies(self, companies):
+        ids = [str(uuid.uuid4()) for _ in companies]
+        self.added_companies += len(companies)
+        self.index.upsert_companies([dict(company, company_id=company_id, created_at="2026-01-01T00:00:00")
+                                     for company_id, company in zip(ids, companies)])
+        return ids
+
+    def create_assessments(self, assessments):
+        ids = [str(uuid.uuid4()) for _ in assessments]
+        self.assessments.extend(assessments)
+        self.index.upsert_assessments([dict(assessment, assessment_id=assessment_id, created_at="2026-01-01T00:00:00")
+                                       for assessment_id, assessment in zip(ids, assessments)])
+        return ids
+
+    def add_responses(self, responses):
+        self.responses.extend(responses)
+
+    def record_results(self, rows):
+        self.index.record_results(rows)
+
+    def find_company(self, key):
+        return self.index.company_by_identity(key)
+
+
+@pytest.fixture
+def db(tmp_path):
+    return _DB(IndexStore(tmp_path / "index.db"))
+
+
+def _csv(compiled, rows):
+    """CSV with every option question answered with the option at `choice` (an index per row)"""
+    stream = io.StringIO()
+    writer = csv.writer(stream)
+    questions = [q for q in compiled.questions if q["question_type"] != "text"]
+    writer.writerow(COMPANY_COLUMNS + [q["question_id"] for q in questions])
+    for name, email, choice in rows:
+        company = {"company_name": name, "contact_email": email, "industry": "Finance"}
+        writer.writerow([company.get(column, "") for column in COMPANY_COLUMNS]
+                        + [q["options"][min(choice, len(q["options"]) - 1)] for q in questions])
+    stream.seek(0)
+    return stream
+
+
+def test_import_records_results(db, compiled):
+    rows = [("Acme Ltd", "a@acme.com", 0), ("Globex", "b@globex.com", 3), ("Initech", "c@initech.com", 3)]
+    report = import_rows(db, ResilienceScorer(), compiled, iter_csv_rows(_csv(compiled, rows)), batch_size=2)
+
+    assert report.imported == 3 and report.failed == 0
+    distribution = db.index.maturity_distribution({})
+    assert sum(row["count"] for row in distribution) == 3
+    assert {MATURITY_LABELS[row["maturity_level"]]: row["count"] for row in distribution} == report.maturity_distribution
+    assert db.index.maturity_distribution({"industry": "Finance"}) == distribution
+
+
+def test_dry_run_records_nothing(db, compiled):
+    rows = [("Acme Ltd", "a@acme.com", 0)]
+    report = import_rows(db, ResilienceScorer(), compiled, iter_csv_rows(_csv(compiled, rows)), dry_run=True)
+
+    assert report.imported == 1
+    assert db.index.maturity_distribution({}) == []
+    assert db.responses == []
+
+
+def test_import_reuses_registered_organisations(db, compiled):
+    db.index.upsert_companies([{"company_id": "acme", "created_at": "2025-01-01T00:00:00",
+                                "company_name": "Acme Ltd", "contact_email": "first@acme.com"}])
+    rows = [
+        ("ACME", "second@acme.com", 0),
+        ("Globex", "a@globex.com", 0),
+        ("Globex", "b@globex.com", 1),
+        ("Initech", "one@gmail.com", 0),
+        ("Initech", "two@gmail.com", 0),
+    ]
+    import_rows(db, ResilienceScorer(), compiled, iter_csv_rows(_csv(compiled, rows)), batch_size=10)
+
+    company_ids = [assessment["company_id"] for assessment in db.assessments]
+    assert company_ids[0] == "acme"
+    assert company_ids[1] == company_ids[2] != "acme"
+    # Free-mail addresses don't identify an organisation
+    assert len({company_ids[1], company_ids[3], company_ids[4]}) == 3
+    assert db.added_companies == 3
+    assert db.assessments[0]["registration"]["contact_email"] == "second@acme.com"
+    assert len(db.index.identity_results("acme")) == 1
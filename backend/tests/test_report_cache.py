@@ -0,0 +1,37 @@
+"""ReportGenerator PDF cache: size accounting when renders finish concurrently"""
+
+import threading
+
+from utils.report_generator import ReportGenerator
+
+
+class _SlowStat:
+    """A rendered PDF whose stat() returns only once every render has reached it"""
+
+    def __init__(self, path, barrier: threading.Barrier):
+        self.path = path
+        self.barrier = barrier
+
+    def stat(self):
+        self.barrier.wait()
+        return self.path.stat()
+
+
+def test_concurrent_renders_stay_within_the_byte_bound(tmp_path):
+    cache = ReportGenerator(tmp_path, max_workers=1, max_mb=16 / 1024, max_age=3600)
+    barrier = threading.Barrier(8)
+    rendered = []
+    for i in range(8):
+        path = cache.report_path(f"report-{i}")
+        path.write_bytes(b"%PDF" + b"x" * 4092)
+        rendered.append(_SlowStat(path, barrier))
+
+    threads = [threading.Thread(target=cache._rendered, args=(path,)) for path in rendered]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    on_disk = sum(path.stat().st_size for path in tmp_path.glob("*.pdf"))
+    assert on_disk <= cache.max_bytes
+    assert cache._cache_bytes == on_disk
@@ -0,0 +1,175 @@
+"""
+Analytics
+Dashboard figures served from the pre-aggregated rollups in the index
+(maturity distribution, average score by cohort, answer frequency), the
+rows each completed submission adds to them, and the rebuild that
+rescores every completed assessment
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import EXPORT_BATCH_SIZE
+
+# Level -> label as assigned by ResilienceScorer._get_maturity_level_info()
+MATURITY_LABELS = {1: "BASIC", 2: "RISK-INFORMED", 3: "REPEATABLE", 4: "MANAGED", 5: "ADAPTIVE"}
+
+
+def result_row(compiled, assessment_id: str, company_id: str, answers: Dict[str, Any], results: Dict[str, Any],
+               completed_at: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Rollup row and scoring snapshot for a scored assessment
+
+    Args:
+        compiled: CompiledSchema the answers belong to
+        answers: {question_id: option label or labels} (decoded answers)
+        results: ResilienceScorer.calculate_score() output
+    """
+    pairs = []
+    for q_id, answer in answers.items():
+        index = compiled.option_index.get(q_id)
+        if not index:
+            # Free text and unknown questions have no options to count
+            continue
+        labels = answer if isinstance(answer, list) else [answer]
+        pairs.extend([q_id, label] for label in dict.fromkeys(labels) if label in index)
+    return {
+        "assessment_id": assessment_id,
+        "company_id": company_id,
+        "completed_at": completed_at or datetime.now().isoformat(),
+        "maturity_level": results["maturity_level"],
+        "total_score": results["total_score"],
+        "answers": pairs,
+        "question_scores": {q["question_id"]: q["score"] for q in results.get("question_scores", [])}
+    }
+
+
+# ==============================
+# REPORTS
+# ==============================
+
+def _average(score_sum: float, count: int) -> float:
+    return round(score_sum / count, 2) if count else 0.0
+
+
+def maturity_report(db, filters: Dict[str, Optional[str]], start: Optional[str], end: Optional[str]) -> Dict[str, Any]:
+    rows = {row["maturity_level"]: row for row in db.get_maturity_distribution(filters, start, end)}
+    total = sum(row["count"] for row in rows.values())
+    levels = []
+    for level, label in MATURITY_LABELS.items():
+        row = rows.get(level, {"count": 0, "score_sum": 0})
+        levels.append({
+            "level": level,
+            "label": label,
+            "count": row["count"],
+            "share": round(row["count"] / total, 4) if total else 0.0,
+            "average_score": _average(row["score_sum"], row["count"])
+        })
+    return {
+        "total": total,
+        "average_score": _average(sum(row["score_sum"] for row in rows.values()), total),
+        "levels": levels
+    }
+
+
+def score_report(db, group_by: str, filters: Dict[str, Optional[str]], start: Optional[str],
+                 end: Optional[str]) -> Dict[str, Any]:
+    """
+    Raises:
+        ValueError: for an unknown group_by
+    """
+    rows = db.get_score_breakdown(group_by, filters, start, end)
+    return {
+        "group_by": group_by,
+        "groups": [
+            {"value": row["value"], "count": row["count"], "average_score": _average(row["score_sum"], row["count"])}
+            for row in rows
+        ]
+    }
+
+
+def answer_report(db, compiled, filters: Dict[str, Optional[str]], start: Optional[str], end: Optional[str],
+                  question_id: Optional[str] = None) -> Dict[str, Any]:
+    """Option counts per question; share is per assessment, so multi-select shares can add up past 1"""
+    total = sum(row["count"] for row in db.get_maturity_distribution(filters, start, end))
+    questions: Dict[str, Dict[str, Any]] = {}
+    for row in db.get_answer_frequency(filters, start, end, question_id):
+        question = questions.get(row["question_id"])
+        if question is None:
+            meta = compiled.by_id.get(row["question_id"], {})
+            question = questions[row["question_id"]] = {
+                "question_id": row["question_id"],
+                "question_text": meta.get("question_text", ""),
+                "options": []
+            }
+        question["options"].append({
+            "answer": row["answer"],
+            "count": row["count"],
+            "share": round(row["count"] / total, 4) if total else 0.0
+        })
+    # Schema order, then anything from retired versions
+    order = {q_id: i for i, q_id in enumerate(compiled.question_ids)}
+    return {
+        "total_assessments": total,
+        "questions": sorted(questions.values(), key=lambda q: (order.get(q["question_id"], len(order)), q["question_id"]))
+    }
+
+
+def cohort_report(db, answer_index, query, limit: int, offset: int = 0) -> Dict[str, Any]:
+    """
+    Scored assessments whose answers match a compiled answer-index query
+
+    Args:
+        query: utils.answer_index.compile_query() output
+    """
+    result = answer_index.query(query, limit, offset)
+    rows = db.index.result_rows(result.pop("row_ids"))
+    return {
+        **result,
+        "assessments": [
+            {
+                "assessment_id": row["assessment_id"],
+                "company_id": row["company_id"],
+                "month": row["bucket"],
+                "industry": row["industry"],
+                "company_size": row["company_size"],
+                "state": row["state"],
+                "maturity_level": row["maturity_level"],
+                "total_score": row["total_score"]
+            }
+            for row in rows
+        ]
+    }
+
+
+# ==============================
+# REBUILD
+# ==============================
+
+def rebuild(db, registry, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Recompute the rollups by rescoring every completed assessment against
+    the schema version it was taken with
+    """
+    db.index.clear_analytics()
+    counts = {"assessments": 0, "skipped": 0}
+    for page in db.iter_assessments(status="completed", batch_size=batch_size):
+        responses = db.get_responses_for_assessments([assessment["assessment_id"] for assessment in page])
+        rows = []
+        for assessment in page:
+            answers = responses.get(assessment["assessment_id"])
+            if not answers or not assessment.get("company_id"):
+                counts["skipped"] += 1
+                continue
+            version = registry.resolve(assessment.get("schema_version"))
+            compiled = version.compiled
+            decoded = {r["question_id"]: compiled.decode_answer(r["question_id"], r.get("answer")) for r in answers}
+            results = version.scorer.calculate_score(decoded)
+            rows.append(result_row(compiled, assessment["assessment_id"], assessment["company_id"], decoded, results,
+                                   assessment.get("completed_at")))
+        db.index.record_results(rows)
+        counts["assessments"] += len(rows)
+    return counts
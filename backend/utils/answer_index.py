@@ -0,0 +1,274 @@
+"""
+Answer Index
+Inverted index of scored assessments by answer: one bitmap of result
+positions per (question_id, option), so cohort questions such as "no
+immutability and an RTO of Days/Weeks" are answered with a handful of
+bitmap ANDs/ORs instead of scanning responses
+
+Positions are assessment_results.row_id. The bitmaps live in memory in each
+worker, are loaded lazily from the index on first use and kept current by
+replaying the index's change log before every query, so a submission in one
+worker is visible to queries in all of them. A replaced or removed result
+keeps its stale bits; it is masked out by the bitmap of live positions.
+
+Roaring bitmaps (pyroaring) are used when installed; otherwise plain
+integer bitsets, which are as fast for the dense position range involved
+but take max(row_id) / 8 bytes per option.
+"""
+
+import itertools
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Nesting limit of a query ({"not": {"and": [...]}} is depth 3)
+MAX_QUERY_DEPTH = 8
+MAX_QUERY_TERMS = 100
+
+
+class IntBitmap:
+    """Set of non-negative ints as bits of one Python int (the subset of pyroaring.BitMap used here)"""
+
+    __slots__ = ("bits",)
+
+    def __init__(self, values: Iterable[int] = ()):
+        values = list(values)
+        self.bits = 0
+        if values:
+            buffer = bytearray(max(values) // 8 + 1)
+            for value in values:
+                buffer[value >> 3] |= 1 << (value & 7)
+            self.bits = int.from_bytes(buffer, "little")
+
+    @classmethod
+    def _wrap(cls, bits: int) -> "IntBitmap":
+        bitmap = cls()
+        bitmap.bits = bits
+        return bitmap
+
+    def add(self, value: int):
+        self.bits |= 1 << value
+
+    def discard(self, value: int):
+        self.bits &= ~(1 << value)
+
+    def __and__(self, other: "IntBitmap") -> "IntBitmap":
+        return self._wrap(self.bits & other.bits)
+
+    def __or__(self, other: "IntBitmap") -> "IntBitmap":
+        return self._wrap(self.bits | other.bits)
+
+    def __sub__(self, other: "IntBitmap") -> "IntBitmap":
+        return self._wrap(self.bits & ~other.bits)
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __iter__(self):
+        data = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+        for offset, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                yield offset * 8 + low.bit_length() - 1
+                byte ^= low
+
+
+try:
+    from pyroaring import BitMap as Bitmap
+    BITMAP_BACKEND = "roaring"
+except ImportError:
+    Bitmap = IntBitmap
+    BITMAP_BACKEND = "int"
+
+
+# ==============================
+# QUERIES
+# ==============================
+
+def compile_query(expression: Any, compiled) -> Tuple:
+    """
+    Validate a query and resolve its options to canonical labels
+
+    A query is a term or a combination of them:
+        {"question_id": "q1a", "options": ["Days/Weeks", "Days"]}  any of the options
+        {"question_id": "q2", "option": "Immutability + Air-gap"}       options by label or index
+        {"and": [query, ...]}, {"or": [query, ...]}, {"not": query}
+
+    Args:
+        compiled: CompiledSchema the option labels are checked against
+
+    Returns:
+        Nested ("term", question_id, labels) / ("and"|"or", parts) / ("not", part) tuples
+
+    Raises:
+        ValueError: for malformed queries, unknown questions or options
+    """
+    terms = [0]
+
+    def build(node: Any, depth: int) -> Tuple:
+        if depth > MAX_QUERY_DEPTH:
+            raise ValueError(f"Query is nested deeper than {MAX_QUERY_DEPTH} levels")
+        if not isinstance(node, dict) or not node:
+            raise ValueError("Each query node must be an object")
+
+        operators = [key for key in ("and", "or", "not") if key in node]
+        if operators:
+            if len(node) != 1:
+                raise ValueError(f"'{operators[0]}' must be the only key of its object")
+            operator = operators[0]
+            if operator == "not":
+                return ("not", build(node["not"], depth + 1))
+            if not isinstance(node[operator], list) or not node[operator]:
+                raise ValueError(f"'{operator}' takes a non-empty list of queries")
+            return (operator, [build(part, depth + 1) for part in node[operator]])
+
+        terms[0] += 1
+        if terms[0] > MAX_QUERY_TERMS:
+            raise ValueError(f"Query has more than {MAX_QUERY_TERMS} terms")
+        question_id = node.get("question_id")
+        question = compiled.by_id.get(question_id)
+        if question is None:
+            raise ValueError(f"Unknown question '{question_id}'")
+        if question["question_type"] == "text":
+            raise ValueError(f"{question_id}: free-text answers are not indexed")
+        options = node.get("options", [node["option"]] if "option" in node else None)
+        if not isinstance(options, list) or not options:
+            raise ValueError(f"{question_id}: give 'option' or a non-empty 'options' list")
+        labels: List[str] = []
+        for option in options:
+            if isinstance(option, int) and not isinstance(option, bool):
+                # Option index, as in compact submissions
+                if not 0 <= option < len(compiled.options[question_id]):
+                    raise ValueError(f"{question_id}: option index {option} is out of range")
+                labels.append(compiled.options[question_id][option])
+                continue
+            # Same label matching as submissions (case and whitespace insensitive)
+            label = compiled.validate_answer(question_id, [option] if question["question_type"] == "multi_select" else option)
+            labels.extend(label if isinstance(label, list) else [label])
+        return ("term", question_id, list(dict.fromkeys(labels)))
+
+    return build(expression, 1)
+
+
+class AnswerIndex:
+    """Bitmaps of scored assessments per answered option, fed by IndexStore"""
+
+    def __init__(self, index_store, batch_size: int = 10000):
+        self.store = index_store
+        self.batch_size = batch_size
+        self._bitmaps: Dict[Tuple[str, str], Any] = {}
+        self._live = Bitmap()
+        self._position: Optional[int] = None
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self.load_seconds = 0.0
+
+    # ==============================
+    # MAINTENANCE
+    # ==============================
+
+    @staticmethod
+    def _group(rows: Iterable[Tuple[int, str]]) -> Dict[Tuple[str, str], List[int]]:
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for row_id, answers in rows:
+            for question_id, label in json.loads(answers):
+                groups.setdefault((question_id, label), []).append(row_id)
+        return groups
+
+    def _load(self):
+        start = time.perf_counter()
+        # Changes committed while the table is being read are in the log
+        # past this position and get replayed; replaying is idempotent
+        position = self.store.answer_log_position()
+        bitmaps: Dict[Tuple[str, str], Any] = {}
+        live = Bitmap()
+        for batch in self.store.iter_result_answers(self.batch_size):
+            live |= Bitmap(row_id for row_id, _ in batch)
+            for key, row_ids in self._group(batch).items():
+                if key in bitmaps:
+                    bitmaps[key] = bitmaps[key] | Bitmap(row_ids)
+                else:
+                    bitmaps[key] = Bitmap(row_ids)
+        self._bitmaps, self._live, self._position = bitmaps, live, position
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - start
+
+    def _apply(self, changes: List[Tuple[int, int, int, Optional[str]]]):
+        for seq, row_id, added, answers in changes:
+            if not added:
+                self._live.discard(row_id)
+            elif answers is not None:
+                self._live.add(row_id)
+                for question_id, label in json.loads(answers):
+                    bitmap = self._bitmaps.get((question_id, label))
+                    if bitmap is None:
+                        bitmap = self._bitmaps[(question_id, label)] = Bitmap()
+                    bitmap.add(row_id)
+            self._position = seq
+
+    def refresh(self):
+        """Catch up with results recorded by any process since the last call"""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self._position is not None:
+            changes = self.store.answer_changes(self._position)
+            if changes is not None:
+                self._apply(changes)
+                return
+            print("[*] Answer index fell behind the change log; reloading")
+        self._load()
+
+    # ==============================
+    # EVALUATION
+    # ==============================
+
+    def _evaluate(self, node: Tuple):
+        kind = node[0]
+        if kind == "term":
+            _, question_id, labels = node
+            result = Bitmap()
+            for label in labels:
+                bitmap = self._bitmaps.get((question_id, label))
+                if bitmap is not None:
+                    result = result | bitmap
+            return result & self._live
+        if kind == "not":
+            return self._live - self._evaluate(node[1])
+        parts = [self._evaluate(part) for part in node[1]]
+        result = parts[0]
+        for part in parts[1:]:
+            result = result & part if kind == "and" else result | part
+        return result
+
+    def query(self, node: Tuple, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        """
+        Assessments matching a compiled query (see compile_query)
+
+        Returns:
+            {"count", "total", "elapsed_ms", "row_ids"}: the number of
+            matches, of scored assessments, the time spent on bitmap
+            operations, and up to `limit` matching row_ids after `offset`
+        """
+        with self._lock:
+            self._refresh()
+            start = time.perf_counter()
+            matches = self._evaluate(node)
+            elapsed = time.perf_counter() - start
+            return {
+                "count": len(matches),
+                "total": len(self._live),
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "row_ids": list(itertools.islice(matches, offset, offset + limit))
+            }
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "backend": BITMAP_BACKEND,
+            "assessments": len(self._live),
+            "options": len(self._bitmaps),
+            "position": self._position,
+            "load_seconds": round(self.load_seconds, 3)
+        }
@@ -0,0 +1,105 @@
+"""
+Company History
+Time series of an organisation's scored assessments and score/answer deltas
+between any two of them, read from the scoring snapshots stored at submit
+(IndexStore.assessment_results) rather than rescored
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+def history_report(db, company_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Scored assessments of an organisation, oldest first, each with its
+    change since the previous one
+
+    Returns:
+        None when the company is not known
+    """
+    key = db.index.company_identity(company_id)
+    if key is None:
+        return None
+    assessments = db.get_company_history(company_id)
+    previous = None
+    for assessment in assessments:
+        assessment["score_change"] = (
+            round(assessment["total_score"] - previous["total_score"], 2) if previous else None
+        )
+        assessment["maturity_change"] = (
+            assessment["maturity_level"] - previous["maturity_level"] if previous else None
+        )
+        previous = assessment
+    return {
+        "company_id": company_id,
+        "company_ids": sorted({assessment["company_id"] for assessment in assessments} | {company_id}),
+        "count": len(assessments),
+        "assessments": assessments
+    }
+
+
+def _answers_by_question(pairs: List[List[str]]) -> Dict[str, List[str]]:
+    answers: Dict[str, List[str]] = {}
+    for question_id, label in pairs:
+        answers.setdefault(question_id, []).append(label)
+    return answers
+
+
+def delta_report(db, compiled, from_id: str, to_id: str) -> Dict[str, Any]:
+    """
+    Score and per-question changes from one scored assessment to another
+
+    Args:
+        compiled: CompiledSchema used for question text, types and ordering
+                  (questions only in other versions are listed last)
+
+    Raises:
+        LookupError: naming the assessment that has no stored snapshot
+    """
+    snapshots = db.get_result_snapshots([from_id, to_id])
+    for assessment_id in (from_id, to_id):
+        if assessment_id not in snapshots:
+            raise LookupError(f"No scored snapshot for assessment {assessment_id}")
+    before, after = snapshots[from_id], snapshots[to_id]
+
+    answers_before = _answers_by_question(before["answers"])
+    answers_after = _answers_by_question(after["answers"])
+    question_ids = set(before["question_scores"]) | set(after["question_scores"]) | set(answers_before) | set(answers_after)
+    order = {q_id: i for i, q_id in enumerate(compiled.question_ids)}
+
+    def answer(answers: Dict[str, List[str]], q_id: str):
+        labels = answers.get(q_id)
+        if labels is None:
+            return None
+        multi = compiled.by_id.get(q_id, {}).get("question_type") == "multi_select"
+        return labels if multi or len(labels) > 1 else labels[0]
+
+    questions = []
+    for q_id in sorted(question_ids, key=lambda q: (order.get(q, len(order)), q)):
+        score_before = before["question_scores"].get(q_id)
+        score_after = after["question_scores"].get(q_id)
+        answer_before, answer_after = answer(answers_before, q_id), answer(answers_after, q_id)
+        questions.append({
+            "question_id": q_id,
+            "question_text": compiled.by_id.get(q_id, {}).get("question_text", ""),
+            "from_answer": answer_before,
+            "to_answer": answer_after,
+            "from_score": score_before,
+            "to_score": score_after,
+            "score_delta": (score_after - score_before) if score_before is not None and score_after is not None else None,
+            "changed": answer_before != answer_after or score_before != score_after
+        })
+
+    def summary(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: snapshot[key] for key in ("assessment_id", "company_id", "completed_at", "total_score", "maturity_level")}
+
+    return {
+        "from": summary(before),
+        "to": summary(after),
+        # Comparing two different organisations is allowed but flagged
+        "same_organisation": before["company_id"] == after["company_id"]
+                             or bool(before["identity_key"] and before["identity_key"] == after["identity_key"]),
+        "total_score_delta": round(after["total_score"] - before["total_score"], 2),
+        "maturity_level_delta": after["maturity_level"] - before["maturity_level"],
+        "changed_questions": sum(1 for question in questions if question["changed"]),
+        "questions": questions
+    }
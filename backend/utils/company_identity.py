@@ -0,0 +1,64 @@
+"""
+Company Identity
+Resolves repeat registrations of the same organisation: the identity key
+is the normalized company name plus the contact email's domain, so
+"Acme Pvt. Ltd." / jane@acme.com and "ACME" / raj@acme.com are one
+organisation while an unrelated Acme on another domain is not
+
+Personal mailbox domains (gmail.com, outlook.com, ...) say nothing about the
+organisation, so registrations from them get no identity key: only their
+name is left to go on, and linking by name needs the registrant to confirm
+"""
+
+import re
+import unicodedata
+from typing import Optional
+
+# Trailing legal-form words that don't distinguish organisations
+LEGAL_SUFFIXES = {
+    "co", "company", "corp", "corporation", "gmbh", "inc", "incorporated", "limited",
+    "llc", "llp", "ltd", "plc", "private", "pte", "pty", "pvt", "sa", "ag"
+}
+
+# Public webmail providers, shared by unrelated organisations
+FREE_MAIL_DOMAINS = {
+    "aol.com", "fastmail.com", "gmail.com", "gmx.com", "gmx.de", "googlemail.com", "hotmail.co.uk",
+    "hotmail.com", "icloud.com", "live.com", "live.in", "mac.com", "mail.com", "me.com", "msn.com",
+    "outlook.com", "outlook.in", "proton.me", "protonmail.com", "rediffmail.com", "tutanota.com",
+    "yahoo.co.in", "yahoo.co.uk", "yahoo.com", "yahoo.in", "yandex.com", "yandex.ru", "zohomail.com",
+    "zohomail.in"
+}
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """'The Acme Co., Pvt. Ltd.' -> 'acme'"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii").lower()
+    words = re.findall(r"[a-z0-9]+", text.replace("&", " and "))
+    while words and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    if len(words) > 1 and words[0] == "the":
+        words.pop(0)
+    return " ".join(words)
+
+
+def email_domain(email: Optional[str]) -> str:
+    local, _, domain = (email or "").strip().lower().rpartition("@")
+    return domain if local else ""
+
+
+def is_free_mail(domain: str) -> bool:
+    return domain in FREE_MAIL_DOMAINS
+
+
+def identity_key(company_name: Optional[str], contact_email: Optional[str]) -> str:
+    """
+    Lookup key shared by registrations of the same organisation
+
+    Returns:
+        "normalized name|email domain", or "" when the name is empty or
+        the domain is a free-mail provider (such companies are never merged
+        automatically)
+    """
+    name = normalize_name(company_name)
+    domain = email_domain(contact_email)
+    return f"{name}|{domain}" if name and not is_free_mail(domain) else ""
@@ -0,0 +1,149 @@
+"""
+Company Search
+Fuzzy lookup of companies by name or contact email domain over the trigram
+index kept in IndexStore (company_search / company_grams)
+
+Names are normalized like identity keys (utils/company_identity.py) and cut
+into padded word trigrams ("  h", " hd", "hdf", "dfc", "fc "), so prefixes,
+substrings and misspellings all share grams with the query. Whole words are
+posted as well: in a large index every trigram is common, while a correctly
+spelled word of the query is usually rare. A query reads the postings of its
+rarest grams and words (bounded, whatever the number of companies), then
+ranks that candidate window by how much of the query's trigrams each name
+covers.
+"""
+
+import re
+import zlib
+from typing import Any, Dict, Iterable, List, Set
+
+from .company_identity import normalize_name
+
+# Letters a normalized name can contain; the index stores a trigram as one integer
+_ALPHABET = " abcdefghijklmnopqrstuvwxyz0123456789"
+_CODES = {char: code for code, char in enumerate(_ALPHABET)}
+# Domain labels that say nothing about the organisation (hdfcbank.co.in -> hdfcbank)
+_GENERIC_LABELS = {"ac", "co", "com", "edu", "gov", "in", "net", "nic", "org", "www"}
+
+# Words are posted under codes above every trigram code
+_WORD_CODES = len(_ALPHABET) ** 3
+
+# Postings read per query; the rarest grams are taken until this is reached
+POSTINGS_BUDGET = 4000
+# Candidates ranked per query, and so the deepest page that can be served
+MAX_CANDIDATES = 1000
+# Share of the query's trigrams a name must contain (prefix matches always qualify)
+MIN_COVERAGE = 0.3
+
+
+def domain_words(domain: str) -> List[str]:
+    labels = domain.lower().split(".")[:-1]
+    return [word for label in labels if label not in _GENERIC_LABELS for word in re.findall(r"[a-z0-9]+", label)]
+
+
+def trigrams(text: str) -> Set[str]:
+    """Padded trigrams of each word of normalized text"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def company_trigrams(search_name: str, email_domain: str) -> Set[str]:
+    return trigrams(" ".join([search_name] + domain_words(email_domain)))
+
+
+def search_text(search_name: str, email_domain: str) -> str:
+    """
+    Padded words of a company ("  hdfc   bank "), stored with it: a query
+    trigram is one of the company's trigrams exactly when it occurs in this
+    text (spans across words are "x  " or "   ", never query trigrams)
+    """
+    return "".join(f"  {word} " for word in " ".join([search_name] + domain_words(email_domain)).split())
+
+
+def gram_code(gram: str) -> int:
+    size = len(_ALPHABET)
+    return (_CODES[gram[0]] * size + _CODES[gram[1]]) * size + _CODES[gram[2]]
+
+
+def word_code(word: str) -> int:
+    # Collisions only widen the candidate window; ranking uses trigrams
+    return _WORD_CODES + zlib.crc32(word.encode())
+
+
+def index_codes(text: str) -> Set[int]:
+    """Postings codes of normalized text: its trigrams and its words"""
+    return {gram_code(gram) for gram in trigrams(text)} | {word_code(word) for word in text.split()}
+
+
+def company_codes(search_name: str, email_domain: str) -> Set[int]:
+    return index_codes(" ".join([search_name] + domain_words(email_domain)))
+
+
+def select_grams(grams: Iterable[int], counts: Dict[int, int], budget: int = POSTINGS_BUDGET) -> List[int]:
+    """Rarest grams that occur at all, up to `budget` postings (at least one)"""
+    chosen, total = [], 0
+    for gram in sorted((gram for gram in grams if counts.get(gram)), key=lambda gram: counts[gram]):
+        if chosen and total + counts[gram] > budget:
+            break
+        chosen.append(gram)
+        total += counts[gram]
+    return chosen
+
+
+def search(db, query: str, limit: int, offset: int = 0) -> Dict[str, Any]:
+    """
+    Companies ranked by resemblance of their name or contact domain to the query
+
+    Returns:
+        {"matches", "items"}: matches counts qualifying companies among the
+        ranked candidates (at most MAX_CANDIDATES), items is the page
+
+    Raises:
+        ValueError: when the query has no letters or digits, or the page
+                    lies beyond the candidate window
+    """
+    text = normalize_name(query)
+    if not text:
+        raise ValueError("Search query needs letters or digits")
+    if offset + limit > MAX_CANDIDATES:
+        raise ValueError(f"Search results are ranked up to {MAX_CANDIDATES} deep; narrow the query")
+    grams = trigrams(text)
+    window = min(MAX_CANDIDATES, max(50, 2 * (offset + limit)))
+    codes = list(index_codes(text))
+    chosen = select_grams(codes, db.index.gram_counts(codes))
+    rows = db.index.company_search_candidates(chosen, text, POSTINGS_BUDGET, window)
+
+    ranked = []
+    for row in rows:
+        shared = sum(1 for gram in grams if gram in row["search_text"])
+        coverage = shared / len(grams)
+        prefix = row["search_name"].startswith(text)
+        if coverage < MIN_COVERAGE and not prefix:
+            continue
+        score = 0.7 * coverage + 0.3 * shared / (len(grams) + row["gram_total"] - shared)
+        if row["search_name"] == text:
+            score += 0.5
+        elif prefix:
+            score += 0.25
+        ranked.append((round(score, 4), row))
+    ranked.sort(key=lambda item: (-item[0], item[1]["search_name"], item[1]["company_id"]))
+
+    return {
+        "matches": len(ranked),
+        "items": [
+            {
+                "company_id": row["company_id"],
+                "company_name": row["company_name"],
+                "email_domain": row["email_domain"],
+                "industry": row["industry"],
+                "company_size": row["company_size"],
+                "state": row["state"],
+                "created_at": row["created_at"],
+                "score": score
+            }
+            for score, row in ranked[offset:offset + limit]
+        ]
+    }
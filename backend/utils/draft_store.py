@@ -0,0 +1,386 @@
+"""
+Draft Store
+In-progress answers keyed by assessment_id, updated by per-question deltas
+and written to ChromaDB once, in a single batch, when the assessment is
+submitted
+
+DraftStore keeps drafts in memory (LRU, idle TTL). Least recently used
+drafts beyond the memory limit, and all drafts at shutdown, spill to
+DRAFT_SPILL_DIR when it is set and are loaded back on the next access.
+It is per process, so it only suits a single API worker.
+
+SharedDraftStore keeps them in a SQLite database (DRAFT_DB_PATH) that every
+worker opens, so autosaves and the submit of one assessment may land on
+any worker. DRAFT_STORAGE picks the store; it defaults to the shared one
+in CHROMA_MODE=http, the multi-worker mode.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import DRAFT_TTL_SECONDS, DRAFT_MAX_IN_MEMORY, DRAFT_SPILL_DIR, DRAFT_STORAGE, DRAFT_DB_PATH
+from .json_codec import dumps_bytes, loads
+
+_SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    assessment_id TEXT PRIMARY KEY,
+    draft BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drafts_by_updated ON drafts (updated_at);
+"""
+
+
+def _new_draft(assessment_id: str, schema_version: str, now: float) -> Dict[str, Any]:
+    return {
+        "assessment_id": assessment_id,
+        "schema_version": schema_version,
+        "answers": {},
+        "comments": {},
+        "revision": 0,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+def _merge(draft: Dict[str, Any], answers: Dict[str, Any], comments: Dict[str, Optional[str]],
+           remove: List[str], now: float) -> Dict[str, Any]:
+    """Apply one delta to the draft in place; returns the apply() summary"""
+    draft["answers"].update(answers)
+    for q_id in remove:
+        draft["answers"].pop(q_id, None)
+    for q_id, comment in comments.items():
+        if comment:
+            draft["comments"][q_id] = comment
+        else:
+            draft["comments"].pop(q_id, None)
+    draft["revision"] += 1
+    draft["updated_at"] = now
+    return {
+        "assessment_id": draft["assessment_id"],
+        "revision": draft["revision"],
+        "answered": len(draft["answers"]),
+        "updated_at": now
+    }
+
+
+async def _run_sweeper(store, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(store.sweep)
+        except Exception as e:
+            print(f"[!] Draft sweep failed: {e}")
+
+
+class DraftStore:
+    """
+    Thread-safe draft sessions: {"assessment_id", "schema_version",
+    "answers": {question_id: answer code}, "comments": {question_id: text},
+    "revision", "created_at", "updated_at"}
+    """
+
+    def __init__(self, ttl: float = DRAFT_TTL_SECONDS, max_in_memory: int = DRAFT_MAX_IN_MEMORY,
+                 spill_dir: Optional[Path] = DRAFT_SPILL_DIR):
+        self.ttl = ttl
+        self.max_in_memory = max_in_memory
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._drafts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "spilled": 0, "loaded": 0, "expired": 0, "evicted": 0}
+
+    # ==============================
+    # DISK SPILL
+    # ==============================
+
+    def _spill_path(self, assessment_id: str) -> Path:
+        # Ids come from clients: never use them as file names directly
+        return self.spill_dir / f"{hashlib.sha256(assessment_id.encode('utf-8')).hexdigest()[:32]}.json"
+
+    def _spill(self, draft: Dict[str, Any]):
+        path = self._spill_path(draft["assessment_id"])
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(dumps_bytes(draft))
+        os.replace(tmp_path, path)
+        self.stats["spilled"] += 1
+
+    def _load_spilled(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(assessment_id)
+        try:
+            draft = loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        path.unlink(missing_ok=True)
+        if draft.get("assessment_id") != assessment_id:
+            return None
+        self.stats["loaded"] += 1
+        return draft
+
+    def _discard_spilled(self, assessment_id: str):
+        if self.spill_dir:
+            self._spill_path(assessment_id).unlink(missing_ok=True)
+
+    # ==============================
+    # ACCESS
+    # ==============================
+
+    def _expired(self, draft: Dict[str, Any], now: float) -> bool:
+        return self.ttl > 0 and now - draft["updated_at"] > self.ttl
+
+    def _lookup(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        """Caller holds the lock; promotes the draft to most recently used"""
+        now = time.time()
+        draft = self._drafts.get(assessment_id)
+        if draft is None:
+            draft = self._load_spilled(assessment_id)
+            if draft is None:
+                self.stats["misses"] += 1
+                return None
+            self._drafts[assessment_id] = draft
+        else:
+            self.stats["hits"] += 1
+
+        if self._expired(draft, now):
+            del self._drafts[assessment_id]
+            self.stats["expired"] += 1
+            return None
+        self._drafts.move_to_end(assessment_id)
+        return draft
+
+    def _enforce_limit(self):
+        while len(self._drafts) > self.max_in_memory:
+            _, draft = self._drafts.popitem(last=False)
+            self.stats["evicted"] += 1
+            if self.spill_dir:
+                self._spill(draft)
+
+    def get(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of the draft, or None if there is none (or it expired)"""
+        with self._lock:
+            draft = self._lookup(assessment_id)
+            self._enforce_limit()
+            if draft is None:
+                return None
+            return dict(draft, answers=dict(draft["answers"]), comments=dict(draft["comments"]))
+
+    def schema_version(self, assessment_id: str) -> Optional[str]:
+        """Version the draft was started with, or None when there is no draft"""
+        with self._lock:
+            draft = self._lookup(assessment_id)
+            self._enforce_limit()
+            return draft["schema_version"] if draft else None
+
+    def apply(self, assessment_id: str, schema_version: str, answers: Dict[str, Any],
+              comments: Dict[str, Optional[str]], remove: List[str]) -> Dict[str, Any]:
+        """
+        Merge one delta into the draft, creating it if needed
+
+        Args:
+            answers: question_id -> answer code to set
+            comments: question_id -> comment (None or "" removes it)
+            remove: question ids whose answer is cleared
+        Returns:
+            Summary: revision, answered count, updated_at
+        """
+        with self._lock:
+            draft = self._lookup(assessment_id)
+            now = time.time()
+            if draft is None:
+                draft = self._drafts[assessment_id] = _new_draft(assessment_id, schema_version, now)
+            summary = _merge(draft, answers, comments, remove, now)
+            self._enforce_limit()
+            return summary
+
+    def pop(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        """Remove and return the draft (at submit, after which it must not linger)"""
+        with self._lock:
+            draft = self._lookup(assessment_id)
+            self._drafts.pop(assessment_id, None)
+            self._discard_spilled(assessment_id)
+            return draft
+
+    def restore(self, draft: Dict[str, Any]):
+        """Put a popped draft back (a submit that failed before anything was written)"""
+        with self._lock:
+            self._drafts.setdefault(draft["assessment_id"], draft)
+            self._enforce_limit()
+
+    # ==============================
+    # MAINTENANCE
+    # ==============================
+
+    def sweep(self) -> int:
+        """Drop expired drafts from memory and disk; returns how many were removed"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for assessment_id in [a for a, d in self._drafts.items() if self._expired(d, now)]:
+                del self._drafts[assessment_id]
+                removed += 1
+        if self.spill_dir and self.ttl > 0:
+            for path in self.spill_dir.glob("*.json"):
+                try:
+                    if now - path.stat().st_mtime > self.ttl:
+                        path.unlink()
+                        removed += 1
+                except OSError:
+                    pass
+        self.stats["expired"] += removed
+        return removed
+
+    def spill_all(self) -> int:
+        """Write every in-memory draft to disk (shutdown), so a restart does not lose them"""
+        if not self.spill_dir:
+            return 0
+        with self._lock:
+            drafts = list(self._drafts.values())
+            for draft in drafts:
+                self._spill(draft)
+            self._drafts.clear()
+        return len(drafts)
+
+    def in_memory_count(self) -> int:
+        """Drafts held in memory; cheap enough for every metrics scrape"""
+        with self._lock:
+            return len(self._drafts)
+
+    def describe(self) -> Dict[str, Any]:
+        """Counts for the admin stats view; lists the spill directory"""
+        in_memory = self.in_memory_count()
+        on_disk = len(list(self.spill_dir.glob("*.json"))) if self.spill_dir else 0
+        return {"in_memory": in_memory, "on_disk": on_disk, "ttl_seconds": self.ttl,
+                "max_in_memory": self.max_in_memory, **self.stats}
+
+    async def run_sweeper(self, interval: float):
+        """Background task: expire idle drafts every `interval` seconds"""
+        await _run_sweeper(self, interval)
+
+
+class SharedDraftStore:
+    """
+    DraftStore's interface over a SQLite database shared by every worker
+    (one connection per thread). Each delta is merged inside one write
+    transaction, so concurrent autosaves from different workers apply in
+    turn to the same draft instead of to diverging copies.
+    """
+
+    def __init__(self, path: Path = DRAFT_DB_PATH, ttl: float = DRAFT_TTL_SECONDS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.spill_dir = None
+        self._local = threading.local()
+        self._connect().executescript(_SHARED_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit: writes open their own BEGIN IMMEDIATE transaction
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so read-merge-write can't interleave across workers
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _read(self, conn: sqlite3.Connection, assessment_id: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute("SELECT draft, updated_at FROM drafts WHERE assessment_id = ?", (assessment_id,)).fetchone()
+        if row is None or (self.ttl > 0 and time.time() - row[1] > self.ttl):
+            return None
+        return loads(row[0])
+
+    def _write(self, conn: sqlite3.Connection, draft: Dict[str, Any]):
+        conn.execute(
+            "INSERT INTO drafts (assessment_id, draft, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (assessment_id) DO UPDATE SET draft = excluded.draft, updated_at = excluded.updated_at",
+            (draft["assessment_id"], dumps_bytes(draft), draft["updated_at"])
+        )
+
+    def get(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        """The draft, or None if there is none (or it expired)"""
+        return self._read(self._connect(), assessment_id)
+
+    def schema_version(self, assessment_id: str) -> Optional[str]:
+        """Version the draft was started with, or None when there is no draft"""
+        draft = self.get(assessment_id)
+        return draft["schema_version"] if draft else None
+
+    def apply(self, assessment_id: str, schema_version: str, answers: Dict[str, Any],
+              comments: Dict[str, Optional[str]], remove: List[str]) -> Dict[str, Any]:
+        """Merge one delta into the draft, creating it if needed (see DraftStore.apply)"""
+        with self._transaction() as conn:
+            now = time.time()
+            draft = self._read(conn, assessment_id) or _new_draft(assessment_id, schema_version, now)
+            summary = _merge(draft, answers, comments, remove, now)
+            self._write(conn, draft)
+        return summary
+
+    def pop(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        """Remove and return the draft (at submit, after which it must not linger)"""
+        with self._transaction() as conn:
+            draft = self._read(conn, assessment_id)
+            conn.execute("DELETE FROM drafts WHERE assessment_id = ?", (assessment_id,))
+        return draft
+
+    def restore(self, draft: Dict[str, Any]):
+        """Put a popped draft back unless an autosave has started a new one since"""
+        self._connect().execute(
+            "INSERT INTO drafts (assessment_id, draft, updated_at) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+            (draft["assessment_id"], dumps_bytes(draft), draft["updated_at"])
+        )
+
+    def sweep(self) -> int:
+        """Delete expired drafts; returns how many were removed"""
+        if self.ttl <= 0:
+            return 0
+        return self._connect().execute("DELETE FROM drafts WHERE updated_at < ?", (time.time() - self.ttl,)).rowcount
+
+    def spill_all(self) -> int:
+        """Nothing to save at shutdown: every delta is already on disk"""
+        return 0
+
+    def in_memory_count(self) -> int:
+        return 0
+
+    def describe(self) -> Dict[str, Any]:
+        """Counts for the admin stats view"""
+        stored = self._connect().execute("SELECT COUNT(*) FROM drafts").fetchone()[0]
+        return {"storage": "sqlite", "stored": stored, "ttl_seconds": self.ttl}
+
+    async def run_sweeper(self, interval: float):
+        """Background task: expire idle drafts every `interval` seconds"""
+        await _run_sweeper(self, interval)
+
+
+def create_draft_store():
+    """The store selected by DRAFT_STORAGE ("memory" or "sqlite")"""
+    if DRAFT_STORAGE == "sqlite":
+        return SharedDraftStore()
+    if DRAFT_STORAGE == "memory":
+        return DraftStore()
+    raise ValueError(f"DRAFT_STORAGE must be 'memory' or 'sqlite', not '{DRAFT_STORAGE}'")
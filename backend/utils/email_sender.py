@@ -2,9 +2,13 @@
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.mime.application import MIMEApplication
+from pathlib import Path
 import os
 import logging
 
+from .metrics import timed
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -73,9 +77,11 @@ def generate_email_html(company_name, results):
     """
     return html
 
-def send_assessment_email(to_email, company_name, results):
+@timed("email.send")
+def send_assessment_email(to_email, company_name, results, attachment_path=None):
     """
     Sends the assessment report via email using SBA Info Solutions SMTP or Resend API
+    Optionally attaches a pre-rendered PDF scorecard (SMTP only)
     """
     # 1. Generate Content First (fix for 'subject not defined' error)
     subject = f"Assessment Summary - {company_name}"
@@ -172,6 +178,13 @@ def send_assessment_email(to_email, company_name, results):
     msg['Subject'] = subject
     msg.attach(MIMEText(html_content, 'html'))
     
+    if attachment_path:
+        # The PDF comes from the report cache, so attaching it is just a file read
+        pdf_path = Path(attachment_path)
+        attachment = MIMEApplication(pdf_path.read_bytes(), _subtype="pdf")
+        attachment.add_header('Content-Disposition', 'attachment', filename="Cyber_Resilience_Scorecard.pdf")
+        msg.attach(attachment)
+    
     try:
         logger.info(f"Connecting to SMTP server: {SMTP_SERVER}:{SMTP_PORT}")
         
@@ -184,7 +197,9 @@ def send_assessment_email(to_email, company_name, results):
         else:
             # TLS Connection
             server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=timeout)
-            server.starttls()
+            # SMTP_STARTTLS=false only for local relays and test sinks
+            if os.getenv("SMTP_STARTTLS", "true").lower() == "true":
+                server.starttls()
             
         server.login(SMTP_USER, SMTP_PASS)
         text = msg.as_string()
@@ -0,0 +1,233 @@
+"""
+Bulk Assessment Exporter
+Streams assessments joined with company info, answers and scores as
+NDJSON, CSV or Parquet without materializing the whole dataset
+"""
+
+import csv
+import io
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import EXPORT_BATCH_SIZE
+from .json_codec import dumps_bytes
+
+COMPANY_FIELDS = [
+    "company_name",
+    "contact_email",
+    "contact_name",
+    "designation",
+    "current_backup_solution",
+    "industry",
+    "company_size",
+    "state"
+]
+
+ASSESSMENT_FIELDS = [
+    "assessment_id",
+    "company_id",
+    "status",
+    "created_at",
+    "completed_at"
+]
+
+SCORE_FIELDS = [
+    "total_score",
+    "max_score",
+    "average_score",
+    "maturity_level",
+    "maturity_label"
+]
+
+
+def iter_export_batches(db, schemas, status: str = "completed", batch_size: int = EXPORT_BATCH_SIZE,
+                        completed_from: Any = None, completed_to: Any = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Join assessments, companies and responses chunk by chunk
+
+    Each storage page costs three round trips (assessments, companies,
+    responses) regardless of how many rows it contains. Stored answer codes
+    are decoded and scored with the schema version each assessment is
+    pinned to (schemas.resolve()).
+
+    Yields:
+        Lists of flat export records (one per assessment)
+    """
+    for assessments in db.iter_assessments(status=status, batch_size=batch_size,
+                                           completed_from=completed_from, completed_to=completed_to):
+        companies = db.get_companies([a.get("company_id", "") for a in assessments])
+        responses = db.get_responses_for_assessments([a["assessment_id"] for a in assessments])
+
+        batch = []
+        for assessment in assessments:
+            record = {field: assessment.get(field, "") for field in ASSESSMENT_FIELDS}
+
+            company = companies.get(assessment.get("company_id", ""), {})
+            # Contact details as entered for this assessment win over the company's first registration
+            registration = assessment.get("registration") or {}
+            for field in COMPANY_FIELDS:
+                record[field] = registration.get(field) or company.get(field, "")
+
+            version = schemas.resolve(assessment.get("schema_version"))
+
+            # Later saves of the same question overwrite earlier ones
+            answers = {}
+            comments = {}
+            for response in responses.get(assessment["assessment_id"], []):
+                q_id = response.get("question_id", "")
+                answers[q_id] = version.compiled.decode_answer(q_id, response.get("answer", ""))
+                if response.get("comment"):
+                    comments[q_id] = response["comment"]
+
+            results = version.scorer.calculate_score(answers)
+            for field in SCORE_FIELDS:
+                record[field] = results.get(field, "")
+
+            record["answers"] = answers
+            record["comments"] = comments
+            batch.append(record)
+
+        yield batch
+
+
+def _flat_columns(question_ids: List[str]) -> List[str]:
+    return ASSESSMENT_FIELDS + COMPANY_FIELDS + SCORE_FIELDS + list(question_ids)
+
+
+def _flatten_answer(answer: Any) -> str:
+    if isinstance(answer, list):
+        return "; ".join(str(a) for a in answer)
+    return "" if answer is None else str(answer)
+
+
+def _flat_row(record: Dict[str, Any], question_ids: List[str]) -> Dict[str, Any]:
+    row = {key: record.get(key, "") for key in ASSESSMENT_FIELDS + COMPANY_FIELDS + SCORE_FIELDS}
+    answers = record.get("answers", {})
+    for q_id in question_ids:
+        row[q_id] = _flatten_answer(answers.get(q_id, ""))
+    return row
+
+
+# ==============================
+# FORMAT WRITERS
+# ==============================
+
+def stream_ndjson(batches: Iterable[List[Dict[str, Any]]], question_ids: List[str] = None) -> Iterator[bytes]:
+    """One JSON document per line; answers keep their native list/str shape"""
+    for batch in batches:
+        yield b"".join(dumps_bytes(record) + b"\n" for record in batch)
+
+
+def stream_csv(batches: Iterable[List[Dict[str, Any]]], question_ids: List[str]) -> Iterator[bytes]:
+    """Wide CSV with one column per question; multi-select answers joined by '; '"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=_flat_columns(question_ids), extrasaction="ignore")
+    writer.writeheader()
+
+    for batch in batches:
+        for record in batch:
+            writer.writerow(_flat_row(record, question_ids))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each row group"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_parquet(batches: Iterable[List[Dict[str, Any]]], question_ids: List[str]) -> Iterator[bytes]:
+    """One Parquet row group per storage page (requires pyarrow)"""
+    # Checked eagerly so callers can reject the request before streaming starts
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    return _parquet_chunks(pa, pq, batches, question_ids)
+
+
+def _parquet_chunks(pa, pq, batches: Iterable[List[Dict[str, Any]]], question_ids: List[str]) -> Iterator[bytes]:
+    columns = _flat_columns(question_ids)
+    numeric = {"total_score": pa.int64(), "max_score": pa.int64(), "average_score": pa.float64(), "maturity_level": pa.int64()}
+    schema = pa.schema([(name, numeric.get(name, pa.string())) for name in columns])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            rows = [_flat_row(record, question_ids) for record in batch]
+            data = {}
+            for name in columns:
+                values = [row.get(name) for row in rows]
+                if name in numeric:
+                    values = [None if v == "" else v for v in values]
+                else:
+                    values = [None if v is None else str(v) for v in values]
+                data[name] = values
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+EXPORT_FORMATS: Dict[str, Dict[str, Any]] = {
+    "ndjson": {"media_type": "application/x-ndjson", "extension": "ndjson", "writer": stream_ndjson},
+    "csv": {"media_type": "text/csv", "extension": "csv", "writer": stream_csv},
+    "parquet": {"media_type": "application/vnd.apache.parquet", "extension": "parquet", "writer": stream_parquet}
+}
+
+
+def export_stream(db, schemas, question_ids: List[str], export_format: str = "ndjson",
+                  status: str = "completed", batch_size: int = EXPORT_BATCH_SIZE,
+                  completed_from: Any = None, completed_to: Any = None) -> Iterator[bytes]:
+    """
+    Byte stream of the full export in the requested format
+
+    Args:
+        db: ChromaDBManager instance
+        schemas: SchemaRegistry resolving each assessment's questionnaire version
+        question_ids: Column order for the per-question answer columns
+        export_format: One of EXPORT_FORMATS
+        status: Assessment status filter (None exports everything)
+        batch_size: Assessments fetched per storage page
+        completed_from, completed_to: Optional completion window [from, to),
+            e.g. one month for a monthly report
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    writer: Callable = EXPORT_FORMATS[export_format]["writer"]
+    batches = iter_export_batches(db, schemas, status=status, batch_size=batch_size,
+                                  completed_from=completed_from, completed_to=completed_to)
+    return writer(batches, question_ids)
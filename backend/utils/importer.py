@@ -0,0 +1,332 @@
+"""
+Bulk Assessment Importer
+Streams offline assessments from XLSX/CSV, validates answers against the
+compiled questionnaire schema and writes them with batched inserts
+
+Expected layout: one row per assessment, a header row containing the
+company columns (company_name, contact_email, ...) and one column per
+question, headed by its question id (e.g. "q1a") or full question text.
+Multi-select answers may be separated with ';' or '|'. An optional
+"<question_id>_comment" column carries the comment for that question.
+Rows of an organisation already on file are added to its company, as
+/api/company/create does for repeat registrations.
+"""
+
+import csv
+import io
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import IMPORT_BATCH_SIZE, IMPORT_MAX_REPORTED_ERRORS, COMPANY_IDENTITY_RESOLUTION
+from .analytics import result_row
+from .company_identity import identity_key
+
+COMPANY_COLUMNS = [
+    "company_name",
+    "contact_email",
+    "contact_name",
+    "designation",
+    "current_backup_solution",
+    "industry",
+    "company_size",
+    "state",
+    "additional_notes"
+]
+
+REQUIRED_COMPANY_COLUMNS = ["company_name", "contact_email"]
+
+# Deliberately loose: the offline sheets are typed by hand
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+Row = Dict[str, Any]
+
+
+# ==============================
+# ROW READERS
+# ==============================
+
+def _clean_header(value: Any) -> str:
+    return str(value).strip() if value is not None else ""
+
+
+def iter_csv_rows(stream: io.TextIOBase) -> Iterator[Tuple[int, Row]]:
+    """Yield (row_number, row) from a CSV text stream"""
+    reader = csv.reader(stream)
+    header: Optional[List[str]] = None
+    for row_number, values in enumerate(reader, start=1):
+        if header is None:
+            if any(v.strip() for v in values):
+                header = [_clean_header(v) for v in values]
+            continue
+        if not any(v.strip() for v in values):
+            continue
+        yield row_number, dict(zip(header, values))
+
+
+def iter_xlsx_rows(source, sheet_name: Optional[str] = None) -> Iterator[Tuple[int, Row]]:
+    """
+    Yield (row_number, row) from a workbook using openpyxl's read-only mode,
+    which streams rows instead of loading the whole sheet
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("XLSX import requires openpyxl (pip install openpyxl)")
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        header: Optional[List[str]] = None
+        for row_number, values in enumerate(sheet.iter_rows(values_only=True), start=1):
+            if header is None:
+                # The header is the first row naming the company column
+                cleaned = [_clean_header(v) for v in values]
+                if "company_name" in [c.lower() for c in cleaned]:
+                    header = cleaned
+                continue
+            if not any(v not in (None, "") for v in values):
+                continue
+            yield row_number, {key: ("" if value is None else value) for key, value in zip(header, values) if key}
+    finally:
+        workbook.close()
+
+
+def iter_rows(source, filename: str, sheet_name: Optional[str] = None) -> Iterator[Tuple[int, Row]]:
+    """Pick the reader from the file extension"""
+    suffix = Path(filename).suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        return iter_xlsx_rows(source, sheet_name=sheet_name)
+    if suffix == ".csv":
+        if isinstance(source, (str, Path)):
+            source = open(source, newline="", encoding="utf-8-sig")
+        elif not isinstance(source, io.TextIOBase):
+            source = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+        return iter_csv_rows(source)
+    raise ValueError(f"Unsupported file type '{suffix}'. Use .xlsx or .csv")
+
+
+def write_template(path: str, compiled) -> None:
+    """Write an empty CSV with the expected header row"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow(COMPANY_COLUMNS + compiled.question_ids)
+
+
+# ==============================
+# VALIDATION
+# ==============================
+
+def parse_row(row: Row, compiled) -> Tuple[Optional[Dict], Optional[Dict[str, Any]], List[str]]:
+    """
+    Split a raw row into company info and validated answers
+
+    Returns:
+        (company_info, {question_id: {"answer": ..., "comment": ...}}, errors)
+    """
+    errors: List[str] = []
+    company: Dict[str, str] = {}
+    answers: Dict[str, Dict[str, Any]] = {}
+    comments: Dict[str, str] = {}
+    invalid: set = set()
+
+    for key, value in row.items():
+        column = key.strip()
+        lowered = column.lower()
+        if lowered in COMPANY_COLUMNS:
+            company[lowered] = "" if value is None else str(value).strip()
+            continue
+        if lowered.endswith("_comment"):
+            q_id = compiled.resolve_question_id(lowered[:-len("_comment")])
+            if q_id and value not in (None, ""):
+                comments[q_id] = str(value).strip()
+            continue
+
+        q_id = compiled.resolve_question_id(column)
+        if q_id is None:
+            continue
+        if value in (None, ""):
+            continue
+        try:
+            answers[q_id] = {"answer": compiled.validate_answer(q_id, value)}
+        except ValueError as e:
+            invalid.add(q_id)
+            errors.append(str(e))
+
+    for column in REQUIRED_COMPANY_COLUMNS:
+        if not company.get(column):
+            errors.append(f"Missing {column}")
+    if company.get("contact_email") and not EMAIL_PATTERN.match(company["contact_email"]):
+        errors.append(f"Invalid contact_email '{company['contact_email']}'")
+
+    for q in compiled.questions:
+        q_id = q["question_id"]
+        if q.get("required", True) and q["question_type"] != "text" and q_id not in answers and q_id not in invalid:
+            errors.append(f"{q_id}: answer required")
+
+    for q_id, comment in comments.items():
+        answers.setdefault(q_id, {"answer": "" if compiled.by_id[q_id]["question_type"] != "multi_select" else []})
+        answers[q_id]["comment"] = comment
+
+    if errors:
+        return None, None, errors
+    return company, answers, []
+
+
+# ==============================
+# IMPORT
+# ==============================
+
+class ImportReport:
+    """Counts plus a bounded per-row error list"""
+
+    def __init__(self, max_errors: int = IMPORT_MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.total_rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.maturity_distribution: Dict[str, int] = {}
+        self.errors: List[Dict[str, Any]] = []
+        self.errors_truncated = False
+
+    def add_error(self, row_number: int, messages: List[str]):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "errors": messages})
+        else:
+            self.errors_truncated = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "maturity_distribution": self.maturity_distribution,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated
+        }
+
+
+def _resolve_companies(db, companies: List[Dict]) -> List[str]:
+    """
+    company_id per row: the organisation's earlier registration when its
+    identity key is on file (as create_company resolves it), else a new
+    company shared by the batch's rows of that organisation
+    """
+    keys = [identity_key(company.get("company_name"), company.get("contact_email"))
+            if COMPANY_IDENTITY_RESOLUTION else "" for company in companies]
+    existing = {key: db.find_company(key) for key in set(keys) if key}
+
+    first_row: Dict[str, int] = {}
+    new_rows = []
+    for position, key in enumerate(keys):
+        if key and (existing[key] or key in first_row):
+            continue
+        if key:
+            first_row[key] = position
+        new_rows.append(position)
+    added = dict(zip(new_rows, db.add_companies([companies[i] for i in new_rows])))
+
+    return [
+        (existing[key] or added[first_row[key]]) if key else added[position]
+        for position, key in enumerate(keys)
+    ]
+
+
+def _flush(db, scorer, compiled, batch: List[Tuple[int, Dict, Dict]], report: ImportReport,
+           on_result: Optional[Callable[[Dict], None]], source: str):
+    """Score and persist one batch: four storage round trips plus an index lookup per organisation"""
+    labels = [{q_id: a["answer"] for q_id, a in answers.items()} for _, _, answers in batch]
+    results = [scorer.calculate_score(answers) for answers in labels]
+
+    company_ids = _resolve_companies(db, [company for _, company, _ in batch])
+    assessment_ids = db.create_assessments([
+        {
+            "company_id": company_id,
+            "status": "completed",
+            "completed_sections": sorted({compiled.section_of[q_id] for q_id in answers}),
+            "source": source,
+            "schema_version": compiled.version,
+            "registration": company
+        }
+        for company_id, (_, company, answers) in zip(company_ids, batch)
+    ])
+
+    responses = []
+    for assessment_id, (_, _, answers) in zip(assessment_ids, batch):
+        for q_id, answer in answers.items():
+            responses.append({
+                "assessment_id": assessment_id,
+                "question_id": q_id,
+                "answer": compiled.encode_answer(q_id, answer["answer"]),
+                "comment": answer.get("comment", "")
+            })
+    db.add_responses(responses)
+    # Same rollup rows a submission adds, so imports show up in analytics and company history
+    db.record_results([
+        result_row(compiled, assessment_id, company_id, answers, result)
+        for assessment_id, company_id, answers, result in zip(assessment_ids, company_ids, labels, results)
+    ])
+
+    for (row_number, company, _), assessment_id, result in zip(batch, assessment_ids, results):
+        report.imported += 1
+        label = result.get("maturity_label", "N/A")
+        report.maturity_distribution[label] = report.maturity_distribution.get(label, 0) + 1
+        if on_result:
+            on_result({
+                "row": row_number,
+                "company_name": company.get("company_name", ""),
+                "assessment_id": assessment_id,
+                "total_score": result.get("total_score", 0),
+                "maturity_label": label
+            })
+
+
+def import_rows(db, scorer, compiled, rows: Iterable[Tuple[int, Row]],
+                batch_size: int = IMPORT_BATCH_SIZE, dry_run: bool = False,
+                source: str = "bulk_import",
+                on_error: Optional[Callable[[int, List[str]], None]] = None,
+                on_result: Optional[Callable[[Dict], None]] = None) -> ImportReport:
+    """
+    Validate and import rows in batches
+
+    Memory is bounded by batch_size: rows are consumed lazily and each
+    batch is written with one insert per collection.
+
+    Args:
+        db: ChromaDBManager instance
+        scorer: ResilienceScorer used to score each row
+        compiled: CompiledSchema the answers are validated against
+        rows: Iterable of (row_number, row) pairs from iter_rows()
+        batch_size: Rows per batched write
+        dry_run: Validate only, write nothing
+        source: Recorded on each imported assessment
+        on_error: Called with (row_number, messages) for every invalid row
+        on_result: Called with a summary dict for every imported row
+    """
+    report = ImportReport()
+    batch: List[Tuple[int, Dict, Dict]] = []
+
+    for row_number, row in rows:
+        report.total_rows += 1
+        company, answers, errors = parse_row(row, compiled)
+        if errors:
+            report.add_error(row_number, errors)
+            if on_error:
+                on_error(row_number, errors)
+            continue
+
+        if dry_run:
+            report.imported += 1
+            continue
+
+        batch.append((row_number, company, answers))
+        if len(batch) >= batch_size:
+            _flush(db, scorer, compiled, batch, report, on_result, source)
+            batch = []
+
+    if batch:
+        _flush(db, scorer, compiled, batch, report, on_result, source)
+
+    return report
@@ -0,0 +1,49 @@
+"""
+JSON Codec
+orjson-backed dumps/loads and the API's default response class, falling
+back to the standard library when orjson is not installed
+"""
+
+import json
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; behaviour is the same without it
+    orjson = None
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits: let the stdlib handle (or reject) it
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Compact JSON text (ChromaDB documents must be str)"""
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """
+    Raises:
+        ValueError: if the input is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (several times faster on large bodies)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
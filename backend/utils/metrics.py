@@ -0,0 +1,422 @@
+"""
+Metrics
+Prometheus counters, gauges and histograms cheap enough to leave on in
+production, the ASGI middleware that records per-route request metrics
+and decorators that time named operations (also traced as spans inside
+sampled requests, see utils.tracing)
+
+Each metric child keeps one value array per thread. A thread only ever
+writes its own array, so recording takes no lock (the lock is taken once
+per thread, when its array is created); a scrape adds the arrays up.
+Label children are created once and cached by the caller (per route in
+the middleware, per function in @timed), so recording allocates nothing.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tracing import start_span
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Starlette appends "; charset=utf-8" to text/* media types
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class _ThreadShards:
+    """Per-thread value arrays of a fixed size"""
+
+    __slots__ = ("_size", "_local", "_arrays", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._arrays: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def local(self) -> List[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0] * self._size
+            with self._lock:
+                self._arrays.append(values)
+            self._local.values = values
+            return values
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            arrays = list(self._arrays)
+        totals = [0] * self._size
+        for values in arrays:
+            for i, value in enumerate(values):
+                totals[i] += value
+        return totals
+
+
+class CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _ThreadShards(1)
+
+    def inc(self, amount: float = 1):
+        self._shards.local()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class GaugeChild(CounterChild):
+    """Up/down gauge (e.g. in-flight requests); inc and dec may happen on different threads"""
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        self._shards.local()[0] -= amount
+
+
+class HistogramChild:
+    __slots__ = ("_bounds", "_shards")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        # One slot per bucket, one for +Inf, one for the sum
+        self._shards = _ThreadShards(len(bounds) + 2)
+
+    def observe(self, value: float):
+        values = self._shards.local()
+        values[bisect_left(self._bounds, value)] += 1
+        values[-1] += value
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """(cumulative bucket counts including +Inf, sum, count)"""
+        totals = self._shards.totals()
+        cumulative, running = [], 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-1], running
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child for a label set; cache it rather than calling this per request"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value())}")
+        return lines
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def _new_child(self):
+        return GaugeChild()
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bounds = [_format_value(float(b)) for b in self.buckets] + ["+Inf"]
+        for key, child in list(self._children.items()):
+            cumulative, total, count = child.snapshot()
+            for bound, bucket_count in zip(bounds, cumulative):
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _CallbackGauge:
+    """Gauge read at scrape time, e.g. the number of drafts held in memory"""
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    def __init__(self):
+        self._families: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family):
+        with self._lock:
+            existing = self._families.get(family.name)
+            if existing is not None:
+                return existing
+            self._families[family.name] = family
+            return family
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, fn: Callable[[], float]):
+        return self._register(_CallbackGauge(name, documentation, fn))
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        with self._lock:
+            families = list(self._families.values())
+        lines: List[str] = []
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being handled").labels()
+HTTP_REQUEST_SIZE = REGISTRY.histogram(
+    "http_request_size_bytes", "HTTP request body size", ("method", "route"), SIZE_BUCKETS)
+HTTP_RESPONSE_SIZE = REGISTRY.histogram(
+    "http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS)
+OPERATION_LATENCY = REGISTRY.histogram(
+    "app_operation_duration_seconds", "Duration of database, scoring and email operations", ("operation",))
+OPERATION_ERRORS = REGISTRY.counter(
+    "app_operation_errors_total", "Operations that raised", ("operation",))
+UNMATCHED_ANSWERS = REGISTRY.counter(
+    "app_unmatched_answers_total", "Select answers stored verbatim because they match no option", ("question_id",))
+
+
+# ==============================
+# OPERATION TIMING
+# ==============================
+
+def timed(operation: str):
+    """
+    Decorator recording the wrapped function's duration (and errors) under
+    `operation`, and a span of that name when called within a sampled request
+    """
+    latency = OPERATION_LATENCY.labels(operation)
+    errors = OPERATION_ERRORS.labels(operation)
+
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            # Time the whole iteration, not just creating the generator
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                # Not made current: the consumer runs between yields
+                span = start_span(operation, activate=False)
+                try:
+                    yield from fn(*args, **kwargs)
+                except BaseException as e:
+                    if not isinstance(e, GeneratorExit):
+                        errors.inc()
+                        if span is not None:
+                            span.finish(e)
+                    raise
+                finally:
+                    if span is not None:
+                        span.finish()
+                    latency.observe(time.perf_counter() - start)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            span = start_span(operation)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                errors.inc()
+                if span is not None:
+                    span.finish(e)
+                raise
+            finally:
+                if span is not None:
+                    span.finish()
+                latency.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def timed_methods(prefix: str):
+    """Class decorator applying @timed("<prefix>.<method>") to every public method"""
+    def decorator(cls):
+        for name, member in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.isfunction(member):
+                setattr(cls, name, timed(f"{prefix}.{name}")(member))
+        return cls
+    return decorator
+
+
+# ==============================
+# HTTP MIDDLEWARE
+# ==============================
+
+class _RouteMetrics:
+    __slots__ = ("method", "route", "latency", "request_size", "response_size", "statuses")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.latency = HTTP_LATENCY.labels(method, route)
+        self.request_size = HTTP_REQUEST_SIZE.labels(method, route)
+        self.response_size = HTTP_RESPONSE_SIZE.labels(method, route)
+        self.statuses: Dict[int, CounterChild] = {}
+
+    def status(self, code: int) -> CounterChild:
+        child = self.statuses.get(code)
+        if child is None:
+            child = self.statuses[code] = HTTP_REQUESTS.labels(self.method, self.route, code)
+        return child
+
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task overhead) recording
+    latency, status, in-flight count and body sizes per route template.
+    Paths that match no route share one label so they can't explode the
+    series count.
+    """
+
+    def __init__(self, app, excluded_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = frozenset(excluded_paths)
+        self._templates: Optional[Dict[Any, str]] = None
+        self._routes: Dict[str, Dict[str, _RouteMetrics]] = {}
+
+    def _template(self, scope) -> str:
+        """Route template for the endpoint the router picked"""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if self._templates is None or endpoint not in self._templates:
+            self._templates = {
+                getattr(route, "endpoint", None): route.path
+                for route in getattr(scope.get("app"), "routes", []) if hasattr(route, "path")
+            }
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
+
+    def _route_metrics(self, method: str, template: str) -> _RouteMetrics:
+        by_method = self._routes.get(template)
+        if by_method is None:
+            by_method = self._routes[template] = {}
+        metrics = by_method.get(method)
+        if metrics is None:
+            metrics = by_method[method] = _RouteMetrics(method, template)
+        return metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = [500, 0, 0]  # status, request bytes, response bytes
+
+        async def receive_wrapper():
+            message = await receive()
+            state[1] += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                state[2] += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            metrics = self._route_metrics(scope["method"], self._template(scope))
+            metrics.latency.observe(time.perf_counter() - start)
+            metrics.status(state[0]).inc()
+            metrics.request_size.observe(state[1])
+            metrics.response_size.observe(state[2])
+
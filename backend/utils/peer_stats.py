@@ -0,0 +1,86 @@
+"""
+Peer Statistics
+"X% of organisations in your industry chose this" figures for the
+questionnaire page
+
+The counts come from the answer rollups, which every completed submission
+updates (see IndexStore.record_results). A snapshot of per-industry option
+percentages is rebuilt from them on an interval and kept pre-encoded, so a
+request only looks up bytes and never reads responses or rollups.
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import PEER_STATS_MIN_COHORT
+from .json_codec import dumps_bytes
+
+
+class PeerStats:
+    """Per-industry option percentages, refreshed in the background"""
+
+    def __init__(self, db, registry, min_cohort: int = PEER_STATS_MIN_COHORT):
+        self.db = db
+        self.registry = registry
+        self.min_cohort = min_cohort
+        # industry -> encoded payload; None holds the all-organisations payload
+        self._bodies: Dict[Optional[str], bytes] = {}
+        self.updated_at: Optional[str] = None
+
+    def _payload(self, version, counts: Dict[tuple, int], total: int, industry: Optional[str]) -> Dict[str, Any]:
+        compiled = version.compiled
+        options = {}
+        # Too few peers would make single answers recognizable
+        for q_id in compiled.question_ids if total and total >= self.min_cohort else []:
+            labels = compiled.options.get(q_id)
+            if not labels:
+                continue
+            options[q_id] = {
+                label: round(100 * counts.get((q_id, label), 0) / total, 1)
+                for label in labels
+            }
+        return {
+            "industry": industry,
+            "sample_size": total,
+            "schema_version": version.version,
+            "updated_at": self.updated_at,
+            "options": options
+        }
+
+    def refresh(self):
+        """Rebuild every payload from the rollups (a bounded number of rows)"""
+        version = self.registry.active
+        sizes = {row["value"]: row["count"] for row in self.db.get_score_breakdown("industry", {})}
+        by_industry: Dict[str, Dict[tuple, int]] = {}
+        overall: Dict[tuple, int] = {}
+        for row in self.db.get_answer_breakdown("industry"):
+            key = (row["question_id"], row["answer"])
+            by_industry.setdefault(row["value"], {})[key] = row["count"]
+            overall[key] = overall.get(key, 0) + row["count"]
+
+        self.updated_at = datetime.now().isoformat()
+        bodies: Dict[Optional[str], bytes] = {}
+        bodies[None] = dumps_bytes(self._payload(version, overall, sum(sizes.values()), None))
+        for industry, counts in by_industry.items():
+            if sizes.get(industry, 0) >= self.min_cohort:
+                bodies[industry] = dumps_bytes(self._payload(version, counts, sizes[industry], industry))
+        self._bodies = bodies
+
+    def body(self, industry: Optional[str] = None) -> bytes:
+        """Encoded payload for an industry, or for all organisations when it has too few submissions"""
+        if not self._bodies:
+            self.refresh()
+        return self._bodies.get(industry) or self._bodies[None]
+
+    async def run_refresher(self, interval: float):
+        """Background task: rebuild the snapshot every `interval` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"[!] Peer statistics refresh failed: {e}")
@@ -0,0 +1,326 @@
+"""
+Profiler
+On-demand sampling profiler producing flamegraph-compatible collapsed
+stacks, and tracemalloc snapshots for tracking memory growth
+
+The sampler is a daemon thread reading sys._current_frames() every few
+milliseconds, so nothing is traced per call and the cost is paid only
+while a session runs. A session either samples for a fixed window, or
+samples only while a random fraction of matching requests is in flight
+(marked by ProfilerMiddleware); concurrent requests running at the same
+time are captured too.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import PROFILER_MAX_DURATION, PROFILER_INTERVAL_MS, TRACEMALLOC_FRAMES
+
+# Leaf frames of threads that are parked rather than working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    # concurrent.futures workers blocked on their (C) SimpleQueue
+    ("thread.py", "_worker"),
+    ("selectors.py", "select"),
+    ("base_events.py", "_run_once"),
+}
+
+_BACKEND_DIR = str(Path(__file__).parent.parent)
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to site-packages or the backend, so frames stay readable"""
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    if index != -1:
+        return filename[index + len(marker):]
+    if filename.startswith(_BACKEND_DIR):
+        return filename[len(_BACKEND_DIR) + 1:]
+    return filename
+
+
+class SamplingProfiler:
+    """One profiling session at a time; stacks aggregate across sessions until reset()"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stacks: Counter = Counter()
+        self._frame_names: Dict[Any, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._active_requests = 0
+        self.session: Optional[Dict[str, Any]] = None
+        self.samples = 0
+
+    # ==============================
+    # SESSION CONTROL
+    # ==============================
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float, interval_ms: float = PROFILER_INTERVAL_MS, request_rate: Optional[float] = None,
+              path_prefix: str = "", include_idle: bool = False, reset: bool = True) -> Dict[str, Any]:
+        """
+        Start a session
+
+        Args:
+            duration: Seconds until the session stops by itself (capped by PROFILER_MAX_DURATION)
+            interval_ms: Time between samples
+            request_rate: Sample only while this fraction of requests is in flight
+                          (None samples continuously for the whole window)
+            path_prefix: Only requests under this path are selected (with request_rate)
+            include_idle: Keep stacks of threads parked in waits and the event loop's select
+            reset: Drop stacks collected by earlier sessions
+        Raises:
+            ValueError: for out-of-range arguments
+            RuntimeError: if a session is already running
+        """
+        if not 0 < duration <= PROFILER_MAX_DURATION:
+            raise ValueError(f"duration must be between 0 and {PROFILER_MAX_DURATION:g} seconds")
+        if not 0.5 <= interval_ms <= 1000:
+            raise ValueError("interval_ms must be between 0.5 and 1000")
+        if request_rate is not None and not 0 < request_rate <= 1:
+            raise ValueError("request_rate must be in (0, 1]")
+
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A profiling session is already running")
+            if reset:
+                self._stacks.clear()
+                self.samples = 0
+            self._stop.clear()
+            self.session = {
+                "mode": "requests" if request_rate is not None else "window",
+                "started_at": time.time(),
+                "duration": duration,
+                "interval_ms": interval_ms,
+                "request_rate": request_rate,
+                "path_prefix": path_prefix,
+                "include_idle": include_idle,
+                "sampled_requests": 0
+            }
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        return self.status()
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    # ==============================
+    # REQUEST SELECTION
+    # ==============================
+
+    def select_request(self, path: str) -> bool:
+        """Called per request by ProfilerMiddleware; True if this request should be sampled"""
+        session = self.session
+        if (session is None or session["request_rate"] is None or self._stop.is_set()
+                or not path.startswith(session["path_prefix"])):
+            return False
+        if random.random() >= session["request_rate"]:
+            return False
+        with self._lock:
+            self._active_requests += 1
+            session["sampled_requests"] += 1
+        return True
+
+    def request_finished(self):
+        with self._lock:
+            self._active_requests -= 1
+
+    # ==============================
+    # SAMPLING
+    # ==============================
+
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            # Function-level (first line), so samples from different lines merge
+            name = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+            self._frame_names[code] = name
+        return name
+
+    def _is_idle(self, frame) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+    def _sample(self, own_ident: int, include_idle: bool, thread_names: Dict[int, str]):
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident or (not include_idle and self._is_idle(frame)):
+                continue
+            names = []
+            while frame is not None:
+                names.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            names.append(thread_names.get(ident, f"thread-{ident}"))
+            names.reverse()
+            self._stacks[";".join(names)] += 1
+        self.samples += 1
+
+    def _run(self):
+        session = self.session
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + session["duration"]
+        interval = session["interval_ms"] / 1000
+        requests_mode = session["request_rate"] is not None
+
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if not requests_mode or self._active_requests > 0:
+                thread_names = {t.ident: t.name.replace(";", ",") for t in threading.enumerate()}
+                with self._lock:
+                    self._sample(own_ident, session["include_idle"], thread_names)
+            self._stop.wait(interval)
+
+        session["stopped_at"] = time.time()
+        self._stop.set()
+
+    # ==============================
+    # OUTPUT
+    # ==============================
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format: 'frame;frame;frame count' per line (flamegraph.pl, speedscope)"""
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Functions by self samples (leaf frame) and total samples (anywhere on the stack)"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        with self._lock:
+            stacks = list(self._stacks.items())
+        for stack, count in stacks:
+            frames = stack.split(";")[1:]
+            if frames:
+                self_counts[frames[-1]] += count
+            for name in set(frames):
+                total_counts[name] += count
+        return [
+            {"function": name, "self": count, "total": total_counts[name]}
+            for name, count in self_counts.most_common(limit)
+        ]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            distinct = len(self._stacks)
+        return {
+            "running": self.running,
+            "session": self.session,
+            "samples": self.samples,
+            "distinct_stacks": distinct
+        }
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots; diffs show where allocations grew between two snapshots"""
+
+    def __init__(self, frames: int = TRACEMALLOC_FRAMES):
+        self.frames = frames
+        self._snapshots: List[Tuple[float, tracemalloc.Snapshot]] = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self):
+        with self._lock:
+            self._snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Take a snapshot (starting tracemalloc on first use). The first one is
+        the baseline; later diffs compare the newest against the previous.
+        """
+        self.start()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        with self._lock:
+            self._snapshots = (self._snapshots + [(time.time(), snapshot)])[-2:]
+            count = len(self._snapshots)
+        current, peak = tracemalloc.get_traced_memory()
+        return {"snapshots": count, "traced_kb": round(current / 1024, 1), "peak_kb": round(peak / 1024, 1)}
+
+    def diff(self, include: str = "", group_by: str = "lineno", limit: int = 30) -> Dict[str, Any]:
+        """
+        Allocation growth between the last two snapshots
+
+        Args:
+            include: Only allocations whose traceback passes through files
+                     containing this substring (e.g. "chromadb")
+            group_by: "lineno", "filename" or "traceback"
+        Raises:
+            ValueError: for an unknown group_by
+            LookupError: with fewer than two snapshots
+        """
+        if group_by not in ("lineno", "filename", "traceback"):
+            raise ValueError("group_by must be lineno, filename or traceback")
+        with self._lock:
+            snapshots = list(self._snapshots)
+        if len(snapshots) < 2:
+            raise LookupError("Take two snapshots first")
+
+        (old_at, old), (new_at, new) = snapshots
+        if include:
+            pattern = f"*{include}*"
+            old = old.filter_traces([tracemalloc.Filter(True, pattern, all_frames=True)])
+            new = new.filter_traces([tracemalloc.Filter(True, pattern, all_frames=True)])
+
+        stats = new.compare_to(old, group_by)
+        stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+        return {
+            "interval_seconds": round(new_at - old_at, 1),
+            "include": include,
+            "size_diff_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+            "top": [
+                {
+                    "location": [f"{_short_path(frame.filename)}:{frame.lineno}" for frame in stat.traceback],
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count_diff": stat.count_diff
+                }
+                for stat in stats[:limit]
+            ]
+        }
+
+
+class ProfilerMiddleware:
+    """Marks the fraction of requests a request-mode profiling session should sample"""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.select_request(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.request_finished()
@@ -0,0 +1,373 @@
+"""
+PDF Report Generator
+Renders the assessment scorecard to PDF in a process pool and caches the
+output on disk, keyed by a fingerprint of everything rendered. The cache is
+bounded: PDFs older than the max age are dropped, and the least recently
+used ones once it outgrows the size limit.
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import textwrap
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import REPORTS_DIR, REPORT_WORKERS, REPORT_CACHE_MAX_MB, REPORT_CACHE_MAX_AGE_SECONDS
+from .metrics import timed
+
+# Bump whenever the layout changes so cached PDFs are re-rendered
+RENDERER_VERSION = "1"
+# Expired PDFs are also swept this often when the size limit is not reached
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def result_fingerprint(report: Dict[str, Any]) -> str:
+    """Stable hash of everything that ends up in the rendered PDF (see render_report_pdf)"""
+    payload = json.dumps(
+        {"renderer": RENDERER_VERSION, "report": report},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+# ==============================
+# MINIMAL PDF WRITER
+# ==============================
+
+class _PdfDocument:
+    """
+    Tiny PDF 1.4 writer supporting the standard Helvetica fonts, filled
+    rectangles and wrapped text. Avoids a heavyweight rendering dependency.
+    """
+
+    PAGE_WIDTH = 595   # A4 in points
+    PAGE_HEIGHT = 842
+    MARGIN = 50
+
+    def __init__(self, footer: str = ""):
+        self.footer = footer
+        self.pages: List[List[str]] = []
+        self._new_page()
+
+    def _new_page(self):
+        self._ops: List[str] = []
+        self.pages.append(self._ops)
+        self.y = self.PAGE_HEIGHT - self.MARGIN
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        text = text.encode("cp1252", errors="replace").decode("cp1252")
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    def _ensure_space(self, height: float):
+        if self.y - height < self.MARGIN + 20:
+            self._new_page()
+
+    def rect(self, x: float, y: float, w: float, h: float, color: Tuple[float, float, float]):
+        self._ops.append(f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg {x:.1f} {y:.1f} {w:.1f} {h:.1f} re f")
+
+    def text_at(self, x: float, y: float, text: str, size: int = 10, bold: bool = False,
+                color: Tuple[float, float, float] = (0, 0, 0)):
+        font = "F2" if bold else "F1"
+        self._ops.append(
+            f"BT {color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg /{font} {size} Tf "
+            f"{x:.1f} {y:.1f} Td ({self._escape(text)}) Tj ET"
+        )
+
+    def paragraph(self, text: str, size: int = 10, bold: bool = False, indent: float = 0,
+                  color: Tuple[float, float, float] = (0, 0, 0), spacing: float = 4):
+        """Write wrapped text at the cursor, breaking pages as needed"""
+        usable = self.PAGE_WIDTH - 2 * self.MARGIN - indent
+        # Helvetica averages roughly half an em per character
+        width = max(20, int(usable / (size * 0.5)))
+        leading = size * 1.3
+        for raw_line in str(text).splitlines() or [""]:
+            for line in textwrap.wrap(raw_line, width=width) or [""]:
+                self._ensure_space(leading)
+                self.y -= leading
+                self.text_at(self.MARGIN + indent, self.y, line, size=size, bold=bold, color=color)
+        self.y -= spacing
+
+    def heading(self, text: str):
+        self._ensure_space(40)
+        self.y -= 10
+        self.rect(self.MARGIN, self.y - 18, 4, 18, (0.906, 0, 0.043))
+        self.text_at(self.MARGIN + 12, self.y - 14, text, size=14, bold=True)
+        self.y -= 26
+
+    def render(self) -> bytes:
+        """Serialize pages into a PDF byte string"""
+        objects: List[bytes] = []
+        page_count = len(self.pages)
+        # Object numbering: 1 catalog, 2 pages, 3-4 fonts, then (page, content) pairs
+        page_ids = [5 + 2 * i for i in range(page_count)]
+
+        objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+        objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode())
+        objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+        for index, ops in enumerate(self.pages):
+            footer_ops = []
+            if self.footer:
+                footer_ops.append(
+                    f"BT 0.400 0.400 0.400 rg /F1 8 Tf {self.MARGIN} 25 Td "
+                    f"({self._escape(self.footer)}  -  Page {index + 1} of {page_count}) Tj ET"
+                )
+            stream = "\n".join(ops + footer_ops).encode("cp1252", errors="replace")
+            objects.append(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.PAGE_WIDTH} {self.PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {page_ids[index] + 1} 0 R >>".encode()
+            )
+            objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+        xref_offset = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode()
+        out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+        return bytes(out)
+
+
+def render_report_pdf(report: Dict[str, Any]) -> bytes:
+    """Lay out the scorecard, summary and recommendations as a PDF"""
+    results = report.get("results", {})
+    red = (0.906, 0, 0.043)
+
+    doc = _PdfDocument(footer="(c) SBA Info Solutions - www.sbainfo.in")
+
+    # Header band
+    doc.rect(0, doc.PAGE_HEIGHT - 110, doc.PAGE_WIDTH, 110, (0, 0, 0))
+    doc.text_at(doc.MARGIN, doc.PAGE_HEIGHT - 55, "CYBER RESILIENCE MATURITY SCORECARD", size=18, bold=True, color=red)
+    doc.text_at(doc.MARGIN, doc.PAGE_HEIGHT - 78, f"Client: {report.get('company_name', 'Client')}", size=11, color=(1, 1, 1))
+    doc.text_at(doc.MARGIN, doc.PAGE_HEIGHT - 95, f"Date: {report.get('generated_on', '')}", size=11, color=(1, 1, 1))
+    doc.y = doc.PAGE_HEIGHT - 120
+
+    # Aggregate score
+    doc.heading("Aggregate Score")
+    doc.paragraph(f"Total Points Achieved: {results.get('total_score', 0)} / {results.get('max_score', 0)}", bold=True)
+    doc.paragraph(f"Average Maturity Score: {results.get('average_score', 0)} (0-4.0)")
+    doc.paragraph(f"Maturity Level: Level {results.get('maturity_level', 0)} - {results.get('maturity_label', 'N/A')}", bold=True, color=red)
+    doc.paragraph(f"Characteristics: {results.get('characteristics', '')}")
+    doc.paragraph(f"Recommended Next Step: {results.get('recommended_next_step', '')}")
+
+    summary = report.get("summary") or {}
+    if summary.get("summary"):
+        doc.heading("Summary")
+        doc.paragraph(summary["summary"].replace("**", ""))
+
+    gap = results.get("gap_analysis") or {}
+    if gap:
+        doc.heading("Gap Analysis")
+        doc.paragraph(f"Current Points: {gap.get('current_points', 0)}    Target Points: {gap.get('target_points', 0)}    Gap: {gap.get('gap_points', 0)}")
+        doc.paragraph(f"Estimated Effort: {gap.get('estimated_effort', 'N/A')}")
+
+    doc.heading("Your Responses")
+    for i, q in enumerate(results.get("question_scores", [])):
+        answer = q.get("user_answer", "")
+        if isinstance(answer, list):
+            answer = ", ".join(str(a) for a in answer)
+        doc.paragraph(f"{i + 1}. {q.get('question_text', '')}", bold=True, spacing=0)
+        doc.paragraph(f"Answer: {answer or 'No answer provided'}", indent=14, spacing=0)
+        doc.paragraph(f"Score: {q.get('score', 0)} / {q.get('max_points', 4)}", indent=14, color=(0.4, 0.4, 0.4))
+
+    recommendations = report.get("recommendations") or []
+    if recommendations:
+        doc.heading("Recommendations")
+        for rec in recommendations:
+            doc.paragraph(f"[{rec.get('priority', '')}] {rec.get('title', '')}", bold=True, spacing=0)
+            doc.paragraph(rec.get("description", ""), indent=14)
+
+    return doc.render()
+
+
+def _render_to_file(report: Dict[str, Any], target: str) -> str:
+    """Process pool entry point: render and atomically publish the PDF"""
+    pdf = render_report_pdf(report)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pdf)
+    os.replace(tmp_path, target)
+    return target
+
+
+# ==============================
+# CACHED GENERATOR
+# ==============================
+
+class ReportGenerator:
+    """
+    Renders PDF reports in a ProcessPoolExecutor and caches them on disk.
+    Concurrent requests for the same fingerprint share a single render.
+
+    A PDF's mtime is its render time (for the max age) and its atime the
+    last time it was served (for LRU eviction); atime is set explicitly, so
+    noatime mounts don't matter.
+    """
+
+    def __init__(self, cache_dir: Path = REPORTS_DIR, max_workers: int = REPORT_WORKERS,
+                 max_mb: float = REPORT_CACHE_MAX_MB, max_age: float = REPORT_CACHE_MAX_AGE_SECONDS):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max(1, max_workers)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age = max_age
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._prune_lock = threading.Lock()
+        self._cache_bytes = 0
+        self._pruned_at = 0.0
+        self.prune()
+
+    def report_path(self, fingerprint: str) -> Path:
+        return self.cache_dir / f"{fingerprint}.pdf"
+
+    def get_cached(self, fingerprint: str) -> Optional[Path]:
+        """Return the cached PDF path if it has been rendered and has not expired"""
+        path = self.report_path(fingerprint)
+        try:
+            stat = path.stat()
+            if time.time() - stat.st_mtime > self.max_age:
+                path.unlink()
+                return None
+            # Mark as recently used, keeping the render time
+            os.utime(path, (time.time(), stat.st_mtime))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def prune(self):
+        """Delete expired PDFs, then the least recently used until the cache fits max_bytes"""
+        with self._prune_lock:
+            self._prune()
+
+    def _prune(self):
+        """Caller holds _prune_lock"""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.iterdir():
+            try:
+                stat = path.stat()
+                # Leftover temp files of crashed renders age out too
+                if now - stat.st_mtime > self.max_age:
+                    path.unlink()
+                elif path.suffix == ".pdf":
+                    entries.append((stat.st_atime, stat.st_size, path))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._cache_bytes = total
+        self._pruned_at = now
+
+    def _rendered(self, path: Path):
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return
+        # Renders finish on concurrent request threads: count and check under the prune lock
+        with self._prune_lock:
+            self._cache_bytes += size
+            if self._cache_bytes > self.max_bytes or time.time() - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+                self._prune()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn keeps workers free of the parent's DB client threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, company_name: str, results: Dict[str, Any],
+               recommendations: List[Dict] = None, summary: Dict = None) -> Tuple[str, Future]:
+        """
+        Schedule rendering unless the PDF is cached or already in flight
+
+        Returns:
+            (fingerprint, future resolving to the PDF path)
+        """
+        report = {
+            "company_name": company_name,
+            "results": results,
+            "recommendations": recommendations or [],
+            "summary": summary or {},
+            "generated_on": datetime.now().strftime("%d %b %Y")
+        }
+        fingerprint = result_fingerprint(report)
+        path = self.report_path(fingerprint)
+
+        with self._lock:
+            if self.get_cached(fingerprint) is not None:
+                done: Future = Future()
+                done.set_result(path)
+                return fingerprint, done
+
+            if fingerprint in self._pending:
+                return fingerprint, self._pending[fingerprint]
+
+            try:
+                inner = self._get_executor().submit(_render_to_file, report, str(path))
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool and retry once
+                self._executor = None
+                inner = self._get_executor().submit(_render_to_file, report, str(path))
+
+            outer: Future = Future()
+            self._pending[fingerprint] = outer
+
+        def _on_done(fut: Future):
+            with self._lock:
+                self._pending.pop(fingerprint, None)
+            if fut.exception() is not None:
+                outer.set_exception(fut.exception())
+            else:
+                self._rendered(path)
+                outer.set_result(Path(fut.result()))
+
+        inner.add_done_callback(_on_done)
+        return fingerprint, outer
+
+    @timed("report.get_or_render")
+    def get_or_render(self, company_name: str, results: Dict[str, Any], timeout: float = 60, **kwargs) -> Tuple[str, Path]:
+        """Blocking variant for worker threads (e.g. background email tasks)"""
+        fingerprint, future = self.submit(company_name, results, **kwargs)
+        return fingerprint, future.result(timeout=timeout)
+
+    async def get_or_render_async(self, company_name: str, results: Dict[str, Any], **kwargs) -> Tuple[str, Path]:
+        """Await the render without blocking the event loop"""
+        fingerprint, future = self.submit(company_name, results, **kwargs)
+        path = await asyncio.wrap_future(future)
+        return fingerprint, path
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -11,6 +11,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 # We import get_max_score from schema, assuming it's available or we hardcode it
 from questionnaire.questionnaire_schema import get_questionnaire_schema, get_max_score
+from utils.metrics import timed
 
 
 class ResilienceScorer:
@@ -19,10 +20,12 @@ class ResilienceScorer:
     Based on Strategic Questions (0-4 points each)
     """
     
-    def __init__(self):
-        self.questionnaire = get_questionnaire_schema()
-        self.max_score = get_max_score()
+    def __init__(self, questionnaire: Dict[str, List[Dict]] = None, max_score: int = None):
+        # Defaults to the built-in schema; compiled schemas pass their own
+        self.questionnaire = questionnaire if questionnaire is not None else get_questionnaire_schema()
+        self.max_score = max_score if max_score is not None else get_max_score()
     
+    @timed("scoring.calculate_score")
     def calculate_score(self, responses: Dict[str, Any]) -> Dict[str, Any]:
         """
         Calculate the full assessment score from responses
@@ -209,3 +212,187 @@ class ResilienceScorer:
             "gap_points": gap,
             "estimated_effort": effort
         }
+
+    # ==============================
+    # RECOMMENDATIONS & SUMMARY
+    # ==============================
+
+    # Ported from the legacy scoring engine (utils/scoring.py) and re-keyed to
+    # the question ids used by the current questionnaire schema
+    RECOMMENDATIONS_MAP = {
+        'q1a': {
+            'title': 'Reduce Recovery Time Objective (RTO)',
+            'description': 'Your current RTO is too long. Target reducing recovery time to hours or minutes through automation and better infrastructure.'
+        },
+        'q1b': {
+            'title': 'Tighten Recovery Point Objective (RPO)',
+            'description': 'Define the acceptable data loss window for each critical system and align backup frequency and replication to meet it.'
+        },
+        'q2': {
+            'title': 'Strengthen Backup Protection',
+            'description': 'Implement immutability and zero-trust controls to protect backups from ransomware and unauthorized modifications.'
+        },
+        'q3': {
+            'title': 'Increase Recovery Testing Frequency',
+            'description': 'Conduct quarterly (or more frequent) end-to-end recovery drills and document all results.'
+        },
+        'q3f': {
+            'title': 'Validate Recovered Data Is Threat-Free',
+            'description': 'Include malware scanning and integrity checks of restored data as a mandatory step of every recovery drill.'
+        },
+        'q4': {
+            'title': 'Automate Incident Response',
+            'description': 'Move from manual processes to automated orchestrated response with defined playbooks and monitoring integration.'
+        },
+        'q4f': {
+            'title': 'Add Clean Recovery to Incident Response',
+            'description': 'Extend incident response playbooks so that data is verified free of threats before it is restored to production.'
+        },
+        'q5': {
+            'title': 'Enhance Threat Detection Capabilities',
+            'description': 'Implement proactive threat detection with deception sensors, anomaly detection, or AI-driven predictive systems.'
+        },
+        'q6': {
+            'title': 'Expand Critical Asset Coverage',
+            'description': 'Ensure 95%+ of critical data assets have tested, validated recovery capabilities.'
+        },
+        'q7': {
+            'title': 'Improve Recovery Confidence',
+            'description': 'Increase confidence in data integrity through regular validation, testing, and verification processes.'
+        },
+        'q7f': {
+            'title': 'Accelerate Recovery Speed',
+            'description': 'Reduce time to restore minimal viable services to under 4 hours through automation and improved processes.'
+        },
+        'q8': {
+            'title': 'Address System Coverage Gaps',
+            'description': 'Develop and test recovery procedures for all critical systems currently without documented processes.'
+        },
+        'q9': {
+            'title': 'Implement Recovery Metrics Dashboard',
+            'description': 'Deploy automated dashboards or real-time scorecards to track recovery KPIs and report to leadership.'
+        },
+        'q10': {
+            'title': 'Modernize Backup Infrastructure',
+            'description': 'Invest in enterprise-grade, cloud-native backup infrastructure to improve resilience and recovery capabilities.'
+        },
+        'q11': {
+            'title': 'Review Backup Strategy',
+            'description': 'Adopt a 3-2-1-1 strategy: multiple backup copies on different media, with at least one offsite and one immutable copy.'
+        }
+    }
+
+    def generate_recommendations(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Generate prioritized recommendations based on score
+        
+        Args:
+            results: Result from calculate_score()
+            
+        Returns:
+            List of recommendation dicts with priority, title, description
+        """
+        recommendations = []
+        critical_gaps = []
+        moderate_gaps = []
+        
+        # Classify questions by the share of available points achieved
+        for q in results.get("question_scores", []):
+            max_points = q.get("max_points") or 4
+            ratio = q.get("score", 0) / max_points
+            if ratio <= 0.25:
+                critical_gaps.append(q)
+            elif ratio <= 0.5:
+                moderate_gaps.append(q)
+        
+        # Critical Recommendations (High Priority)
+        for q in critical_gaps:
+            rec = self._get_question_recommendation(q, "Critical")
+            if rec:
+                recommendations.append(rec)
+        
+        # Moderate Recommendations
+        for q in moderate_gaps[:3]:  # Limit to top 3
+            rec = self._get_question_recommendation(q, "High")
+            if rec:
+                recommendations.append(rec)
+        
+        # General maturity recommendations
+        general_rec = self._get_maturity_recommendation(results.get("maturity_level", 1))
+        if general_rec:
+            recommendations.append(general_rec)
+        
+        return recommendations
+    
+    def _get_question_recommendation(self, question_score: Dict, priority: str) -> Dict:
+        """Get specific recommendation for a scored question"""
+        rec_data = self.RECOMMENDATIONS_MAP.get(question_score.get("question_id"))
+        if rec_data:
+            return {
+                "priority": priority,
+                "title": rec_data["title"],
+                "description": rec_data["description"],
+                "current_score": question_score.get("score", 0),
+                "target_score": question_score.get("max_points", 4)
+            }
+        return None
+    
+    def _get_maturity_recommendation(self, maturity_level: int) -> Dict:
+        """Get overall recommendation based on maturity level"""
+        if maturity_level <= 1:
+            return {
+                "priority": "Critical",
+                "title": "Foundational Cyber Resilience Program Required",
+                "description": "Immediate action needed: Establish baseline backup procedures, implement basic immutability controls, document all recovery processes, and begin monthly testing regimen. Consider engaging cyber resilience consultants for rapid improvement."
+            }
+        elif maturity_level == 2:
+            return {
+                "priority": "High",
+                "title": "Accelerate to Repeatable Maturity Level",
+                "description": "Focus on: Increasing testing frequency to quarterly, implementing immutability + air-gap protection, automating alerting mechanisms, and expanding asset coverage to 85%+."
+            }
+        elif maturity_level == 3:
+            return {
+                "priority": "Medium",
+                "title": "Advance Toward Managed State",
+                "description": "Next steps: Introduce automation in response workflows, implement deception/anomaly detection, target 95%+ asset coverage, reduce recovery time to hours, and add real-time monitoring dashboards."
+            }
+        elif maturity_level == 4:
+            return {
+                "priority": "Low",
+                "title": "Optimize for Industry Leadership",
+                "description": "Continue improving: Achieve 95-100% validated asset coverage, implement AI-driven threat prediction, automate full recovery orchestration, target sub-hour recovery times, deploy continuous automated validation."
+            }
+        else:  # Level 5
+            return {
+                "priority": "Low",
+                "title": "Maintain Excellence and Continuous Improvement",
+                "description": "Sustain your industry-leading position through continuous improvement programs, industry benchmarking, advanced threat intelligence integration, regular executive reviews, and longitudinal maturity tracking."
+            }
+    
+    def get_result_summary(self, results: Dict[str, Any]) -> Dict[str, str]:
+        """Generate customer-facing result summary text"""
+        total = results.get("total_score", 0)
+        max_score = results.get("max_score", self.max_score)
+        percentage = round((total / max_score) * 100, 1) if max_score else 0
+        level = f"Level {results.get('maturity_level', 0)}: {results.get('maturity_label', 'N/A')}"
+        maturity_level = results.get("maturity_level", 1)
+        
+        # Generate personalized summary
+        if maturity_level >= 5:
+            summary = f"Your organization demonstrates **industry-leading cyber resilience** with an overall maturity score of **{percentage}%** ({level}). Your backup and recovery infrastructure is well-protected, automated, and continuously validated. You have verified capability to recover independently from ransomware attacks within minutes to hours, with high confidence in data integrity."
+        elif maturity_level == 4:
+            summary = f"Your organization shows **strong cyber resilience** with an overall maturity score of **{percentage}%** ({level}). You have implemented automated response workflows, multi-layer immutability controls, and regular testing. Recovery times are measured in hours with high asset coverage. Continue advancing toward full automation and 100% asset validation."
+        elif maturity_level == 3:
+            summary = f"Your organization has established a **solid foundation** for cyber resilience with an overall maturity score of **{percentage}%** ({level}). Recovery procedures are documented and tested, with immutability controls in place. Focus on increasing automation, expanding asset coverage to 95%+, and reducing recovery times from days to hours."
+        elif maturity_level == 2:
+            summary = f"Your organization is in the **early stages** of cyber resilience maturity with an overall maturity score of **{percentage}%** ({level}). While basic controls and documentation exist, significant gaps remain in testing frequency, automation, and asset coverage. Prioritize implementing immutability, increasing testing to quarterly, and documenting all recovery procedures."
+        else:
+            summary = f"Your organization faces **critical cyber resilience gaps** with an overall maturity score of **{percentage}%** ({level}). Recovery processes are largely manual and untested, with extended RTO measured in days or weeks. **Immediate action required:** Establish baseline backup procedures, implement immutability controls, document recovery processes, and begin regular testing."
+        
+        return {
+            "summary": summary,
+            "score": f"{total}/{max_score}",
+            "percentage": f"{percentage}%",
+            "level": level
+        }
@@ -0,0 +1,274 @@
+"""
+Synthetic Data
+Realistic companies, assessments and responses for scale testing
+
+Companies draw industry, size and state from config.py (the lists /api/config
+serves). Each company gets a maturity in [0, 1] from a Beta distribution,
+shifted by industry and size; answers favour options whose score is near
+that maturity, so scores spread the way real assessments do. Repeat
+assessments of a company improve slightly.
+
+Work is split into chunks seeded from (seed, chunk index) only, so the data
+(ids included) is the same for a given seed whatever the number of workers.
+"""
+
+import copy
+import hashlib
+import math
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import COMPANY_SIZES, INDUSTRIES, STATES
+from questionnaire.compiled_schema import CompiledSchema
+from .analytics import result_row
+from .json_codec import dumps_bytes, loads
+from .scoring import ResilienceScorer
+
+# Options that mean "don't know" rather than a maturity level
+UNKNOWN_OPTIONS = {"no idea", "not applicable"}
+
+DEFAULT_DISTRIBUTION: Dict[str, Any] = {
+    # Company maturity ~ Beta(alpha, beta); the mean is alpha / (alpha + beta)
+    "maturity": {"alpha": 2.0, "beta": 3.0},
+    # Added to a company's maturity (clamped to [0, 1])
+    "industry_maturity": {
+        "Banking & Financial Services": 0.15, "Insurance": 0.1, "Technology": 0.1,
+        "Telecommunications": 0.05, "Government": -0.05, "Education": -0.1
+    },
+    "size_maturity": {"1-50 employees": -0.1, "1001-5000 employees": 0.05, "5000+ employees": 0.1},
+    # Relative frequencies; missing entries weigh 1
+    "industry_weights": {"Technology": 3, "Manufacturing": 2, "Banking & Financial Services": 2, "Healthcare": 2},
+    "size_weights": {"1-50 employees": 3, "51-200 employees": 3, "201-500 employees": 2},
+    "state_weights": {"Maharashtra": 4, "Karnataka": 4, "Delhi": 3, "Tamil Nadu": 3, "Telangana": 3, "Gujarat": 2},
+    # How tightly answers follow maturity (std dev on the 0-1 score scale)
+    "answer_spread": 0.25,
+    # Chance of answering "No idea" / "Not applicable" where offered
+    "unknown_rate": 0.06,
+    # Mean number of options ticked on multi-select questions
+    "multi_select_mean": 2.0,
+    # Share of assessments that were completed (only those have stored responses)
+    "completion_rate": 0.7,
+    # Maturity gained by each repeat assessment of a company
+    "reassessment_gain": 0.05,
+    # Explicit per-question option weights, overriding the model: {"q3f": {"Yes": 3, "No": 1}}
+    "questions": {}
+}
+
+_FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rohan", "Meera",
+                "Karthik", "Divya", "Sanjay", "Neha", "Aditya", "Pooja", "Suresh", "Lakshmi", "Imran", "Fatima"]
+_LAST_NAMES = ["Sharma", "Iyer", "Reddy", "Patel", "Nair", "Gupta", "Menon", "Singh", "Rao", "Khan",
+               "Das", "Joshi", "Kulkarni", "Banerjee", "Pillai", "Mehta", "Chopra", "Verma", "Bose", "Shah"]
+_NAME_WORDS = ["Apex", "Vertex", "Sahyadri", "Indus", "Ganga", "Nimbus", "Quantum", "Lotus", "Everest", "Meridian",
+               "Blue Peak", "Silverline", "Horizon", "Kaveri", "Tata Nagar", "Orion", "Pinnacle", "Vista", "Nova", "Zenith"]
+_INDUSTRY_WORDS = {
+    "Banking & Financial Services": ["Finserv", "Capital", "Bank"], "Insurance": ["Assurance", "Insurance"],
+    "Healthcare": ["Healthcare", "Hospitals", "Diagnostics"], "Government": ["Authority", "Corporation"],
+    "Energy & Utilities": ["Power", "Energy"], "Telecommunications": ["Telecom", "Networks"],
+    "Manufacturing": ["Industries", "Engineering", "Auto Components"], "Retail & E-commerce": ["Retail", "Mart"],
+    "Technology": ["Technologies", "Infotech", "Software"], "Transportation & Logistics": ["Logistics", "Freight"],
+    "Education": ["Institute", "Learning"], "Other": ["Enterprises", "Group"]
+}
+_LEGAL_SUFFIXES = ["Pvt Ltd", "Ltd", "LLP", "Pvt Ltd", "Private Limited"]
+_DESIGNATIONS = ["CISO", "CIO", "CTO", "IT Head", "IT Manager", "Infrastructure Lead", "Backup Administrator",
+                 "Head of Security", "VP Technology"]
+_BACKUP_SOLUTIONS = ["Veeam", "Commvault", "Veritas NetBackup", "Rubrik", "Cohesity", "Native cloud snapshots",
+                     "Tape library", "Home-grown scripts", ""]
+_TEXT_ANSWERS = ["Primary DC in Mumbai, DR in Chennai", "Hybrid: on-prem VMware plus AWS",
+                 "Mostly SaaS, few on-prem servers", "Two data centres, weekly offsite tapes",
+                 "Azure workloads with geo-redundant backups", "Single site, planning DR in the cloud", ""]
+
+
+def load_distribution(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Defaults, overridden key by key by a JSON file
+
+    Raises:
+        ValueError: for keys the generator does not know
+    """
+    distribution = copy.deepcopy(DEFAULT_DISTRIBUTION)
+    if not path:
+        return distribution
+    with open(path, "rb") as f:
+        overrides = loads(f.read())
+    unknown = sorted(set(overrides) - set(distribution))
+    if unknown:
+        raise ValueError(f"Unknown distribution keys: {', '.join(unknown)}")
+    for key, value in overrides.items():
+        if isinstance(distribution[key], dict) and isinstance(value, dict) and key != "maturity":
+            distribution[key].update(value)
+        else:
+            distribution[key] = value
+    return distribution
+
+
+def _weighted(rng: random.Random, choices: List[str], weights: Dict[str, float]) -> str:
+    return rng.choices(choices, weights=[weights.get(choice, 1) for choice in choices])[0]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class AnswerModel:
+    """Draws a full answer set for a given maturity"""
+
+    def __init__(self, compiled: CompiledSchema, distribution: Dict[str, Any]):
+        self.compiled = compiled
+        self.spread = distribution["answer_spread"]
+        self.unknown_rate = distribution["unknown_rate"]
+        self.multi_mean = distribution["multi_select_mean"]
+        self.overrides = distribution["questions"]
+        self.plans = []
+        for question in compiled.questions:
+            q_id = question["question_id"]
+            options = compiled.options.get(q_id, [])
+            scoring = question.get("scoring") or {}
+            known = [o for o in options if o.strip().lower() not in UNKNOWN_OPTIONS]
+            unknown = [o for o in options if o.strip().lower() in UNKNOWN_OPTIONS]
+            top = max([scoring.get(o, 0) for o in known] or [0]) or 1
+            self.plans.append((q_id, question["question_type"], known, unknown,
+                               [scoring.get(o, 0) / top for o in known]))
+
+    def _weights(self, levels: List[float], maturity: float) -> List[float]:
+        return [math.exp(-((level - maturity) ** 2) / (2 * self.spread ** 2)) + 1e-6 for level in levels]
+
+    def answers(self, rng: random.Random, maturity: float) -> Dict[str, Any]:
+        answers: Dict[str, Any] = {}
+        for q_id, q_type, known, unknown, levels in self.plans:
+            override = self.overrides.get(q_id)
+            if q_type == "text" or not (known or unknown):
+                answers[q_id] = rng.choice(_TEXT_ANSWERS)
+            elif override:
+                labels = list(override)
+                picked = rng.choices(labels, weights=[override[label] for label in labels])[0]
+                answers[q_id] = [picked] if q_type == "multi_select" else picked
+            elif unknown and rng.random() < self.unknown_rate:
+                picked = rng.choice(unknown)
+                answers[q_id] = [picked] if q_type == "multi_select" else picked
+            elif q_type == "multi_select":
+                count = min(len(known), 1 + sum(rng.random() < (self.multi_mean - 1) / max(1, len(known) - 1)
+                                                for _ in range(len(known) - 1)))
+                weights = self._weights(levels, maturity)
+                pool = list(range(len(known)))
+                chosen = []
+                for _ in range(count):
+                    index = rng.choices(pool, weights=[weights[i] for i in pool])[0]
+                    pool.remove(index)
+                    chosen.append(index)
+                answers[q_id] = [known[i] for i in sorted(chosen)]
+            else:
+                answers[q_id] = rng.choices(known, weights=self._weights(levels, maturity))[0]
+        return answers
+
+
+def _company(rng: random.Random, distribution: Dict[str, Any], created_at: datetime) -> Dict[str, Any]:
+    industry = _weighted(rng, INDUSTRIES, distribution["industry_weights"])
+    size = _weighted(rng, COMPANY_SIZES, distribution["size_weights"])
+    state = _weighted(rng, STATES, distribution["state_weights"])
+    name = f"{rng.choice(_NAME_WORDS)} {rng.choice(_INDUSTRY_WORDS.get(industry, ['Group']))} {rng.choice(_LEGAL_SUFFIXES)}"
+    first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+    domain = "".join(ch for ch in name.lower().rsplit(" ", 2)[0] if ch.isalnum()) + rng.choice([".in", ".com", ".co.in"])
+    return {
+        "company_name": name,
+        "contact_email": f"{first.lower()}.{last.lower()}@{domain}",
+        "contact_name": f"{first} {last}",
+        "designation": rng.choice(_DESIGNATIONS),
+        "current_backup_solution": rng.choice(_BACKUP_SOLUTIONS),
+        "industry": industry,
+        "company_size": size,
+        "state": state,
+        "additional_notes": "",
+        "created_at": created_at.isoformat()
+    }
+
+
+_compiled_cache: Dict[str, Tuple[CompiledSchema, ResilienceScorer]] = {}
+
+
+def generate_chunk(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Companies [start, start + count) with their assessments, and the encoded
+    responses and rollup rows of completed ones. Top-level so process pools
+    can run it.
+
+    task: chunk, start, count, seed, distribution, schema, schema_version,
+          max_score, end (ISO datetime), days, assessments_per_company, source
+    """
+    version = task["schema_version"]
+    if version not in _compiled_cache:
+        _compiled_cache[version] = (CompiledSchema(task["schema"], version),
+                                    ResilienceScorer(task["schema"], task["max_score"]))
+    compiled, scorer = _compiled_cache[version]
+    distribution = task["distribution"]
+    model = AnswerModel(compiled, distribution)
+    rng = random.Random(f"{task['seed']}:{task['chunk']}")
+    end = datetime.fromisoformat(task["end"])
+    span = task["days"] * 86400
+    sections = list(compiled.schema.keys())
+    alpha, beta = distribution["maturity"]["alpha"], distribution["maturity"]["beta"]
+    repeat_p = 1 / max(1.0, task["assessments_per_company"])
+
+    chunk = {"companies": [], "company_ids": [], "assessments": [], "assessment_ids": [], "responses": [], "results": []}
+    for _ in range(task["count"]):
+        company_created = end - timedelta(seconds=rng.uniform(0, span))
+        company = _company(rng, distribution, company_created)
+        company_id = _uuid(rng)
+        chunk["companies"].append(company)
+        chunk["company_ids"].append(company_id)
+
+        maturity = rng.betavariate(alpha, beta)
+        maturity += distribution["industry_maturity"].get(company["industry"], 0)
+        maturity += distribution["size_maturity"].get(company["company_size"], 0)
+
+        # 1 + geometric number of assessments, spread between sign-up and the end of the window
+        started = company_created
+        while True:
+            started = started + timedelta(seconds=rng.uniform(0, max(0.0, (end - started).total_seconds())))
+            assessment_id = _uuid(rng)
+            row = {"company_id": company_id, "created_at": started.isoformat(),
+                   "schema_version": version, "source": task["source"]}
+            if rng.random() < distribution["completion_rate"]:
+                completed = min(end, started + timedelta(minutes=rng.uniform(4, 90)))
+                row.update(status="completed", completed_at=completed.isoformat(), completed_sections=sections)
+                level = min(1.0, max(0.0, maturity))
+                answers = model.answers(rng, level)
+                chunk["responses"].extend(
+                    {"assessment_id": assessment_id, "question_id": q_id, "answer": compiled.encode_answer(q_id, answer)}
+                    for q_id, answer in answers.items()
+                )
+                chunk["results"].append(result_row(compiled, assessment_id, company_id, answers,
+                                                   scorer.calculate_score(answers), row["completed_at"]))
+            chunk["assessments"].append(row)
+            chunk["assessment_ids"].append(assessment_id)
+            maturity += distribution["reassessment_gain"]
+            if rng.random() < repeat_p:
+                break
+    return chunk
+
+
+def chunk_digest(chunk: Dict[str, Any]) -> bytes:
+    """Content hash of a chunk (write timestamps excluded), for checking determinism"""
+    return hashlib.sha256(dumps_bytes(chunk)).digest()
+
+
+def write_chunk(db, chunk: Dict[str, Any], batch_size: int) -> Dict[str, int]:
+    """Bulk write: companies, then their assessments, responses and rollup rows in batches"""
+    for start in range(0, len(chunk["companies"]), batch_size):
+        db.add_companies(chunk["companies"][start:start + batch_size], ids=chunk["company_ids"][start:start + batch_size])
+    for start in range(0, len(chunk["assessments"]), batch_size):
+        db.create_assessments(chunk["assessments"][start:start + batch_size],
+                              ids=chunk["assessment_ids"][start:start + batch_size])
+    for start in range(0, len(chunk["responses"]), batch_size):
+        db.add_responses(chunk["responses"][start:start + batch_size])
+    for start in range(0, len(chunk["results"]), batch_size):
+        db.record_results(chunk["results"][start:start + batch_size])
+    return {
+        "companies": len(chunk["companies"]),
+        "assessments": len(chunk["assessments"]),
+        "responses": len(chunk["responses"])
+    }
@@ -0,0 +1,446 @@
+"""
+Tracing
+Lightweight spans for requests and the operations inside them (storage,
+scoring, email), exported as OTLP/JSON
+
+A sampled request gets a root span in TracingMiddleware; operations wrapped
+with @timed (utils.metrics) become its children. The current span lives in
+a context variable, so it follows the request into run_in_threadpool calls
+and background tasks. Outside a sampled request starting a span costs one
+context variable lookup.
+
+Finished spans are batched by a writer thread into OTLP/JSON
+ExportTraceServiceRequest documents: one per line in TRACING_EXPORT_FILE
+(readable by the OpenTelemetry Collector's otlpjsonfile receiver) and/or
+POSTed to TRACING_OTLP_ENDPOINT (an OTLP/HTTP /v1/traces URL). The most
+recent traces are also kept in memory for /api/admin/traces.
+"""
+
+import functools
+import inspect
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import (TRACING_ENABLED, TRACING_SAMPLE_RATIO, TRACING_EXPORT_FILE, TRACING_OTLP_ENDPOINT,
+                    TRACING_SERVICE_NAME, TRACING_RESPONSE_HEADER, TRACING_RECENT_TRACES)
+from .json_codec import dumps_bytes
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_ERROR = 2
+
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL = 1.0
+# Finished spans waiting for export; beyond this they are dropped rather than queued
+MAX_PENDING = 20000
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+# request.validate span of the route being handled, closed when the endpoint is entered
+_validation: ContextVar[Optional["Span"]] = ContextVar("validation_span", default=None)
+
+
+class Span:
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", trace_id: str, parent_id: Optional[str], name: str,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        self.tracer.submit(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        # int64 is a string in OTLP/JSON
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _parse_traceparent(header: str) -> Optional[tuple]:
+    """W3C traceparent '00-<trace id>-<parent id>-<flags>' -> (trace id, parent id, sampled)"""
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class Tracer:
+    """Sampling decisions, export batching and the recent-trace store"""
+
+    def __init__(self, sample_ratio: float = TRACING_SAMPLE_RATIO, export_file: Optional[Path] = TRACING_EXPORT_FILE,
+                 otlp_endpoint: str = TRACING_OTLP_ENDPOINT, service_name: str = TRACING_SERVICE_NAME,
+                 recent_traces: int = TRACING_RECENT_TRACES):
+        self.sample_ratio = sample_ratio
+        self.export_file = Path(export_file) if export_file else None
+        self.otlp_endpoint = otlp_endpoint
+        self.resource = {"attributes": [
+            _otlp_attribute("service.name", service_name),
+            _otlp_attribute("process.pid", os.getpid())
+        ]}
+        self.recent_traces = recent_traces
+        self._recent: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.pending = 0
+        self.exported = 0
+        self.dropped = 0
+        self.export_errors = 0
+
+    # ==============================
+    # SPANS
+    # ==============================
+
+    def start_root(self, name: str, traceparent: str = "", attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        """
+        Root span of a request, if it is sampled. An incoming traceparent
+        header decides for the caller (parent-based sampling) and joins its trace.
+        """
+        parent = _parse_traceparent(traceparent) if traceparent else None
+        if parent:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = f"{random.getrandbits(128):032x}", None, random.random() < self.sample_ratio
+        if not sampled:
+            return None
+        return Span(self, trace_id, parent_id, name, SPAN_KIND_SERVER, attributes)
+
+    def submit(self, span: Span):
+        with self._lock:
+            trace = self._recent.get(span.trace_id)
+            if trace is None:
+                trace = self._recent[span.trace_id] = []
+                while len(self._recent) > self.recent_traces:
+                    self._recent.popitem(last=False)
+            trace.append(span)
+            if not (self.export_file or self.otlp_endpoint):
+                return
+            if self.pending >= MAX_PENDING:
+                self.dropped += 1
+                return
+            self.pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+        self._queue.put(span)
+
+    # ==============================
+    # EXPORT
+    # ==============================
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + EXPORT_INTERVAL
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                self._export(batch)
+
+    def _export(self, spans: List[Span]):
+        document = dumps_bytes({"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "crma.tracing"}, "spans": [span.to_otlp() for span in spans]}]
+        }]})
+        ok = True
+        if self.export_file:
+            try:
+                self.export_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.export_file, "ab") as f:
+                    f.write(document + b"\n")
+            except OSError as e:
+                ok = False
+                print(f"[!] Trace export to {self.export_file} failed: {e}")
+        if self.otlp_endpoint:
+            request = urllib.request.Request(self.otlp_endpoint, data=document, method="POST",
+                                             headers={"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except OSError:
+                ok = False
+        with self._lock:
+            self.pending -= len(spans)
+            if ok:
+                self.exported += len(spans)
+            else:
+                self.export_errors += 1
+
+    def shutdown(self):
+        """Export what is queued and stop the exporter thread"""
+        thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=10)
+            self._thread = None
+
+    # ==============================
+    # LOOKUP
+    # ==============================
+
+    def get_trace(self, trace_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            spans = list(self._recent.get(trace_id, []))
+        if not spans:
+            return None
+        return [span.describe() for span in sorted(spans, key=lambda span: span.start_ns)]
+
+    def recent(self, min_duration_ms: float = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """Recent request (root) spans, slowest first"""
+        with self._lock:
+            roots = [span for spans in self._recent.values() for span in spans if span.kind == SPAN_KIND_SERVER]
+        roots = [span for span in roots if span.duration_ms >= min_duration_ms]
+        roots.sort(key=lambda span: span.duration_ms, reverse=True)
+        return [dict(span.describe(), trace_id=span.trace_id) for span in roots[:limit]]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            traces = len(self._recent)
+        return {
+            "enabled": TRACING_ENABLED,
+            "sample_ratio": self.sample_ratio,
+            "export_file": str(self.export_file) if self.export_file else None,
+            "otlp_endpoint": self.otlp_endpoint or None,
+            "recent_traces": traces,
+            "pending": self.pending,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "export_errors": self.export_errors
+        }
+
+
+TRACER = Tracer()
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, activate: bool = True) -> Optional[Span]:
+    """
+    Child of the current span, or None outside a sampled request.
+    An activated span is current until finish(); finish it in the same context.
+    """
+    parent = _current.get()
+    if parent is None:
+        return None
+    span = Span(parent.tracer, parent.trace_id, parent.span_id, name, SPAN_KIND_INTERNAL, attributes)
+    if activate:
+        span._token = _current.set(span)
+    return span
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace_id if span else None
+
+
+# ==============================
+# FASTAPI INTEGRATION
+# ==============================
+
+def _end_validation():
+    span = _validation.get()
+    if span is not None:
+        span.finish()
+
+
+def _mark_validated(endpoint):
+    """Wrap an endpoint so entering it closes the request.validate span"""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            _end_validation()
+            return await endpoint(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        _end_validation()
+        return endpoint(*args, **kwargs)
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """
+    APIRoute adding a request.validate span: reading the body and resolving
+    parameters (Pydantic validation) up to the endpoint call
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _mark_validated(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            span = start_span("request.validate", activate=False)
+            if span is None:
+                return await handler(request)
+            token = _validation.set(span)
+            try:
+                return await handler(request)
+            except Exception as e:
+                # Raised before the endpoint ran: invalid body or parameters
+                span.finish(e)
+                raise
+            finally:
+                span.finish()
+                _validation.reset(token)
+        return traced_handler
+
+
+class TracingMiddleware:
+    """
+    Root span per sampled request; adds the trace id response header. The
+    span ends with the response body, so background tasks show as children
+    that outlive it rather than stretching the request.
+    """
+
+    def __init__(self, app, tracer: Tracer = TRACER, header: str = TRACING_RESPONSE_HEADER,
+                 excluded_paths=("/metrics",)):
+        self.app = app
+        self.tracer = tracer
+        self.header = header.lower().encode("latin-1")
+        self.excluded_paths = frozenset(excluded_paths)
+        self._templates: Dict[Any, str] = {}
+
+    def _template(self, scope) -> Optional[str]:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return None
+        if endpoint not in self._templates:
+            self._templates = {
+                getattr(route, "endpoint", None): route.path
+                for route in getattr(scope.get("app"), "routes", []) if hasattr(route, "path")
+            }
+        return self._templates.get(endpoint)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = ""
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        span = self.tracer.start_root(f"{scope['method']} {scope['path']}", traceparent, {
+            "http.method": scope["method"],
+            "http.target": scope["path"]
+        })
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        def close(error: Optional[BaseException] = None):
+            route = self._template(scope)
+            if route:
+                span.name = f"{scope['method']} {route}"
+                span.set_attribute("http.route", route)
+            span.finish(error)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.error = f"HTTP {message['status']}"
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (self.header, span.trace_id.encode("latin-1"))
+                ])
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                close()
+
+        # Current until the app returns, which includes the background tasks
+        token = _current.set(span)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            close(e)
+            raise
+        finally:
+            close()
+            _current.reset(token)
@@ -0,0 +1,263 @@
+"""
+Traffic Capture
+Anonymized request traces for replaying real traffic mixes against a local
+instance (benchmarks/replay_traffic.py)
+
+Each sampled request becomes one JSON line: route template, timing, status,
+sizes and the decoded request body. Emails and names are replaced by keyed
+hashes (the same input always maps to the same token, so cache hits and
+per-company fan-out survive anonymization), other free text by filler of
+the same length. Ids in JSON responses are kept so the replay can map them
+to the ids its own run creates.
+
+Writing happens on a background thread; the request path only enqueues.
+"""
+
+import hashlib
+import hmac
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import (TRAFFIC_CAPTURE_DIR, TRAFFIC_CAPTURE_SAMPLE_RATE, TRAFFIC_CAPTURE_SALT,
+                    TRAFFIC_CAPTURE_MAX_BODY, TRAFFIC_CAPTURE_ROTATE_MB)
+from .json_codec import dumps_bytes
+from .wire_format import decode_body
+
+EMAIL_FIELDS = {"email", "contact_email"}
+NAME_FIELDS = {"company_name", "contact_name"}
+# Free text that may identify someone; kept only as its length
+TEXT_FIELDS = {"additional_notes", "comment", "current_backup_solution", "designation"}
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@([\w-]+\.)+[\w-]+")
+
+# Records waiting for the writer; beyond this they are dropped rather than queued
+MAX_PENDING = 10000
+
+
+class Anonymizer:
+    """Keyed hashing of identifying values, stable for a given salt"""
+
+    def __init__(self, salt: str = TRAFFIC_CAPTURE_SALT):
+        self._key = salt.encode() if salt else os.urandom(32)
+
+    def token(self, value: str) -> str:
+        return hmac.new(self._key, value.strip().lower().encode(), hashlib.sha256).hexdigest()[:12]
+
+    def email(self, value: str) -> str:
+        local, _, domain = value.strip().lower().rpartition("@")
+        # .example is reserved (RFC 2606), so replayed emails can never be delivered
+        return f"u{self.token(local)}@d{self.token(domain)}.example"
+
+    def _scrub_text(self, value: str) -> str:
+        return EMAIL_PATTERN.sub(lambda match: self.email(match.group(0)), value)
+
+    def value(self, data: Any, field: str = "") -> Any:
+        """Anonymized copy of a decoded body"""
+        if isinstance(data, dict):
+            return {key: self.value(item, key) for key, item in data.items()}
+        if isinstance(data, list):
+            return [self.value(item, field) for item in data]
+        if not isinstance(data, str) or not data:
+            return data
+        if field in EMAIL_FIELDS:
+            return self.email(data)
+        if field in NAME_FIELDS:
+            return f"{field.split('_')[0].title()} {self.token(data)}"
+        if field in TEXT_FIELDS:
+            return "x" * len(data)
+        return self._scrub_text(data)
+
+    def query(self, query_string: str) -> str:
+        return urlencode([(key, self.value(value, key)) for key, value in parse_qsl(query_string, keep_blank_values=True)])
+
+
+class TrafficRecorder:
+    """Appends trace records to rotating JSONL files from a writer thread"""
+
+    def __init__(self, directory: Path = TRAFFIC_CAPTURE_DIR, rotate_mb: float = TRAFFIC_CAPTURE_ROTATE_MB):
+        self.directory = Path(directory)
+        self.rotate_bytes = int(rotate_mb * 1024 * 1024)
+        self._queue: "queue.SimpleQueue[Optional[bytes]]" = queue.SimpleQueue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.dropped = 0
+        self.path: Optional[Path] = None
+
+    def record(self, record: Dict[str, Any]):
+        with self._lock:
+            if self._pending >= MAX_PENDING:
+                self.dropped += 1
+                return
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                self._thread.start()
+        self._queue.put(dumps_bytes(record) + b"\n")
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"traffic-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+        return open(self.path, "ab")
+
+    def _run(self):
+        f = self._open()
+        written = 0
+        try:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    break
+                # Batch whatever else is already queued into one write
+                lines = [line]
+                while len(lines) < 1000:
+                    try:
+                        line = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if line is None:
+                        self._queue.put(None)
+                        break
+                    lines.append(line)
+                chunk = b"".join(lines)
+                f.write(chunk)
+                f.flush()
+                written += len(chunk)
+                with self._lock:
+                    self._pending -= len(lines)
+                    self.recorded += len(lines)
+                if written >= self.rotate_bytes:
+                    f.close()
+                    f = self._open()
+                    written = 0
+        finally:
+            f.close()
+
+    def close(self):
+        """Flush queued records and stop the writer"""
+        thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=10)
+            self._thread = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"file": str(self.path) if self.path else None, "recorded": self.recorded,
+                "dropped": self.dropped, "pending": self._pending}
+
+
+def _decode(body: bytes, content_type: str) -> Any:
+    """Decoded JSON/MessagePack body, or None when it isn't one"""
+    if not body:
+        return None
+    try:
+        return decode_body(body, content_type)
+    except (LookupError, ValueError, RuntimeError):
+        return None
+
+
+def _response_ids(data: Any) -> Dict[str, str]:
+    """Top-level *_id values of a response, which later requests may refer to"""
+    if not isinstance(data, dict):
+        return {}
+    return {key: value for key, value in data.items() if key.endswith("_id") and isinstance(value, str)}
+
+
+class TrafficCaptureMiddleware:
+    """
+    Records a sample of requests as anonymized traces. Admin endpoints (their
+    payloads are exports and tokens), /metrics and docs are never recorded.
+    """
+
+    def __init__(self, app, recorder: TrafficRecorder, anonymizer: Optional[Anonymizer] = None,
+                 sample_rate: float = TRAFFIC_CAPTURE_SAMPLE_RATE, max_body: int = TRAFFIC_CAPTURE_MAX_BODY,
+                 excluded_prefixes: Iterable[str] = ("/api/admin", "/metrics", "/docs", "/redoc", "/openapi.json")):
+        self.app = app
+        self.recorder = recorder
+        self.anonymizer = anonymizer or Anonymizer()
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        self._templates: Dict[Any, str] = {}
+
+    def _template(self, scope) -> Optional[str]:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return None
+        if endpoint not in self._templates:
+            self._templates = {
+                getattr(route, "endpoint", None): route.path
+                for route in getattr(scope.get("app"), "routes", []) if hasattr(route, "path")
+            }
+        return self._templates.get(endpoint)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] == "OPTIONS"
+                or scope["path"].startswith(self.excluded_prefixes) or random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        start = time.perf_counter()
+        request_body = []
+        response_body = []
+        state = {"status": 500, "request_bytes": 0, "response_bytes": 0, "response_type": ""}
+
+        async def receive_wrapper():
+            message = await receive()
+            body = message.get("body", b"")
+            state["request_bytes"] += len(body)
+            if state["request_bytes"] <= self.max_body:
+                request_body.append(body)
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        state["response_type"] = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                state["response_bytes"] += len(body)
+                if state["response_bytes"] <= self.max_body:
+                    response_body.append(body)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope.get("headers", [])}
+            content_type = headers.get("content-type", "")
+            body = None
+            if state["request_bytes"] <= self.max_body:
+                body = self.anonymizer.value(_decode(b"".join(request_body), content_type))
+            ids = {}
+            if state["response_bytes"] <= self.max_body:
+                ids = _response_ids(_decode(b"".join(response_body), state["response_type"]))
+            self.recorder.record({
+                "ts": round(started_at, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": self._template(scope),
+                "query": self.anonymizer.query(scope.get("query_string", b"").decode("latin-1")),
+                "content_type": content_type,
+                "accept": headers.get("accept", ""),
+                "body": body,
+                "status": state["status"],
+                "duration_ms": round(duration * 1000, 3),
+                "request_bytes": state["request_bytes"],
+                "response_bytes": state["response_bytes"],
+                "ids": ids
+            })
@@ -0,0 +1,67 @@
+"""
+Wire Format Negotiation
+Decodes request bodies as JSON or MessagePack by Content-Type and encodes
+responses in the format the client asks for via Accept
+"""
+
+from typing import Any
+
+from .json_codec import loads
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise RuntimeError("MessagePack requires msgpack (pip install msgpack); send application/json instead")
+    return msgpack
+
+
+def _media_type(header: str) -> str:
+    """'application/json; charset=utf-8' -> 'application/json'"""
+    return (header or "").split(";", 1)[0].strip().lower()
+
+
+def is_msgpack(content_type: str) -> bool:
+    return _media_type(content_type) in MSGPACK_MEDIA_TYPES
+
+
+def wants_msgpack(accept: str) -> bool:
+    """True when the Accept header lists a MessagePack type (quality values are ignored)"""
+    return any(_media_type(part) in MSGPACK_MEDIA_TYPES for part in (accept or "").split(","))
+
+
+def decode_body(body: bytes, content_type: str) -> Any:
+    """
+    Parse a request body according to its Content-Type
+
+    Raises:
+        RuntimeError: for MessagePack bodies when msgpack is not installed
+        LookupError: for media types other than JSON and MessagePack
+        ValueError: if the body does not parse
+    """
+    media_type = _media_type(content_type)
+    if media_type in MSGPACK_MEDIA_TYPES:
+        msgpack = _msgpack()
+        try:
+            return msgpack.unpackb(body, raw=False, strict_map_key=True)
+        except Exception as e:
+            raise ValueError(f"Invalid MessagePack body: {e}")
+    if media_type in ("", JSON_MEDIA_TYPE) or media_type.endswith("+json"):
+        try:
+            return loads(body)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON body: {e}")
+    raise LookupError(f"Unsupported Content-Type '{media_type}'. Use {JSON_MEDIA_TYPE} or {MSGPACK_MEDIA_TYPE}")
+
+
+def encode_msgpack(data: Any) -> bytes:
+    """
+    Raises:
+        RuntimeError: when msgpack is not installed
+    """
+    return _msgpack().packb(data, use_bin_type=True)
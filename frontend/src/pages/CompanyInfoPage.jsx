@@ -61,13 +61,21 @@ const CompanyInfoPage = ({ config, assessmentData, setAssessmentData }) => {
 
         try {
             // Call backend API to create company
-            const response = await fetch(`${API_BASE_URL}/api/company/create`, {
+            const createCompany = (extra = {}) => fetch(`${API_BASE_URL}/api/company/create`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(formData)
+                body: JSON.stringify({ ...formData, ...extra })
             });
 
-            const data = await response.json();
+            let response = await createCompany();
+            let data = await response.json();
+
+            // Free-mail address: only the user can tell whether their organisation
+            // has registered before
+            if (response.status === 409 && data.detail && data.detail.needs_confirmation) {
+                response = await createCompany({ confirm_same_organisation: window.confirm(data.detail.message) });
+                data = await response.json();
+            }
 
             if (data.success) {
                 setAssessmentData({
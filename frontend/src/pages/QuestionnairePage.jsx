@@ -1,7 +1,27 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { API_BASE_URL } from '../config';
 
+// Compact submit format: option indexes instead of labels, free text as-is.
+// Labels that aren't options are dropped (the server rejects them); a blank
+// single-select answer is sent as '' (a question with only a comment)
+const toCompactAnswer = (q, answer) => {
+    const options = q.options || [];
+    if (q.question_type === 'multi_select') {
+        return (Array.isArray(answer) ? answer : [answer])
+            .map(a => options.indexOf(a))
+            .filter(index => index !== -1);
+    }
+    if (q.question_type === 'single_select') {
+        const index = options.indexOf(answer);
+        return index !== -1 ? index : '';
+    }
+    return answer;
+};
+
+// Autosave: changed answers are batched and sent as one draft delta after a pause
+const AUTOSAVE_DELAY_MS = 1500;
+
 const QuestionnairePage = ({ config, assessmentData, setAssessmentData }) => {
     const navigate = useNavigate();
     const [loading, setLoading] = useState(true);
@@ -9,6 +29,34 @@ const QuestionnairePage = ({ config, assessmentData, setAssessmentData }) => {
     const [questionnaire, setQuestionnaire] = useState(null);
     const [responses, setResponses] = useState({});
     const [notes, setNotes] = useState({});
+    const [peerStats, setPeerStats] = useState(null);
+    const pendingDraft = useRef({ answers: {}, comments: {} });
+    const autosaveTimer = useRef(null);
+
+    const flushDraft = () => {
+        clearTimeout(autosaveTimer.current);
+        autosaveTimer.current = null;
+        const delta = pendingDraft.current;
+        if (!assessmentData.assessmentId || (!Object.keys(delta.answers).length && !Object.keys(delta.comments).length)) {
+            return;
+        }
+        pendingDraft.current = { answers: {}, comments: {} };
+        fetch(`${API_BASE_URL}/api/assessment/${assessmentData.assessmentId}/draft`, {
+            method: 'PATCH',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(delta),
+            keepalive: true
+        }).catch(err => console.warn('Autosave failed:', err));
+    };
+
+    const queueDraft = (kind, questionId, value) => {
+        pendingDraft.current[kind][questionId] = value;
+        clearTimeout(autosaveTimer.current);
+        autosaveTimer.current = setTimeout(flushDraft, AUTOSAVE_DELAY_MS);
+    };
+
+    // Send whatever is still pending when leaving the page
+    useEffect(() => () => flushDraft(), []);
 
     // Fetch questionnaire schema from backend
     useEffect(() => {
@@ -35,12 +83,34 @@ const QuestionnairePage = ({ config, assessmentData, setAssessmentData }) => {
             });
     }, []);
 
+    // "X% of organisations in your industry chose this"; the page works without it
+    useEffect(() => {
+        const industry = assessmentData?.companyInfo?.industry;
+        fetch(`${API_BASE_URL}/api/questionnaire/peer-stats${industry ? `?industry=${encodeURIComponent(industry)}` : ''}`)
+            .then(res => (res.ok ? res.json() : null))
+            .then(data => setPeerStats(data))
+            .catch(err => console.warn('Peer statistics unavailable:', err));
+    }, [assessmentData?.companyInfo?.industry]);
+
+    const peerShare = (questionId, option) => {
+        const share = peerStats?.options?.[questionId]?.[option];
+        if (share === undefined) {
+            return null;
+        }
+        return (
+            <span style={{ marginLeft: 'auto', fontSize: '0.85rem', opacity: 0.7, whiteSpace: 'nowrap' }}>
+                {Math.round(share)}% of organisations{peerStats.industry ? ' in your industry' : ''} chose this
+            </span>
+        );
+    };
+
     const handleAnswerChange = (questionId, answer) => {
         console.log('Answer changed:', questionId, answer);
         setResponses(prev => ({
             ...prev,
             [questionId]: answer
         }));
+        queueDraft('answers', questionId, Array.isArray(answer) && answer.length === 0 ? null : answer);
     };
 
     const handleNoteChange = (questionId, note) => {
@@ -48,6 +118,7 @@ const QuestionnairePage = ({ config, assessmentData, setAssessmentData }) => {
             ...prev,
             [questionId]: note
         }));
+        queueDraft('comments', questionId, note);
     };
 
     // Loading state
@@ -355,6 +426,7 @@ const QuestionnairePage = ({ config, assessmentData, setAssessmentData }) => {
                                                     <span style={{ fontWeight: isSelected ? 'bold' : 'normal' }}>
                                                         {option}
                                                     </span>
+                                                    {peerShare(q.question_id, option)}
                                                 </label>
                                             );
                                         })
@@ -403,6 +475,7 @@ const QuestionnairePage = ({ config, assessmentData, setAssessmentData }) => {
                                                 <span style={{ fontWeight: currentAnswer === option ? 'bold' : 'normal' }}>
                                                     {option}
                                                 </span>
+                                                {peerShare(q.question_id, option)}
                                             </label>
                                         ))
                                     )}
@@ -477,36 +550,47 @@ const QuestionnairePage = ({ config, assessmentData, setAssessmentData }) => {
                                 // Transform flat responses to the structure expected by Backend/ReviewPage
                                 // Structure: { "Section Name": [ { question_id, answer, ... } ] }
                                 const formattedResponses = {};
+                                const compactAnswers = {};
+                                const compactComments = {};
 
                                 allQuestions.forEach(q => {
                                     let answer = responses[q.question_id];
                                     const note = notes[q.question_id] || "";
+                                    const noteOnly = (!answer || (Array.isArray(answer) && answer.length === 0)) && note.trim().length > 0;
 
-                                    // If no answer selected but note exists, use note as answer
-                                    if ((!answer || (Array.isArray(answer) && answer.length === 0)) && note.trim().length > 0) {
-                                        answer = `Other: ${note}`;
+                                    // No option selected but a note: submit the note as the comment with a blank
+                                    // answer (the server only accepts listed options)
+                                    if (noteOnly) {
+                                        answer = q.question_type === 'multi_select' ? [] : '';
                                     }
 
-                                    if (answer) {
+                                    if (answer || noteOnly) {
                                         if (!formattedResponses[q.sectionName]) {
                                             formattedResponses[q.sectionName] = [];
                                         }
 
+                                        // Text, type and section are resolved from question_id server-side
                                         formattedResponses[q.sectionName].push({
                                             question_id: q.question_id,
-                                            section: q.sectionName,
-                                            question_text: q.question_text,
-                                            question_type: q.question_type,
                                             answer: answer,
-                                            comment: note
+                                            ...(note ? { comment: note } : {})
                                         });
+                                        compactAnswers[q.question_id] = toCompactAnswer(q, answer);
+                                        if (note) {
+                                            compactComments[q.question_id] = note;
+                                        }
                                     }
                                 });
 
                                 // Update global state
                                 setAssessmentData(prev => ({
                                     ...prev,
-                                    responses: formattedResponses
+                                    responses: formattedResponses,
+                                    compact: {
+                                        schema_version: questionnaire.version,
+                                        answers: compactAnswers,
+                                        comments: compactComments
+                                    }
                                 }));
 
                                 navigate('/review');
@@ -14,6 +14,8 @@ const ResultsPage = () => {
     const [email, setEmail] = useState('');
     const [sending, setSending] = useState(false);
     const [emailStatus, setEmailStatus] = useState(null);
+    const [attachPdf, setAttachPdf] = useState(true);
+    const [downloading, setDownloading] = useState(false);
 
     // Effect for loading results
     useEffect(() => {
@@ -161,7 +163,8 @@ const ResultsPage = () => {
                 body: JSON.stringify({
                     email: email,
                     company_name: location.state?.companyInfo?.company_name || "Client",
-                    results: results
+                    results: results,
+                    attach_pdf: attachPdf
                 })
             });
 
@@ -181,6 +184,31 @@ const ResultsPage = () => {
         }
     };
 
+    const handleDownloadPdf = async () => {
+        setDownloading(true);
+        try {
+            const response = await fetch(`${API_BASE_URL}/api/assessment/report`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    company_name: location.state?.companyInfo?.company_name || "Client",
+                    results: results
+                })
+            });
+
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.detail || 'Failed to generate report');
+            }
+            window.open(`${API_BASE_URL}${data.download_url}`, '_blank');
+        } catch (err) {
+            console.error(err);
+            alert('Failed to generate PDF: ' + err.message);
+        } finally {
+            setDownloading(false);
+        }
+    };
+
     return (
         <div style={pageStyle}>
             <div style={containerStyle}>
@@ -285,6 +313,14 @@ const ResultsPage = () => {
                             {sending ? 'Sending...' : 'Send to Email 📧'}
                         </button>
                     </div>
+                    <label style={{ display: 'flex', alignItems: 'center', gap: '8px', marginTop: '12px', fontSize: '0.9rem', opacity: 0.8 }}>
+                        <input
+                            type="checkbox"
+                            checked={attachPdf}
+                            onChange={(e) => setAttachPdf(e.target.checked)}
+                        />
+                        Attach PDF scorecard
+                    </label>
                 </div>
 
                 <div className="no-print" style={{ display: 'flex', justifyContent: 'center', gap: '20px', paddingTop: '20px' }}>
@@ -294,6 +330,13 @@ const ResultsPage = () => {
                     >
                         <span>🖨️</span> Print PDF
                     </button>
+                    <button
+                        onClick={handleDownloadPdf}
+                        disabled={downloading}
+                        style={{ padding: '12px 25px', background: '#222', border: '1px solid #444', color: 'white', borderRadius: '6px', cursor: downloading ? 'not-allowed' : 'pointer', display: 'flex', alignItems: 'center', gap: '10px' }}
+                    >
+                        <span>📄</span> {downloading ? 'Generating...' : 'Download PDF'}
+                    </button>
                     <button
                         onClick={() => navigate('/')}
                         style={{ padding: '12px 25px', background: '#e7000b', border: 'none', color: 'white', fontWeight: 'bold', borderRadius: '6px', cursor: 'pointer' }}
@@ -14,16 +14,20 @@ const ReviewPage = ({ config, assessmentData, setAssessmentData }) => {
         try {
             console.log("Submitting Assessment Data:", assessmentData);
 
-            // Prepare submission payload matching backend expectation (AssessmentSubmit model)
-            const payload = {
-                company_info: assessmentData.companyInfo,
-                assessment_id: assessmentData.assessmentId,
-                responses: assessmentData.responses || {}
-            };
+            // Compact format (option indexes keyed by question_id) when the questionnaire page built it,
+            // otherwise the full AssessmentSubmit model
+            const payload = assessmentData.compact
+                ? { assessment_id: assessmentData.assessmentId, ...assessmentData.compact }
+                : {
+                    company_info: assessmentData.companyInfo,
+                    assessment_id: assessmentData.assessmentId,
+                    responses: assessmentData.responses || {}
+                };
+            const endpoint = assessmentData.compact ? '/api/assessment/submit/compact' : '/api/assessment/submit';
 
             console.log("Payload:", payload);
 
-            const response = await fetch(`${API_BASE_URL}/api/assessment/submit`, {
+            const response = await fetch(`${API_BASE_URL}${endpoint}`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',